@@ -1,19 +1,22 @@
 # backend/api/auth_routes.py
 from fastapi import APIRouter, HTTPException, status, Depends, Query, Body
 from fastapi.responses import RedirectResponse
+from fastapi_cache.decorator import cache
 from typing import Dict, Any, Optional
 import logging
 
+from auth.current_user import get_current_user
 from auth.entra_auth import (
-    get_current_user, 
     get_login_url, 
     exchange_code_for_token,
     create_or_update_user_profile
 )
-from config.settings import Settings
+from utils.response_cache import (
+    user_id_key_builder,
+    USER_CACHE_EXPIRE_SECONDS
+)
+from utils.user_cache import refresh_cached_user
 
-# Initialize settings
-settings = Settings()
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -21,6 +24,9 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
+# Profile fields a user may change through PUT /auth/profile
+_UPDATABLE_PROFILE_FIELDS = frozenset({"grade_level", "subjects_of_interest", "learning_style"})
+
 @router.get("/login")
 async def login(redirect_uri: str = Query(...)):
     """
@@ -70,6 +76,7 @@ async def auth_callback(
         )
 
 @router.get("/profile")
+@cache(expire=USER_CACHE_EXPIRE_SECONDS, key_builder=user_id_key_builder)
 async def get_profile(current_user: Dict[str, Any] = Depends(get_current_user)):
     """
     Get the current user's profile.
@@ -98,13 +105,13 @@ async def update_profile(
         Updated user profile information
     """
     try:
-        # Merge current user data with profile updates
-        updated_user = current_user.copy()
-        updated_user.update({
-            "grade_level": profile_data.get("grade_level", current_user.get("grade_level")),
-            "subjects_of_interest": profile_data.get("subjects_of_interest", current_user.get("subjects_of_interest", [])),
-            "learning_style": profile_data.get("learning_style", current_user.get("learning_style"))
-        })
+        # Merge current user data with profile updates; explicit None values keep existing data
+        patch = {
+            k: profile_data[k]
+            for k in _UPDATABLE_PROFILE_FIELDS & profile_data.keys()
+            if profile_data[k] is not None
+        }
+        updated_user = {"subjects_of_interest": [], **current_user, **patch}
         
         # Save to Azure Search
         success = await create_or_update_user_profile(updated_user)
@@ -114,6 +121,9 @@ async def update_profile(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to update profile"
             )
+        
+        # Drop the cached user document and responses built from the old profile
+        await refresh_cached_user(current_user["id"])
             
         return updated_user
         
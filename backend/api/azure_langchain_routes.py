@@ -4,14 +4,25 @@ API routes for Azure LangChain integration in the Personalized Learning Co-pilot
 These endpoints provide access to AI-powered educational features.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Body, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from fastapi_cache.decorator import cache
 from typing import List, Dict, Any, Optional
+from functools import lru_cache
 import logging
 
 from models.user import User
-from auth.authentication import get_current_user
-from services.azure_langchain_service import get_azure_langchain_service
-from utils.vector_store import get_vector_store
+from models.content import Content, ContentType, DifficultyLevel
+from models.ai_request import AILearningPlanRequest, AskRequest, SearchRequest
+from auth.current_user import get_current_user, get_current_user_model
+from api.dependencies import (
+    provide_azure_langchain_service,
+    provide_recommendation_service,
+    provide_vector_store
+)
+from utils.odata import quote_odata_string
+from utils.streaming import sse_stream, SSE_MEDIA_TYPE, SSE_HEADERS
+from utils.response_cache import user_id_key_builder, USER_CACHE_EXPIRE_SECONDS
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -19,21 +30,47 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter(prefix="/ai", tags=["ai"])
 
+# Content fields used when building a learning plan
+LEARNING_PLAN_CONTENT_FIELDS = [
+    "id", "title", "description", "content_type", "difficulty_level", "url", "duration_minutes"
+]
+
+# Lookup tables for converting stored enum strings to enum values
+_CONTENT_TYPES = ContentType._value2member_map_
+_DIFFICULTY_LEVELS = DifficultyLevel._value2member_map_
+
+@lru_cache(maxsize=32)
+def _grade_filter(grade_level: int) -> str:
+    """Build the OData filter matching content for a grade level and its neighbours."""
+    return (
+        f"(grade_level/any(g: g eq {grade_level})"
+        f" or grade_level/any(g: g eq {grade_level - 1})"
+        f" or grade_level/any(g: g eq {grade_level + 1}))"
+    )
+
 @router.post("/learning-plan")
 async def create_learning_plan(
-    subject: str = Body(..., embed=True),
-    current_user: Dict = Depends(get_current_user)
+    plan_request: AILearningPlanRequest,
+    stream: bool = Query(True),
+    current_user: Dict = Depends(get_current_user),
+    user: User = Depends(get_current_user_model),
+    vector_store = Depends(provide_vector_store),
+    langchain_service = Depends(provide_azure_langchain_service)
 ):
     """
     Create a personalized learning plan for a student using AI.
     
     Args:
-        subject: Subject for the learning plan
+        plan_request: Request with the subject for the learning plan
+        stream: Stream the plan as Server-Sent Events while it is generated
         current_user: Current authenticated user
         
     Returns:
-        A personalized learning plan
+        A personalized learning plan, or an SSE stream of `delta` events
+        followed by a final `plan` event when streaming
     """
+    subject = plan_request.subject
+    
     try:
         # Ensure we have a valid user
         if not current_user:
@@ -45,52 +82,47 @@ async def create_learning_plan(
             )
         
         # Log the request for debugging
-        logger.info(f"Creating learning plan for user ID: {current_user.get('id')} and subject: {subject}")
-        
-        # Convert user dict to User model
-        user = User(**current_user)
-        
-        # Get vector store for content retrieval
-        vector_store = await get_vector_store()
+        logger.info("Creating learning plan for user ID: %s and subject: %s", current_user.get('id'), subject)
         
         # Retrieve relevant content for the subject
         query_text = f"Educational content for {subject} appropriate for a student in grade {user.grade_level}"
         
         # Build filter for content
-        filter_expression = f"subject eq '{subject}'"
+        filter_expression = f"subject eq {quote_odata_string(subject)}"
         
         # Add grade level filter if available
         if user.grade_level:
-            grade_filters = [
-                f"grade_level/any(g: g eq {user.grade_level})",
-                f"grade_level/any(g: g eq {user.grade_level - 1})",
-                f"grade_level/any(g: g eq {user.grade_level + 1})"
-            ]
-            grade_filter = f"({' or '.join(grade_filters)})"
-            filter_expression = f"{filter_expression} and {grade_filter}"
-        
-        # Get content items
+            filter_expression = f"{filter_expression} and {_grade_filter(user.grade_level)}"
+        
+        # Get content items, only fetching the fields the plan prompt needs
         content_items = await vector_store.vector_search(
             query_text=query_text,
             filter_expression=filter_expression,
-            limit=15  # Get enough content for a good learning plan
+            limit=15,  # Get enough content for a good learning plan
+            select=LEARNING_PLAN_CONTENT_FIELDS
         )
         
-        # Convert to Content objects
-        from models.content import Content, ContentType, DifficultyLevel
-        
-        contents = []
-        for item in content_items:
-            try:
-                # Convert string enums to proper enum values
-                item["content_type"] = ContentType(item["content_type"])
-                item["difficulty_level"] = DifficultyLevel(item["difficulty_level"])
-                contents.append(Content(**item))
-            except Exception as e:
-                logger.error(f"Error converting content item: {e}")
+        # Convert to Content objects. Documents come from our own index and
+        # already match the schema, so skip validation and only map enums.
+        contents = [
+            Content.construct(**{
+                **item,
+                "content_type": _CONTENT_TYPES.get(item.get("content_type"), item.get("content_type")),
+                "difficulty_level": _DIFFICULTY_LEVELS.get(item.get("difficulty_level"), item.get("difficulty_level"))
+            })
+            for item in content_items
+        ]
         
-        # Get Azure LangChain service
-        langchain_service = await get_azure_langchain_service()
+        if stream:
+            return StreamingResponse(
+                sse_stream(langchain_service.stream_personalized_learning_plan(
+                    student=user,
+                    subject=subject,
+                    relevant_content=contents
+                )),
+                media_type=SSE_MEDIA_TYPE,
+                headers=SSE_HEADERS
+            )
         
         # Generate learning plan
         learning_plan = await langchain_service.generate_personalized_learning_plan(
@@ -108,7 +140,7 @@ async def create_learning_plan(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error creating AI learning plan: {str(e)}", exc_info=True)
+        logger.error("Error creating AI learning plan: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating learning plan: {str(e)}"
@@ -116,39 +148,47 @@ async def create_learning_plan(
 
 @router.post("/ask")
 async def ask_question(
-    question: str = Body(..., embed=True),
-    subject: Optional[str] = Body(None, embed=True),
-    current_user: Dict = Depends(get_current_user)
+    ask_request: AskRequest,
+    stream: bool = Query(True),
+    current_user: Dict = Depends(get_current_user),
+    user: User = Depends(get_current_user_model),
+    langchain_service = Depends(provide_azure_langchain_service)
 ):
     """
     Ask an educational question and get an AI-powered answer.
     
     Args:
-        question: The question to ask
-        subject: Optional subject for context
+        ask_request: Request with the question and an optional subject for context
+        stream: Stream the answer as Server-Sent Events while it is generated
         current_user: Current authenticated user
         
     Returns:
-        Answer with sources
+        Answer with sources, or an SSE stream of `delta` events followed
+        by a final `sources` event when streaming
     """
     try:
-        # Convert user dict to User model
-        user = User(**current_user)
-        
-        # Get Azure LangChain service
-        langchain_service = await get_azure_langchain_service()
+        if stream:
+            return StreamingResponse(
+                sse_stream(langchain_service.stream_educational_answer(
+                    question=ask_request.question,
+                    student_grade=user.grade_level,
+                    subject=ask_request.subject
+                )),
+                media_type=SSE_MEDIA_TYPE,
+                headers=SSE_HEADERS
+            )
         
         # Get answer with grade level and subject context
         response = await langchain_service.answer_educational_question(
-            question=question,
+            question=ask_request.question,
             student_grade=user.grade_level,
-            subject=subject
+            subject=ask_request.subject
         )
         
         return response
         
     except Exception as e:
-        logger.error(f"Error answering question: {e}")
+        logger.error("Error answering question: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error answering question: {str(e)}"
@@ -156,55 +196,49 @@ async def ask_question(
 
 @router.post("/search")
 async def search_content(
-    query: str = Body(..., embed=True),
-    subject: Optional[str] = Body(None, embed=True),
-    content_type: Optional[str] = Body(None, embed=True),
-    limit: int = Body(10, embed=True),
-    current_user: Dict = Depends(get_current_user)
+    search_request: SearchRequest,
+    current_user: Dict = Depends(get_current_user),
+    user: User = Depends(get_current_user_model),
+    langchain_service = Depends(provide_azure_langchain_service)
 ):
     """
     Search for educational content using AI.
     
     Args:
-        query: Search query
-        subject: Optional subject filter
-        content_type: Optional content type filter
-        limit: Maximum number of results
+        search_request: Search query with optional subject and content type
+            filters and the maximum number of results
         current_user: Current authenticated user
         
     Returns:
         List of relevant content items
     """
     try:
-        # Convert user dict to User model
-        user = User(**current_user)
-        
-        # Get Azure LangChain service
-        langchain_service = await get_azure_langchain_service()
-        
         # Search for content
         results = await langchain_service.search_educational_content(
-            query=query,
+            query=search_request.query,
             student=user,
-            subject=subject,
-            content_type=content_type,
-            limit=limit
+            subject=search_request.subject,
+            content_type=search_request.content_type,
+            limit=search_request.limit
         )
         
         return results
         
     except Exception as e:
-        logger.error(f"Error searching content: {e}")
+        logger.error("Error searching content: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error searching content: {str(e)}"
         )
 
 @router.get("/personalized-recommendations")
+@cache(expire=USER_CACHE_EXPIRE_SECONDS, key_builder=user_id_key_builder)
 async def personalized_recommendations(
     subject: Optional[str] = Query(None),
     limit: int = Query(10),
-    current_user: Dict = Depends(get_current_user)
+    current_user: Dict = Depends(get_current_user),
+    user: User = Depends(get_current_user_model),
+    recommendation_service = Depends(provide_recommendation_service)
 ):
     """
     Get personalized content recommendations using AI.
@@ -218,13 +252,6 @@ async def personalized_recommendations(
         List of personalized recommendations
     """
     try:
-        # Convert user dict to User model
-        user = User(**current_user)
-        
-        # Get recommendation service - import here to avoid circular imports
-        from services.recommendation_service import get_recommendation_service
-        recommendation_service = await get_recommendation_service()
-        
         # Get recommendations
         results = await recommendation_service.get_personalized_recommendations(
             user=user,
@@ -236,7 +263,7 @@ async def personalized_recommendations(
         return [item.dict() for item in results]
         
     except Exception as e:
-        logger.error(f"Error getting personalized recommendations: {e}")
+        logger.error("Error getting personalized recommendations: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error getting recommendations: {str(e)}"
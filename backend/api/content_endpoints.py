@@ -1,16 +1,19 @@
 # backend/api/content_endpoints.py
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+import functools
 import logging
 
 from models.user import User
 from models.content import Content, ContentType
-from auth.authentication import get_current_user
+from auth.current_user import get_current_user
 from api.endpoints import (
     get_content_endpoint,
     get_recommendations_endpoint,
     search_content_endpoint,
+    stream_content_endpoint,
     get_content_by_id_endpoint
 )
 
@@ -20,11 +23,24 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter(prefix="/content", tags=["content"])
 
+def _orjson_route(endpoint):
+    """
+    Wrap an endpoint so its result is returned as an ORJSONResponse.
+    
+    Search results are already plain JSON types, so this skips FastAPI's
+    jsonable_encoder pass over every document.
+    """
+    @functools.wraps(endpoint)
+    async def route(*args, **kwargs):
+        return ORJSONResponse(await endpoint(*args, **kwargs))
+    return route
+
 # Register content endpoints
-router.add_api_route("/", get_content_endpoint, methods=["GET"], response_model=None)  # Remove response_model to avoid validation
-router.add_api_route("/recommendations", get_recommendations_endpoint, methods=["GET"], response_model=None)  # Remove response_model to avoid validation
-router.add_api_route("/search", search_content_endpoint, methods=["GET"], response_model=None)  # Remove response_model to avoid validation
-router.add_api_route("/{content_id}", get_content_by_id_endpoint, methods=["GET"], response_model=None)  # Remove response_model to avoid validation
+router.add_api_route("/", _orjson_route(get_content_endpoint), methods=["GET"], response_model=None)  # Remove response_model to avoid validation
+router.add_api_route("/recommendations", _orjson_route(get_recommendations_endpoint), methods=["GET"], response_model=None)  # Remove response_model to avoid validation
+router.add_api_route("/search", _orjson_route(search_content_endpoint), methods=["GET"], response_model=None)  # Remove response_model to avoid validation
+router.add_api_route("/stream", stream_content_endpoint, methods=["GET"], response_class=StreamingResponse)  # Newline-delimited JSON
+router.add_api_route("/{content_id}", _orjson_route(get_content_by_id_endpoint), methods=["GET"], response_model=None)  # Remove response_model to avoid validation
 
 # For backward compatibility with app.py import
 content_router = router
\ No newline at end of file
@@ -1,5 +1,6 @@
 # backend/api/debug_cors_routes.py
 from fastapi import APIRouter, Request, Response, Header
+from types import MappingProxyType
 from typing import Dict, List, Any, Optional
 import logging
 
@@ -9,6 +10,14 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter(prefix="/debug/cors", tags=["debug-cors"])
 
+# Static CORS headers sent with every preflight response
+_CORS_PREFLIGHT_HEADERS = MappingProxyType({
+    "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS, PATCH",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization, X-Requested-With, Accept",
+    "Access-Control-Allow-Credentials": "true",
+    "Access-Control-Max-Age": "86400",  # 24 hours for preflight caching
+})
+
 @router.options("/{path:path}")
 async def cors_preflight(
     request: Request,
@@ -18,31 +27,19 @@ async def cors_preflight(
     Handle OPTIONS preflight requests for any path.
     This is a debug endpoint to help diagnose CORS issues.
     """
-    # Log the request details
-    logger.info(f"DEBUG: CORS preflight request for path: {path}")
-    logger.info(f"DEBUG: Method: {request.method}")
-    logger.info(f"DEBUG: Headers: {dict(request.headers)}")
+    # Log the request details (formatted lazily, only if INFO is enabled)
+    logger.info("DEBUG: CORS preflight request for path: %s", path)
+    logger.info("DEBUG: Method: %s", request.method)
+    logger.info("DEBUG: Headers: %s", request.headers)
     
     # Get origin from headers
     origin = request.headers.get("origin", "*")
     
-    # Create response with CORS headers
-    response = Response(
-        status_code=200,
-        content="",
-        headers={
-            "Access-Control-Allow-Origin": origin,
-            "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, OPTIONS, PATCH",
-            "Access-Control-Allow-Headers": "Content-Type, Authorization, X-Requested-With, Accept",
-            "Access-Control-Allow-Credentials": "true",
-            "Access-Control-Max-Age": "86400",  # 24 hours for preflight caching
-        },
+    # 204 No Content: preflight responses need no body
+    return Response(
+        status_code=204,
+        headers={**_CORS_PREFLIGHT_HEADERS, "Access-Control-Allow-Origin": origin},
     )
-    
-    # Log the response
-    logger.info(f"DEBUG: CORS preflight response headers: {dict(response.headers)}")
-    
-    return response
 
 @router.get("/test", response_model=Dict[str, Any])
 async def test_cors(request: Request):
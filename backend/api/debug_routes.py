@@ -1,19 +1,21 @@
 # backend/api/debug_routes.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+import asyncio
 import logging
 import os
 import importlib
 import sys
 import traceback
+from functools import lru_cache
 from typing import Dict, Any, List
 
-from config.settings import Settings
-from auth.entra_auth import get_current_user
-from services.search_service import get_search_service
+from config.settings import get_settings
+from auth.current_user import get_current_user
+from api.dependencies import provide_search_service, provide_student_profile_manager
 
 # Import settings
-settings = Settings()
+settings = get_settings()
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -22,9 +24,12 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/debug", tags=["debug"])
 
 @router.get("/check-indexes")
-async def check_indexes(current_user: Dict = Depends(get_current_user)):
+async def check_indexes(
+    current_user: Dict = Depends(get_current_user),
+    search_service = Depends(provide_search_service)
+):
     """Check if all required indexes exist in Azure AI Search."""
-    logger.info(f"Check indexes request from user: {current_user}")
+    logger.info("Check indexes request from user: %s", current_user)
     
     # Ensure the user is authenticated
     if not current_user or not current_user.get("id"):
@@ -34,12 +39,9 @@ async def check_indexes(current_user: Dict = Depends(get_current_user)):
         )
         
     try:
-        # Get search service
-        search_service = await get_search_service()
-        
         if not search_service:
             logger.error("Search service not available")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 content={"message": "Search service is not available"}
             )
@@ -54,30 +56,38 @@ async def check_indexes(current_user: Dict = Depends(get_current_user)):
         ]
         
         index_status = {}
+        configured = []
         
         for index_type, index_name in indexes_to_check:
             if not index_name:
-                logger.warning(f"Index name not configured for {index_type}")
+                logger.warning("Index name not configured for %s", index_type)
                 index_status[index_type] = {
                     "name": "Not configured",
                     "exists": False,
                     "error": "Index name not configured"
                 }
-                continue
-                
-            try:
-                exists = await search_service.check_index_exists(index_name)
+            else:
+                configured.append((index_type, index_name))
+        
+        # Check all configured indexes concurrently
+        results = await asyncio.gather(
+            *(search_service.check_index_exists(index_name) for _, index_name in configured),
+            return_exceptions=True
+        )
+        
+        for (index_type, index_name), result in zip(configured, results):
+            if isinstance(result, Exception):
+                logger.error("Error checking index %s: %s", index_name, result)
                 index_status[index_type] = {
                     "name": index_name,
-                    "exists": exists,
-                    "error": None
+                    "exists": False,
+                    "error": str(result)
                 }
-            except Exception as e:
-                logger.error(f"Error checking index {index_name}: {e}")
+            else:
                 index_status[index_type] = {
                     "name": index_name,
-                    "exists": False,
-                    "error": str(e)
+                    "exists": result,
+                    "error": None
                 }
                 
         return {
@@ -87,9 +97,9 @@ async def check_indexes(current_user: Dict = Depends(get_current_user)):
         }
     
     except Exception as e:
-        logger.error(f"Error checking indexes: {e}")
+        logger.error("Error checking indexes: %s", e)
         logger.error(traceback.format_exc())
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"message": f"Error checking indexes: {str(e)}"}
         )
@@ -97,10 +107,12 @@ async def check_indexes(current_user: Dict = Depends(get_current_user)):
 @router.post("/extract-profile/{report_id}")
 async def extract_profile(
     report_id: str,
-    current_user: Dict = Depends(get_current_user)
+    current_user: Dict = Depends(get_current_user),
+    search_service = Depends(provide_search_service),
+    profile_manager = Depends(provide_student_profile_manager)
 ):
     """Manually extract student profile from a report and index it."""
-    logger.info(f"Extract profile request for report_id={report_id} from user_id={current_user.get('id')}")
+    logger.info("Extract profile request for report_id=%s from user_id=%s", report_id, current_user.get('id'))
     
     # Ensure the user is authenticated
     if not current_user or not current_user.get("id"):
@@ -110,56 +122,42 @@ async def extract_profile(
         )
     
     try:
-        # Get search service
-        search_service = await get_search_service()
-        
         if not search_service:
             logger.error("Search service not available")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 content={"message": "Search service is not available"}
             )
         
-        # First get the report data
-        filter_expression = f"id eq '{report_id}'"
+        # First get the report data (direct key lookup)
         try:
-            reports = await search_service.search_documents(
-                index_name=settings.REPORTS_INDEX_NAME,
-                query="*",
-                filter=filter_expression,
-                top=1
-            )
+            report_data = await search_service.get_document(settings.REPORTS_INDEX_NAME, report_id)
             
-            if not reports:
-                logger.error(f"Report not found: {report_id}")
-                return JSONResponse(
+            if not report_data:
+                logger.error("Report not found: %s", report_id)
+                return ORJSONResponse(
                     status_code=status.HTTP_404_NOT_FOUND,
                     content={"message": f"Report not found: {report_id}"}
                 )
                 
-            report_data = reports[0]
-            logger.info(f"Found report with ID: {report_id}")
-            
-            # Get the profile manager
-            from utils.student_profile_manager import get_student_profile_manager
-            profile_manager = await get_student_profile_manager()
+            logger.info("Found report with ID: %s", report_id)
             
             if not profile_manager:
                 logger.error("Profile manager not available")
-                return JSONResponse(
+                return ORJSONResponse(
                     status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                     content={"message": "Profile manager is not available"}
                 )
             
             # Process the profile
-            logger.info(f"Extracting profile from report ID: {report_id}")
+            logger.info("Extracting profile from report ID: %s", report_id)
             profile_result = await profile_manager.create_or_update_student_profile(
                 report_data, 
                 report_id
             )
             
             if profile_result:
-                logger.info(f"Successfully processed student profile for report: {report_id}")
+                logger.info("Successfully processed student profile for report: %s", report_id)
                 return {
                     "message": "Profile extraction successful",
                     "profile_id": profile_result.get("id"),
@@ -167,27 +165,46 @@ async def extract_profile(
                     "profile_data": profile_result
                 }
             else:
-                logger.error(f"Failed to process student profile for report: {report_id}")
-                return JSONResponse(
+                logger.error("Failed to process student profile for report: %s", report_id)
+                return ORJSONResponse(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     content={"message": "Profile extraction failed"}
                 )
             
         except Exception as e:
-            logger.error(f"Error retrieving report: {e}")
-            return JSONResponse(
+            logger.error("Error retrieving report: %s", e)
+            return ORJSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"message": f"Error retrieving report: {str(e)}"}
             )
     
     except Exception as e:
-        logger.error(f"Error extracting profile: {e}")
+        logger.error("Error extracting profile: %s", e)
         logger.error(traceback.format_exc())
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"message": f"Error extracting profile: {str(e)}"}
         )
 
+# Map index types to recreation script functions
+_INDEX_SCRIPTS = {
+    "student-reports": {
+        "module": "backend.scripts.update_report_index",
+        "function": "update_student_reports_index"
+    },
+    "student-profiles": {
+        "module": "backend.scripts.create_student_profiles_index",
+        "function": "create_student_profiles_index"
+    }
+}
+
+@lru_cache(maxsize=None)
+def _resolve_recreate_function(index_type: str):
+    """Import and return the recreation function for an index type (resolved once)."""
+    script_info = _INDEX_SCRIPTS[index_type]
+    module = importlib.import_module(script_info["module"])
+    return getattr(module, script_info["function"])
+
 @router.post("/recreate-index/{index_type}")
 async def recreate_index(
     index_type: str,
@@ -199,7 +216,7 @@ async def recreate_index(
     Args:
         index_type: Type of index to recreate (student-reports, student-profiles, etc.)
     """
-    logger.info(f"Recreate index request for {index_type} from user: {current_user}")
+    logger.info("Recreate index request for %s from user: %s", index_type, current_user)
     
     # Ensure the user is authenticated
     if not current_user or not current_user.get("id"):
@@ -208,58 +225,45 @@ async def recreate_index(
             detail="Not authenticated"
         )
         
-    # Map index types to recreation script functions
-    index_scripts = {
-        "student-reports": {
-            "module": "backend.scripts.update_report_index",
-            "function": "update_student_reports_index"
-        },
-        "student-profiles": {
-            "module": "backend.scripts.create_student_profiles_index",
-            "function": "create_student_profiles_index"
-        }
-    }
-    
-    if index_type not in index_scripts:
-        return JSONResponse(
+    if index_type not in _INDEX_SCRIPTS:
+        return ORJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={"message": f"Unsupported index type: {index_type}"}
         )
         
     try:
         # Import the script module
-        script_info = index_scripts[index_type]
+        script_info = _INDEX_SCRIPTS[index_type]
         module_name = script_info["module"]
         function_name = script_info["function"]
         
         try:
-            module = importlib.import_module(module_name)
-            recreate_function = getattr(module, function_name)
+            recreate_function = _resolve_recreate_function(index_type)
         except (ImportError, AttributeError) as import_err:
-            logger.error(f"Error importing index recreation module: {import_err}")
-            return JSONResponse(
+            logger.error("Error importing index recreation module: %s", import_err)
+            return ORJSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"message": f"Error importing index recreation module: {str(import_err)}"}
             )
             
         # Call the recreation function
-        logger.info(f"Recreating index {index_type} using {module_name}.{function_name}")
+        logger.info("Recreating index %s using %s.%s", index_type, module_name, function_name)
         result = await recreate_function()
         
         if result:
-            logger.info(f"Successfully recreated index {index_type}")
+            logger.info("Successfully recreated index %s", index_type)
             return {"message": f"Successfully recreated index {index_type}"}
         else:
-            logger.error(f"Failed to recreate index {index_type}")
-            return JSONResponse(
+            logger.error("Failed to recreate index %s", index_type)
+            return ORJSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"message": f"Failed to recreate index {index_type}"}
             )
     
     except Exception as e:
-        logger.error(f"Error recreating index: {e}")
+        logger.error("Error recreating index: %s", e)
         logger.error(traceback.format_exc())
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"message": f"Error recreating index: {str(e)}"}
         )
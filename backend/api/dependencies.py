@@ -0,0 +1,73 @@
+# backend/api/dependencies.py
+"""
+Service dependencies shared by the routers.
+
+Service singletons are created once at startup by `prefetch_services` and
+stored on `app.state`, so routes get them through `Depends(...)` instead of
+awaiting the factory on every request. A service that could not be created
+at startup is created on first use.
+"""
+from fastapi import FastAPI, Request
+from typing import Any, Callable, Dict, Tuple
+import importlib
+import logging
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# app.state attribute -> (module, factory); imported lazily to avoid circular imports
+_SERVICE_FACTORIES: Dict[str, Tuple[str, str]] = {
+    "search_service": ("services.search_service", "get_search_service"),
+    "openai_adapter": ("rag.openai_adapter", "get_openai_adapter"),
+    "vector_store": ("utils.vector_store", "get_vector_store"),
+    "azure_langchain_service": ("services.azure_langchain_service", "get_azure_langchain_service"),
+    "recommendation_service": ("services.recommendation_service", "get_recommendation_service"),
+    "student_profile_manager": ("utils.student_profile_manager", "get_student_profile_manager"),
+    "learning_plan_service": ("services.azure_learning_plan_service", "get_learning_plan_service"),
+    "plan_generator": ("rag.generator", "get_plan_generator"),
+}
+
+
+async def _create_service(name: str) -> Any:
+    """Create (or get) a service singleton using its factory."""
+    module_name, factory_name = _SERVICE_FACTORIES[name]
+    factory = getattr(importlib.import_module(module_name), factory_name)
+    return await factory()
+
+
+async def prefetch_services(app: FastAPI) -> None:
+    """
+    Create the service singletons and store them on `app.state`.
+
+    Args:
+        app: The FastAPI application
+    """
+    for name in _SERVICE_FACTORIES:
+        try:
+            setattr(app.state, name, await _create_service(name))
+            logger.info(f"Service {name} initialized")
+        except Exception as e:
+            logger.warning(f"Could not initialize service {name}: {e}")
+
+
+def _service_dependency(name: str) -> Callable:
+    """Create a dependency that returns the named service from `app.state`."""
+    async def dependency(request: Request) -> Any:
+        service = getattr(request.app.state, name, None)
+        if service is None:
+            service = await _create_service(name)
+            setattr(request.app.state, name, service)
+        return service
+
+    dependency.__name__ = f"provide_{name}"
+    return dependency
+
+
+provide_search_service = _service_dependency("search_service")
+provide_openai_adapter = _service_dependency("openai_adapter")
+provide_vector_store = _service_dependency("vector_store")
+provide_azure_langchain_service = _service_dependency("azure_langchain_service")
+provide_recommendation_service = _service_dependency("recommendation_service")
+provide_student_profile_manager = _service_dependency("student_profile_manager")
+provide_learning_plan_service = _service_dependency("learning_plan_service")
+provide_plan_generator = _service_dependency("plan_generator")
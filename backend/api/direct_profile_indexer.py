@@ -4,24 +4,29 @@ This module provides a direct way to index student profiles in Azure AI Search,
 bypassing any potential issues in the normal indexing flow.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Body
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status, Body
+from fastapi.responses import ORJSONResponse
+import hashlib
 import logging
 import os
-import traceback
-from typing import Dict, Any
-import json
+import re
+import time
+from typing import Dict, Any, List
+import orjson
 import uuid
 from datetime import datetime
 
-from config.settings import Settings
-from auth.entra_auth import get_current_user
-from services.search_service import get_search_service
-from rag.openai_adapter import get_openai_adapter
+from config.settings import get_settings
+from auth.current_user import get_current_user
+from models.student_profile import ProfileIndexRequest
+from services.index_batcher import IndexBatcher
+from api.dependencies import provide_openai_adapter, provide_search_service
 from utils.student_profile_manager import get_student_profile_manager
+from utils.embedding_cache import get_cached_embeddings
+from utils import task_status_tracker
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -29,12 +34,247 @@ logger = logging.getLogger(__name__)
 # Create router
 router = APIRouter(prefix="/direct-index", tags=["direct-index"])
 
+# Template for the text embedded for a student profile
+_PROFILE_TEXT_HEADER = (
+    "Student Profile for: {full_name}\n"
+    "Gender: {gender}\n"
+    "Grade Level: {grade_level}\n"
+    "Learning Style: {learning_style}\n"
+    "School: {school_name}"
+)
+_PROFILE_TEXT_SECTIONS = (
+    ("strengths", "Strengths:"),
+    ("interests", "Interests:"),
+    ("areas_for_improvement", "Areas for Improvement:"),
+)
+
+# Defaults for the profile fields a caller may supply; also the allowed fields.
+# The default lists are shared between documents and must not be mutated.
+_PROFILE_DEFAULTS: Dict[str, Any] = {
+    "full_name": "Test Student",
+    "gender": "Unknown",
+    "grade_level": 5,
+    "learning_style": "Visual",
+    "strengths": ["Mathematics", "Critical Thinking"],
+    "interests": ["Science", "Art"],
+    "areas_for_improvement": ["Writing", "Organization"],
+    "school_name": "Test School",
+    "teacher_name": "Test Teacher",
+    "report_ids": [],
+    "current_school_year": "2025",
+    "current_term": "S1",
+    "years_and_terms": ["2025-S1"],
+}
+
+# Profile fields that make up the embedding text
+_EMBED_FIELDS = (
+    "full_name", "gender", "grade_level", "learning_style", "school_name",
+    "strengths", "interests", "areas_for_improvement",
+)
+
+# Batches profile uploads from concurrent /direct-index/profile requests
+_profile_batcher = IndexBatcher("student-profiles")
+
+# Prefix of an ISO 8601 date or datetime string, e.g. 2025-01-31 or 2025-01-31T09:30:00
+_ISO_DATETIME_RE = re.compile(r"^\d{4}-\d{2}-\d{2}(T\d{2}:\d{2}:\d{2})?")
+
+def _new_profile_id() -> str:
+    """
+    Create a time-ordered UUID (version 7 layout) for a new profile.
+    
+    Keys sort by creation time, which keeps logs and client-side caches
+    in insertion order.
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    value = (timestamp_ms & 0xFFFFFFFFFFFF) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return str(uuid.UUID(int=value))
+
+def _iso_z(dt: datetime) -> str:
+    """Format a UTC datetime as ISO 8601 with a 'Z' suffix, e.g. 2025-01-31T09:30:00Z."""
+    return (
+        f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}"
+        f"T{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}Z"
+    )
+
+def _format_datetime(value: Any, default: str) -> str:
+    """Format a datetime or ISO 8601 string for Edm.DateTimeOffset, or return the default."""
+    if not value:
+        return default
+    if isinstance(value, datetime):
+        return _iso_z(value)
+    if not isinstance(value, str) or not _ISO_DATETIME_RE.match(value):
+        return default
+    # Already in the canonical format (common when re-indexing)
+    if len(value) == 20 and value[10] == 'T' and value.endswith('Z'):
+        return value
+    try:
+        # Parse the string to datetime and then format correctly
+        return _iso_z(datetime.fromisoformat(value.replace('Z', '+00:00')))
+    except (ValueError, TypeError):
+        return default
+
+def _build_profile_document(profile_data: ProfileIndexRequest, owner_id: str) -> Dict[str, Any]:
+    """Build the student-profiles index document, filling in test defaults."""
+    # Prepare the profile document
+    profile_id = profile_data.id or _new_profile_id()
+    
+    # Format datetime for Edm.DateTimeOffset (ISO 8601 format with 'Z' for UTC timezone)
+    now = _iso_z(datetime.utcnow())
+    
+    # Profile fields supplied by the caller override the test defaults
+    supplied = {
+        field: value
+        for field in _PROFILE_DEFAULTS
+        if (value := getattr(profile_data, field))
+    }
+    
+    return {
+        **_PROFILE_DEFAULTS,
+        **supplied,
+        "id": profile_id,
+        "created_at": _format_datetime(profile_data.created_at, now),
+        "updated_at": now,
+        "last_report_date": _format_datetime(profile_data.last_report_date, now),
+        "historical_data": profile_data.historical_data or orjson.dumps({
+            "2025-S1": {
+                "school_year": "2025",
+                "term": "S1",
+                "grade_level": 5,
+                "updated_at": now  # already formatted correctly
+            }
+        }).decode(),
+        # Ensure owner_id is set from current user
+        "owner_id": profile_data.owner_id or owner_id
+    }
+
+def _profile_fingerprint(profile_document: Dict[str, Any]) -> str:
+    """Fingerprint the embedded profile fields (and embedding model)."""
+    fields = {field: profile_document.get(field) for field in _EMBED_FIELDS}
+    fields["_model"] = settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT
+    return hashlib.blake2b(orjson.dumps(fields, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+def _reuse_profile_embedding(profile_document: Dict[str, Any], profile_data: ProfileIndexRequest) -> str:
+    """
+    Reuse the embedding sent with the profile if its embedded fields are unchanged.
+    
+    Clients get the fingerprint back when a profile is indexed and can send it,
+    with the embedding, as `_fingerprint` when re-indexing the profile.
+    
+    Returns:
+        The profile fingerprint
+    """
+    fingerprint = _profile_fingerprint(profile_document)
+    if profile_data.embedding and profile_data.fingerprint == fingerprint:
+        profile_document["embedding"] = profile_data.embedding
+    return fingerprint
+
+def _profile_embedding_text(profile_document: Dict[str, Any]) -> str:
+    """
+    Build the text embedded for a student profile.
+    
+    The document comes from `_build_profile_document`, so every profile
+    field is present and is read directly.
+    """
+    text_parts = [_PROFILE_TEXT_HEADER.format_map(profile_document)]
+    
+    # Add strengths, interests and areas for improvement
+    for field, heading in _PROFILE_TEXT_SECTIONS:
+        items = profile_document[field]
+        if items:
+            text_parts.append(heading)
+            text_parts.extend(f"- {item}" for item in items)
+    
+    # Combine text parts
+    return "\n".join(text_parts)
+
+async def _add_profile_embeddings(openai_client, profile_documents: List[Dict[str, Any]]):
+    """Generate embeddings for the profiles, if embeddings are configured."""
+    if openai_client and settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT:
+        try:
+            # Profiles that kept their embedding need no new one
+            pending = [document for document in profile_documents if "embedding" not in document]
+            if not pending:
+                return
+            
+            # Embed all profiles in batched calls (reusing cached embeddings)
+            embeddings = await get_cached_embeddings(
+                openai_client,
+                model=settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT,
+                texts=[_profile_embedding_text(document) for document in pending]
+            )
+            
+            for document, embedding in zip(pending, embeddings):
+                document["embedding"] = embedding
+            logger.info(f"Generated embeddings for {len(pending)} profiles")
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {e}")
+            # Continue without embeddings
+
+async def _embed_and_index_profile(
+    task_id: str,
+    openai_client,
+    profile_document: Dict[str, Any],
+    embed: bool
+):
+    """
+    Background task that embeds (if requested) and indexes a profile.
+    Updates the task status when the profile has been indexed.
+    """
+    task_status_tracker.update_task_status(
+        task_id=task_id,
+        status=task_status_tracker.STATUS_IN_PROGRESS,
+        message="Indexing profile"
+    )
+    try:
+        if embed:
+            await _add_profile_embeddings(openai_client, [profile_document])
+        index_result = await _profile_batcher.index_document(profile_document)
+    except Exception as e:
+        logger.exception("Background profile indexing failed: %s", e)
+        task_status_tracker.update_task_status(
+            task_id=task_id,
+            status=task_status_tracker.STATUS_FAILED,
+            message="Profile indexing failed",
+            error=str(e)
+        )
+        return
+    
+    if index_result:
+        task_status_tracker.update_task_status(
+            task_id=task_id,
+            status=task_status_tracker.STATUS_COMPLETED,
+            progress=100,
+            message="Profile indexed successfully",
+            result={"profile_id": profile_document["id"]}
+        )
+    else:
+        task_status_tracker.update_task_status(
+            task_id=task_id,
+            status=task_status_tracker.STATUS_FAILED,
+            message="Profile indexing failed"
+        )
+
 @router.post("/profile")
 async def direct_index_profile(
-    profile_data: Dict[str, Any] = Body(...),
-    current_user: Dict = Depends(get_current_user)
+    background_tasks: BackgroundTasks,
+    profile_data: ProfileIndexRequest = Body(...),
+    embed: bool = Query(False),
+    background: bool = Query(False),
+    current_user: Dict = Depends(get_current_user),
+    search_service = Depends(provide_search_service),
+    openai_client = Depends(provide_openai_adapter)
 ):
-    """Directly index a student profile in Azure AI Search."""
+    """
+    Directly index a student profile in Azure AI Search.
+    
+    The profile is only embedded when `embed=true`; profiles indexed through
+    the student profile manager are always embedded.
+    
+    With `background=true` the request returns 202 Accepted as soon as the
+    profile is validated; poll `/tasks/status/{task_id}` for the result.
+    """
     logger.info(f"Direct index profile request from user: {current_user}")
     
     # Ensure the user is authenticated
@@ -45,12 +285,9 @@ async def direct_index_profile(
         )
         
     try:
-        # Get search service
-        search_service = await get_search_service()
-        
         if not search_service:
             logger.error("Search service not available")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 content={"message": "Search service is not available"}
             )
@@ -60,123 +297,48 @@ async def direct_index_profile(
         
         if not index_exists:
             logger.error("student-profiles index does not exist")
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content={"message": "student-profiles index does not exist"}
             )
             
-        # Prepare the profile document
-        profile_id = profile_data.get("id") or str(uuid.uuid4())
-        
-        # Format datetime for Edm.DateTimeOffset (ISO 8601 format with 'Z' for UTC timezone)
-        now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
-        
-        # Helper function to format datetime strings properly
-        def format_datetime(dt_str):
-            if not dt_str:
-                return now
-            try:
-                if isinstance(dt_str, str):
-                    # Parse the string to datetime and then format correctly
-                    dt = datetime.fromisoformat(dt_str.replace('Z', '+00:00'))
-                    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
-                elif isinstance(dt_str, datetime):
-                    return dt_str.strftime("%Y-%m-%dT%H:%M:%SZ")
-                else:
-                    return now
-            except:
-                return now
+        profile_document = _build_profile_document(profile_data, current_user.get("id"))
+        profile_id = profile_document["id"]
+        fingerprint = _reuse_profile_embedding(profile_document, profile_data)
         
-        profile_document = {
-            "id": profile_id,
-            "full_name": profile_data.get("full_name") or "Test Student",
-            "gender": profile_data.get("gender") or "Unknown",
-            "grade_level": profile_data.get("grade_level") or 5,
-            "learning_style": profile_data.get("learning_style") or "Visual",
-            "strengths": profile_data.get("strengths") or ["Mathematics", "Critical Thinking"],
-            "interests": profile_data.get("interests") or ["Science", "Art"],
-            "areas_for_improvement": profile_data.get("areas_for_improvement") or ["Writing", "Organization"],
-            "school_name": profile_data.get("school_name") or "Test School",
-            "teacher_name": profile_data.get("teacher_name") or "Test Teacher",
-            "report_ids": profile_data.get("report_ids") or [],
-            "created_at": format_datetime(profile_data.get("created_at")),
-            "updated_at": now,
-            "last_report_date": format_datetime(profile_data.get("last_report_date")),
-            "current_school_year": profile_data.get("current_school_year") or "2025",
-            "current_term": profile_data.get("current_term") or "S1",
-            "years_and_terms": profile_data.get("years_and_terms") or ["2025-S1"],
-            "historical_data": profile_data.get("historical_data") or json.dumps({
-                "2025-S1": {
-                    "school_year": "2025",
-                    "term": "S1",
-                    "grade_level": 5,
-                    "updated_at": now  # already formatted correctly
+        # Embed and index after the response has been sent
+        if background:
+            task_id = task_status_tracker.create_task(
+                user_id=current_user["id"],
+                task_type="direct_profile_index",
+                params={"profile_id": profile_id}
+            )
+            background_tasks.add_task(
+                _embed_and_index_profile, task_id, openai_client, profile_document, embed
+            )
+            return ORJSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content={
+                    "message": "Profile indexing started",
+                    "task_id": task_id,
+                    "profile_id": profile_id,
+                    "fingerprint": fingerprint,
+                    "status": "accepted"
                 }
-            }),
-            # Ensure owner_id is set from current user
-            "owner_id": profile_data.get("owner_id") or current_user.get("id")
-        }
+            )
         
-        # Generate an embedding for the profile
-        openai_client = await get_openai_adapter()
-        if openai_client and settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT:
-            try:
-                text_parts = [
-                    f"Student Profile for: {profile_document.get('full_name', 'Unknown Student')}",
-                    f"Gender: {profile_document.get('gender', 'Unknown')}",
-                    f"Grade Level: {profile_document.get('grade_level', 'Unknown')}",
-                    f"Learning Style: {profile_document.get('learning_style', 'Unknown')}",
-                    f"School: {profile_document.get('school_name', 'Unknown')}",
-                ]
-                
-                # Add strengths
-                strengths = profile_document.get("strengths", [])
-                if strengths:
-                    text_parts.append("Strengths:")
-                    for strength in strengths:
-                        text_parts.append(f"- {strength}")
-                
-                # Add interests
-                interests = profile_document.get("interests", [])
-                if interests:
-                    text_parts.append("Interests:")
-                    for interest in interests:
-                        text_parts.append(f"- {interest}")
-                
-                # Add areas for improvement
-                areas_for_improvement = profile_document.get("areas_for_improvement", [])
-                if areas_for_improvement:
-                    text_parts.append("Areas for Improvement:")
-                    for area in areas_for_improvement:
-                        text_parts.append(f"- {area}")
-                
-                # Combine text parts
-                text = "\n".join(text_parts)
-                
-                # Generate embedding
-                embedding = await openai_client.create_embedding(
-                    model=settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT,
-                    text=text
-                )
-                
-                profile_document["embedding"] = embedding
-                logger.info("Generated embedding for profile")
-            except Exception as e:
-                logger.error(f"Error generating embedding: {e}")
-                # Continue without embedding
+        # Generate an embedding for the profile (opt-in for this debugging endpoint)
+        if embed:
+            await _add_profile_embeddings(openai_client, [profile_document])
                 
-        # Index the profile document - raw direct indexing
+        # Index the profile document - batched with concurrent requests
         try:
             logger.info(f"Directly indexing profile with ID: {profile_id}")
             try:
-                index_result = await search_service.index_document(
-                    index_name="student-profiles",
-                    document=profile_document
-                )
+                index_result = await _profile_batcher.index_document(profile_document)
             except Exception as index_error:
-                logger.error(f"Direct indexing failed: {index_error}")
-                logger.error(traceback.format_exc())
-                return JSONResponse(
+                logger.exception("Direct indexing failed: %s", index_error)
+                return ORJSONResponse(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     content={"message": f"Direct indexing failed: {str(index_error)}"}
                 )
@@ -186,27 +348,105 @@ async def direct_index_profile(
                 return {
                     "message": "Profile indexed successfully",
                     "profile_id": profile_id,
+                    "fingerprint": fingerprint,
                     "status": "success"
                 }
             else:
                 logger.error("Direct profile indexing failed")
-                return JSONResponse(
+                return ORJSONResponse(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     content={"message": "Profile indexing failed"}
                 )
                 
         except Exception as e:
-            logger.error(f"Error indexing profile: {e}")
-            logger.error(traceback.format_exc())
-            return JSONResponse(
+            logger.exception("Error indexing profile: %s", e)
+            return ORJSONResponse(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 content={"message": f"Error indexing profile: {str(e)}"}
             )
             
     except Exception as e:
-        logger.error(f"Error in direct_index_profile: {e}")
-        logger.error(traceback.format_exc())
-        return JSONResponse(
+        logger.exception("Error in direct_index_profile: %s", e)
+        return ORJSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"message": f"Error: {str(e)}"}
+        )
+
+@router.post("/profiles")
+async def direct_index_profiles(
+    profiles_data: List[ProfileIndexRequest] = Body(...),
+    embed: bool = Query(False),
+    current_user: Dict = Depends(get_current_user),
+    search_service = Depends(provide_search_service),
+    openai_client = Depends(provide_openai_adapter)
+):
+    """
+    Directly index several student profiles in Azure AI Search in one batch.
+    
+    The profiles are only embedded when `embed=true`.
+    """
+    logger.info(f"Direct index of {len(profiles_data)} profiles requested by user: {current_user}")
+    
+    # Ensure the user is authenticated
+    if not current_user or not current_user.get("id"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+        
+    try:
+        if not search_service:
+            logger.error("Search service not available")
+            return ORJSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"message": "Search service is not available"}
+            )
+            
+        # Check if the index exists
+        index_exists = await search_service.check_index_exists("student-profiles")
+        
+        if not index_exists:
+            logger.error("student-profiles index does not exist")
+            return ORJSONResponse(
+                status_code=status.HTTP_404_NOT_FOUND,
+                content={"message": "student-profiles index does not exist"}
+            )
+        
+        profile_documents = [
+            _build_profile_document(profile_data, current_user.get("id"))
+            for profile_data in profiles_data
+        ]
+        fingerprints = [
+            _reuse_profile_embedding(document, profile_data)
+            for document, profile_data in zip(profile_documents, profiles_data)
+        ]
+        
+        # Generate embeddings for the profiles (opt-in for this debugging endpoint)
+        if embed:
+            await _add_profile_embeddings(openai_client, profile_documents)
+        
+        # Index all profiles in batched uploads
+        index_results = await search_service.index_documents("student-profiles", profile_documents)
+        
+        results = [
+            {
+                "profile_id": document["id"],
+                "fingerprint": fingerprint,
+                "status": "success" if success else "failed"
+            }
+            for document, fingerprint, success in zip(profile_documents, fingerprints, index_results)
+        ]
+        indexed_count = sum(index_results)
+        logger.info(f"Directly indexed {indexed_count} of {len(profile_documents)} profiles")
+        
+        return {
+            "message": f"Indexed {indexed_count} of {len(profile_documents)} profiles",
+            "results": results
+        }
+            
+    except Exception as e:
+        logger.exception("Error in direct_index_profiles: %s", e)
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"message": f"Error: {str(e)}"}
         )
@@ -1,60 +1,140 @@
 # api/endpoints.py
-from fastapi import Depends, HTTPException, Query, Path, Body, status, BackgroundTasks
-from typing import List, Optional, Dict, Any
+from fastapi import Depends, HTTPException, Query, Path, Body, Response, status, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Dict, Any, Set
 from datetime import datetime
+import asyncio
+import hashlib
+import heapq
 import uuid
-import httpx
 import json
 import logging
+import orjson
+from functools import lru_cache
+from cachetools import TTLCache
 
 from models.user import User
 from models.content import Content, ContentType
 from models.learning_plan import LearningPlan, LearningActivity, ActivityStatus
-from auth.authentication import get_current_user
-from services.search_service import get_search_service, SearchService, AzureSearchService
-from rag.openai_adapter import get_openai_adapter
+from auth.current_user import get_current_user, require_admin_role
+from services.search_service import SearchService, AzureSearchService
+from api.dependencies import provide_search_service
 from rag.generator import get_plan_generator
-from config.settings import Settings
+from services.embedding_batcher import EmbeddingBatcher
+from config.settings import get_settings
+from utils.odata import quote_odata_string
+from utils.pagination import cursor_filter, encode_cursor
+from utils.user_cache import cache_user, get_cached_user, refresh_cached_user
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+# Content index and the fields returned by the content endpoints
+CONTENT_INDEX_NAME = settings.CONTENT_INDEX_NAME or "educational-content"
+CONTENT_SELECT = "id,title,description,subject,content_type,difficulty_level,grade_level,topics,url,duration_minutes,keywords,source"
+CONTENT_FIELDS = CONTENT_SELECT.split(",")
+
+# Learning plan fields returned by the plan endpoints (everything but the embedding)
+PLAN_SELECT = [
+    "id", "student_id", "owner_id", "title", "description", "subject", "topics", "activities",
+    "status", "progress_percentage", "created_at", "updated_at", "start_date", "end_date"
+]
+
+# Subjects and content types counted by the content statistics endpoint
+STATS_SUBJECTS = ("Mathematics", "Science", "English", "History", "Geography", "Arts")
+STATS_CONTENT_TYPES = ("article", "video", "interactive", "quiz", "worksheet", "lesson", "activity")
+
+# Content statistics change only when the scraper runs, so they are cached briefly;
+# the lock makes concurrent refreshes share one computation
+_stats_cache: TTLCache = TTLCache(maxsize=1, ttl=60)
+_stats_lock = asyncio.Lock()
+
+# Batches embedding calls from concurrent profile and learning plan requests
+_embedding_batcher = EmbeddingBatcher(settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT)
+
+# Background tasks started by the endpoints (kept referenced until they finish)
+_background_tasks: Set[asyncio.Task] = set()
+
+# Subject filters for subjects stored under several names in the index
+SUBJECT_FILTERS: Dict[str, str] = {
+    # Try all variations of Mathematics subject
+    "Math": "search.in(subject, 'Math,Mathematics,Maths', ',')",
+    "Mathematics": "search.in(subject, 'Math,Mathematics,Maths', ',')",
+    # This is the actual name in the Azure Search index
+    "Maths": "subject eq 'Maths'",
+}
+
+def _and_join(parts: List[str]) -> Optional[str]:
+    """Join filter clauses with 'and', returning single clauses as they are."""
+    if not parts:
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    return " and ".join(parts)
+
+@lru_cache(maxsize=512)
+def _build_content_filter(
+    subject: Optional[str] = None,
+    content_type: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    grade_level: Optional[int] = None
+) -> Optional[str]:
+    """Build the content index filter expression for the given query parameters."""
+    filter_parts = []
+    if subject:
+        filter_parts.append(SUBJECT_FILTERS.get(subject) or f"subject eq {quote_odata_string(subject)}")
+    if content_type:
+        filter_parts.append(f"content_type eq {quote_odata_string(content_type.lower())}")
+    if difficulty:
+        filter_parts.append(f"difficulty_level eq {quote_odata_string(difficulty.lower())}")
+    if grade_level:
+        filter_parts.append(f"grade_level/any(g: g eq {grade_level})")
+    
+    return _and_join(filter_parts)
+
+def _mix_order_key(item: Dict[str, Any]) -> bytes:
+    """Stable pseudo-random sort key used to mix content from several subjects."""
+    return hashlib.blake2b(str(item.get("id")).encode("utf-8"), digest_size=8).digest()
+
 # User endpoints
-async def get_user_endpoint(current_user: Dict = Depends(get_current_user)):
+async def get_user_endpoint(
+    current_user: Dict = Depends(get_current_user),
+    search_service = Depends(provide_search_service)
+):
     """Get the current authenticated user's profile."""
-    search_service = await get_search_service()
-    
-    # Get user from search index
-    user = await search_service.get_user(current_user["id"])
+    # Get user from the cache or search index
+    user = await get_cached_user(search_service, current_user["id"])
     
     if not user:
         # Create user if it doesn't exist in our system
+        now = datetime.utcnow().isoformat()
         user_data = {
             "id": current_user["id"],
             "ms_object_id": current_user["id"],
             "username": current_user["username"],
             "email": current_user["email"],
             "full_name": current_user.get("full_name", ""),
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat()
+            "created_at": now,
+            "updated_at": now
         }
         
         user = await search_service.create_user(user_data)
+        if user:
+            await cache_user(user)
         
     return user
 
 async def update_user_profile_endpoint(
     profile_data: Dict[str, Any] = Body(...),
-    current_user: Dict = Depends(get_current_user)
+    current_user: Dict = Depends(get_current_user),
+    search_service = Depends(provide_search_service)
 ):
     """Update the user profile in Azure AI Search."""
-    search_service = await get_search_service()
-    
     # Get existing user
-    user = await search_service.get_user(current_user["id"])
+    user = await get_cached_user(search_service, current_user["id"])
     
     if not user:
         raise HTTPException(
@@ -73,10 +153,7 @@ async def update_user_profile_endpoint(
     
     # Generate embedding for user profile
     profile_text = f"User {user['username']} is in grade {user.get('grade_level')} with interests in {', '.join(user.get('subjects_of_interest', []))}. Learning style: {user.get('learning_style')}"
-    embedding = await search_service.openai_adapter.create_embedding(
-        model=settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT,
-        text=profile_text
-    )
+    embedding = await _embedding_batcher.embed(profile_text)
     
     # Add embedding to user data
     user["embedding"] = embedding
@@ -90,6 +167,10 @@ async def update_user_profile_endpoint(
             detail="Failed to update user profile"
         )
     
+    await refresh_cached_user(user["id"], user)
+    
+    # The embedding is only used for search; don't send it back to the client
+    user.pop("embedding", None)
     return user
 
 # Content endpoints
@@ -99,62 +180,28 @@ async def get_content_endpoint(
     difficulty: Optional[str] = Query(None, description="Filter by difficulty level"),
     grade_level: Optional[int] = Query(None, description="Filter by grade level"),
     page: int = Query(1, description="Page number for pagination"),
-    limit: int = Query(100, description="Number of items per page")
+    limit: int = Query(100, description="Number of items per page"),
+    search_service = Depends(provide_search_service)
     # Remove authentication for now
     # current_user: Dict = Depends(get_current_user)
 ):
     """Get content with optional filters."""
     try:
-        search_service = await get_search_service()
-        
         # Build filter expression
-        filter_parts = []
-        if subject:
-            # Check for subject aliases that might be in the database differently
-            if subject == "Math" or subject == "Mathematics":
-                # Try all variations of Mathematics subject
-                filter_parts.append("(subject eq 'Math' or subject eq 'Mathematics' or subject eq 'Maths')")
-            elif subject == "Maths":
-                # This is the actual name in the Azure Search index
-                filter_parts.append("subject eq 'Maths'")
-            else:
-                filter_parts.append(f"subject eq '{subject}'")
-        
-        if content_type:
-            filter_parts.append(f"content_type eq '{content_type.lower()}'")
-        if difficulty:
-            filter_parts.append(f"difficulty_level eq '{difficulty.lower()}'")
-        if grade_level:
-            filter_parts.append(f"grade_level/any(g: g eq {grade_level})")
-        
-        filter_expression = " and ".join(filter_parts) if filter_parts else None
+        filter_expression = _build_content_filter(subject, content_type, difficulty, grade_level)
         
         # Add debugging for the filter expression
-        logger.info(f"Using filter expression: {filter_expression}")
-        
-        # Use the search_documents method which is available on SearchService
-        content_index_name = settings.CONTENT_INDEX_NAME or "educational-content"
+        logger.info("Using filter expression: %s", filter_expression)
         
         # First, search more broadly without subject filter to see what we have
-        if subject in ["Mathematics", "Math", "Maths", "History"] and filter_parts:
-            # Log all available subjects for debugging
-            all_content = await search_service.search_documents(
-                index_name=content_index_name,
-                query="*",
-                top=100,
-                select="subject"
-            )
-            
-            subjects_in_index = set()
-            for item in all_content:
-                if "subject" in item:
-                    subjects_in_index.add(item["subject"])
-            
-            logger.info(f"Available subjects in index: {subjects_in_index}")
+        if subject in ["Mathematics", "Math", "Maths", "History"] and logger.isEnabledFor(logging.DEBUG):
+            # Log all available subjects for debugging (costs an extra search call)
+            subjects_in_index = await search_service.get_facet_values(CONTENT_INDEX_NAME, "subject")
+            logger.debug("Available subjects in index: %s", subjects_in_index)
         
         # Calculate skip value for pagination (0-indexed)
         skip_value = (page - 1) * limit
-        logger.info(f"Pagination: page={page}, limit={limit}, skip={skip_value}")
+        logger.info("Pagination: page=%s, limit=%s, skip=%s", page, limit, skip_value)
         
         # When no subject is provided, use a more direct approach to get all content
         if not subject:
@@ -162,87 +209,115 @@ async def get_content_endpoint(
             
             # For pagination without subject filter, use direct query with skip/limit
             contents = await search_service.search_documents(
-                index_name=content_index_name,
+                index_name=CONTENT_INDEX_NAME,
                 query="*",
                 filter=None,  # No filter means get everything
                 top=limit, 
                 skip=skip_value,
-                select="id,title,description,subject,content_type,difficulty_level,grade_level,topics,url,duration_minutes,keywords,source"
+                select=CONTENT_SELECT
             )
             
-            logger.info(f"Direct pagination: fetched page {page} with {len(contents)} items")
+            logger.info("Direct pagination: fetched page %s with %s items", page, len(contents))
         else:
             # For subject-specific search, we can paginate directly via the Azure Search API
             contents = await search_service.search_documents(
-                index_name=content_index_name,
+                index_name=CONTENT_INDEX_NAME,
                 query="*",
                 filter=filter_expression,
                 top=limit,
                 skip=skip_value,
-                select="id,title,description,subject,content_type,difficulty_level,grade_level,topics,url,duration_minutes,keywords,source"
+                select=CONTENT_SELECT
             )
         
         if not contents:
             # Log the empty result situation with details
-            logger.info(f"No content found with filters: {filter_expression}")
+            logger.info("No content found with filters: %s", filter_expression)
             
             # Return empty list with HTTP 200
             return []
         
-        logger.info(f"Found {len(contents)} content items with filters: {filter_expression}")
+        logger.info("Found %s content items with filters: %s", len(contents), filter_expression)
         return contents
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error retrieving content: {str(e)}")
+        logger.error("Error retrieving content: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving content: {str(e)}"
         )
 
+async def stream_content_endpoint(
+    subject: Optional[str] = Query(None, description="Filter by subject"),
+    content_type: Optional[str] = Query(None, description="Filter by content type"),
+    difficulty: Optional[str] = Query(None, description="Filter by difficulty level"),
+    grade_level: Optional[int] = Query(None, description="Filter by grade level"),
+    page: int = Query(1, description="Page number for pagination"),
+    limit: int = Query(100, description="Number of items per page"),
+    search_service = Depends(provide_search_service)
+):
+    """
+    Stream content with optional filters as newline-delimited JSON.
+    
+    Each item is sent as soon as it arrives from Azure AI Search, so the
+    first items reach the client before the whole page has been fetched.
+    """
+    filter_expression = _build_content_filter(subject, content_type, difficulty, grade_level)
+    skip_value = (page - 1) * limit
+    logger.info("Streaming content with filter: %s, skip: %s, limit: %s", filter_expression, skip_value, limit)
+    
+    async def generate_lines():
+        try:
+            async for item in search_service.iter_documents(
+                index_name=CONTENT_INDEX_NAME,
+                query="*",
+                filter=filter_expression,
+                top=limit,
+                skip=skip_value,
+                select=CONTENT_SELECT
+            ):
+                yield orjson.dumps(item) + b"\n"
+        except Exception as e:
+            # The response has already started, so the stream just ends early
+            logger.error("Error streaming content: %s", e)
+    
+    return StreamingResponse(generate_lines(), media_type="application/x-ndjson")
+
 # Mock content functions removed as they're no longer needed
 
 async def get_content_by_id_endpoint(
-    content_id: str = Path(..., description="Content ID")
+    content_id: str = Path(..., description="Content ID"),
+    search_service = Depends(provide_search_service)
     # Remove authentication for now
     # current_user: Dict = Depends(get_current_user)
 ):
     """Get content by ID."""
     try:
-        # Get the search service
-        search_service = await get_search_service()
-        
-        # Use filter search to get the content by ID
-        content_index_name = settings.CONTENT_INDEX_NAME or "educational-content"
-        filter_expression = f"id eq '{content_id}'"
-        
-        # Log the filter being used
-        logger.info(f"Searching for content with filter: {filter_expression}")
+        # Look the content up by its key
+        logger.info("Getting content with ID: %s", content_id)
         
         # Specify explicit fields to ensure consistency in results
-        results = await search_service.search_documents(
-            index_name=content_index_name,
-            query="*",
-            filter=filter_expression,
-            top=1,
-            select="id,title,description,subject,content_type,difficulty_level,grade_level,topics,url,duration_minutes,keywords,source"
+        content = await search_service.get_document(
+            CONTENT_INDEX_NAME,
+            key=content_id,
+            selected_fields=CONTENT_FIELDS
         )
         
-        if not results or len(results) == 0:
-            logger.warning(f"Content with ID {content_id} not found in Azure Search")
+        if not content:
+            logger.warning("Content with ID %s not found in Azure Search", content_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Content with ID {content_id} not found"
             )
         
-        logger.info(f"Retrieved content item from Azure Search with ID {content_id}")
-        return results[0]
+        logger.info("Retrieved content item from Azure Search with ID %s", content_id)
+        return content
             
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error retrieving content by ID: {str(e)}")
+        logger.error("Error retrieving content by ID: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving content: {str(e)}"
@@ -251,136 +326,97 @@ async def get_content_by_id_endpoint(
 async def get_recommendations_endpoint(
     subject: Optional[str] = Query(None, description="Optional subject filter"),
     page: int = Query(1, description="Page number for pagination"),
-    limit: int = Query(100, description="Number of items per page")
+    limit: int = Query(100, description="Number of items per page"),
+    search_service = Depends(provide_search_service)
     # Remove authentication for now
     # current_user: Dict = Depends(get_current_user)
 ):
     """Get personalized content recommendations."""
     try:
-        search_service = await get_search_service()
-        
         # Build filter expression
-        filter_parts = []
-        
-        if subject:
-            # Check for subject aliases that might be in the database differently
-            if subject == "Math" or subject == "Mathematics":
-                # Try all variations of Mathematics subject
-                filter_parts.append("(subject eq 'Math' or subject eq 'Mathematics' or subject eq 'Maths')")
-            elif subject == "Maths":
-                # This is the actual name in the Azure Search index
-                filter_parts.append("subject eq 'Maths'")
-            else:
-                filter_parts.append(f"subject eq '{subject}'")
-        
-        filter_expression = " and ".join(filter_parts) if filter_parts else None
+        filter_expression = _build_content_filter(subject)
         
         # Add debugging for the filter expression
-        logger.info(f"Recommendations using filter expression: {filter_expression}")
+        logger.info("Recommendations using filter expression: %s", filter_expression)
         
         # If debugging Math or History subject issues
-        if subject in ["Mathematics", "Math", "Maths", "History"] and filter_parts:
-            # Log all available subjects for debugging
-            content_index_name = settings.CONTENT_INDEX_NAME or "educational-content"
-            all_content = await search_service.search_documents(
-                index_name=content_index_name,
-                query="*",
-                top=100,
-                select="subject"
-            )
-            
-            subjects_in_index = set()
-            for item in all_content:
-                if "subject" in item:
-                    subjects_in_index.add(item["subject"])
-            
-            logger.info(f"Available subjects in index for recommendations: {subjects_in_index}")
+        if subject in ["Mathematics", "Math", "Maths", "History"] and logger.isEnabledFor(logging.DEBUG):
+            # Log all available subjects for debugging (costs an extra search call)
+            subjects_in_index = await search_service.get_facet_values(CONTENT_INDEX_NAME, "subject")
+            logger.debug("Available subjects in index for recommendations: %s", subjects_in_index)
         
         # For now, instead of personalized recommendations, just return general content
-        # Use the search_documents method which is available on SearchService
-        content_index_name = settings.CONTENT_INDEX_NAME or "educational-content"
-        
         # Calculate skip value for pagination (0-indexed)
         skip_value = (page - 1) * limit
-        logger.info(f"Recommendations pagination: page={page}, limit={limit}, skip={skip_value}")
+        logger.info("Recommendations pagination: page=%s, limit=%s, skip=%s", page, limit, skip_value)
         
         # When no subject is provided, we want to return a balanced mix of content from all subjects
         if not subject:
             logger.info("No subject specified for recommendations, getting content from all subjects")
             
-            # Get all available subjects first
-            all_subjects = await search_service.search_documents(
-                index_name=content_index_name,
-                query="*",
-                top=100,
-                select="subject"
-            )
-            
-            # Extract unique subjects
-            unique_subjects = set()
-            for item in all_subjects:
-                if "subject" in item and item["subject"]:
-                    unique_subjects.add(item["subject"])
+            # Get all available subjects with a facet query
+            unique_subjects = await search_service.get_facet_values(CONTENT_INDEX_NAME, "subject")
             
-            logger.info(f"Found {len(unique_subjects)} unique subjects: {unique_subjects}")
+            logger.info("Found %s unique subjects: %s", len(unique_subjects), unique_subjects)
             
             # Get more items from each subject for pagination support
             items_per_subject = 1000  # Significantly increased to show all available content
-            all_recommendations = []
             
-            for subj in unique_subjects:
-                subj_filter = f"subject eq '{subj}'"
-                subject_content = await search_service.search_documents(
-                    index_name=content_index_name,
+            # Query the subjects concurrently
+            subject_contents = await asyncio.gather(*(
+                search_service.search_documents(
+                    index_name=CONTENT_INDEX_NAME,
                     query="*",
-                    filter=subj_filter,
+                    filter=f"subject eq {quote_odata_string(subj)}",
                     top=items_per_subject, 
-                    select="id,title,description,subject,content_type,difficulty_level,grade_level,topics,url,duration_minutes,keywords,source"
+                    select=CONTENT_SELECT
                 )
-                
-                if subject_content:
-                    logger.info(f"Adding {len(subject_content)} items from subject '{subj}'")
-                    all_recommendations.extend(subject_content)
-            
-            # Shuffle the recommendations with a fixed seed for consistent ordering
-            import random
-            random_gen = random.Random(42)  # Use fixed seed for consistent shuffling
-            random_gen.shuffle(all_recommendations)
+                for subj in unique_subjects
+            ))
             
-            # Get total count for pagination info
-            total_count = len(all_recommendations)
+            total_count = 0
+            for subj, subject_content in zip(unique_subjects, subject_contents):
+                if subject_content:
+                    logger.info("Adding %s items from subject '%s'", len(subject_content), subj)
+                    total_count += len(subject_content)
             
-            # Get the page of results
+            # Mix the subjects in a stable pseudo-random order, keeping only the
+            # items up to the end of the requested page
             start_idx = min(skip_value, total_count)
             end_idx = min(start_idx + limit, total_count)
             
-            recommendations = all_recommendations[start_idx:end_idx]
-            logger.info(f"Recommendations paginated results: {start_idx+1}-{end_idx} of {total_count} total items")
+            mixed = heapq.nsmallest(
+                end_idx,
+                (item for subject_content in subject_contents if subject_content for item in subject_content),
+                key=_mix_order_key
+            )
+            recommendations = mixed[start_idx:end_idx]
+            logger.info("Recommendations paginated results: %s-%s of %s total items", start_idx+1, end_idx, total_count)
         else:
             # Normal filter-based search for specified subject with pagination
             recommendations = await search_service.search_documents(
-                index_name=content_index_name,
+                index_name=CONTENT_INDEX_NAME,
                 query="*",
                 filter=filter_expression,
                 top=limit,
                 skip=skip_value,
-                select="id,title,description,subject,content_type,difficulty_level,grade_level,topics,url,duration_minutes,keywords,source"
+                select=CONTENT_SELECT
             )
         
         if not recommendations:
             # Log the empty result situation with details
-            logger.info(f"No recommendations found with filters: {filter_expression}")
+            logger.info("No recommendations found with filters: %s", filter_expression)
             
             # Return empty list with HTTP 200
             return []
         
-        logger.info(f"Found {len(recommendations)} recommendation items for subject: {subject}")
+        logger.info("Found %s recommendation items for subject: %s", len(recommendations), subject)
         return recommendations
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error getting recommendations: {str(e)}")
+        logger.error("Error getting recommendations: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error getting recommendations: {str(e)}"
@@ -391,101 +427,47 @@ async def search_content_endpoint(
     subject: Optional[str] = Query(None, description="Filter by subject"),
     content_type: Optional[str] = Query(None, description="Filter by content type", alias="content_type"),
     page: int = Query(1, description="Page number for pagination"),
-    limit: int = Query(100, description="Number of items per page")
+    limit: int = Query(100, description="Number of items per page"),
+    search_service = Depends(provide_search_service)
     # Remove authentication for now
     # current_user: Dict = Depends(get_current_user)
 ):
     """Search for content using text search."""
     try:
-        search_service = await get_search_service()
-        
-        # Build filter expression
-        filter_parts = []
-        if subject:
-            # Check for subject aliases that might be in the database differently
-            if subject == "Math" or subject == "Mathematics":
-                # Try all variations of Mathematics subject
-                filter_parts.append("(subject eq 'Math' or subject eq 'Mathematics' or subject eq 'Maths')")
-            elif subject == "Maths":
-                # This is the actual name in the Azure Search index
-                filter_parts.append("subject eq 'Maths'")
-            else:
-                filter_parts.append(f"subject eq '{subject}'")
-                
-        if content_type:
-            filter_parts.append(f"content_type eq '{content_type.lower()}'")
-        
-        filter_expression = " and ".join(filter_parts) if filter_parts else None
+        # Build filter expression; searches for any Mathematics name match all of them
+        filter_subject = "Math" if subject in ["Mathematics", "Math", "Maths"] else subject
+        filter_expression = _build_content_filter(filter_subject, content_type)
         
         # Add debugging for the filter expression
-        logger.info(f"Search using filter expression: {filter_expression}, query: {query}")
+        logger.info("Search using filter expression: %s, query: %s", filter_expression, query)
         
-        # Use the search_documents method which is available on SearchService
-        content_index_name = settings.CONTENT_INDEX_NAME or "educational-content"
-        
-        # For Math and History, try additional approaches if needed
-        if subject in ["Mathematics", "Math", "Maths", "History"]:
-            # First try a more aggressive search with looser filters
-            logger.info(f"Using broader search for {subject} with query: {query}")
-            
-            # Determine actual subject name for expansive search
-            search_subject_name = subject
-            if subject in ["Mathematics", "Math"]:
-                search_subject_name = "Maths"  # Use the name stored in Azure AI Search
-            
-            # Try a more expansive search query by including the subject name in the query
-            expanded_query = f"{query} {search_subject_name}"
-            
-            contents = await search_service.search_documents(
-                index_name=content_index_name,
-                query=expanded_query,
-                filter=None,  # Remove filter for this search to get more results
-                top=20,
-                select="id,title,description,subject,content_type,difficulty_level,grade_level,topics,url,duration_minutes,keywords,source"
-            )
-            
-            if contents and len(contents) > 0:
-                logger.info(f"Found {len(contents)} results using broader search approach")
-                # Filter the results programmatically to match the subject
-                filtered_contents = [
-                    item for item in contents
-                    if item.get("subject") == subject or 
-                    (subject in ["Math", "Mathematics"] and item.get("subject") == "Maths") or
-                    (subject == "Maths" and item.get("subject") in ["Math", "Mathematics"])
-                ]
-                
-                if filtered_contents:
-                    logger.info(f"Returning {len(filtered_contents)} filtered results from broader search")
-                    return filtered_contents
-        
-        # Standard search if the above didn't work or for other subjects
         # Calculate skip value for pagination
         skip_value = (page - 1) * limit
-        logger.info(f"Search pagination: page={page}, limit={limit}, skip={skip_value}")
+        logger.info("Search pagination: page=%s, limit=%s, skip=%s", page, limit, skip_value)
         
         contents = await search_service.search_documents(
-            index_name=content_index_name,
+            index_name=CONTENT_INDEX_NAME,
             query=query,
             filter=filter_expression,
             top=limit,
             skip=skip_value,
-            select="id,title,description,subject,content_type,difficulty_level,grade_level,topics,url,duration_minutes,keywords,source"
+            select=CONTENT_SELECT
         )
         
         if not contents:
             # Log the empty result situation with details
-            logger.info(f"No search results found for query: {query}, filters: {filter_expression}")
+            logger.info("No search results found for query: %s, filters: %s", query, filter_expression)
             
             # Return empty list with HTTP 200
             return []
         
-        logger.info(f"Found {len(contents)} search results for query: {query}")
+        logger.info("Found %s search results for query: %s", len(contents), query)
         return contents
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error searching content: {str(e)}")
+        logger.error("Error searching content: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error searching content: {str(e)}"
@@ -493,33 +475,53 @@ async def search_content_endpoint(
 
 # Learning plan endpoints
 async def get_learning_plans_endpoint(
+    response: Response,
     subject: Optional[str] = Query(None, description="Filter by subject"),
-    current_user: Dict = Depends(get_current_user)
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Number of plans per page (all plans if omitted)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header value from the previous page"),
+    current_user: Dict = Depends(get_current_user),
+    search_service = Depends(provide_search_service)
 ):
-    """Get all learning plans for the current user."""
-    search_service = await get_search_service()
+    """
+    Get the learning plans for the current user, newest first.
     
+    When `limit` is given and more plans may follow, the cursor for the next
+    page is returned in the X-Next-Cursor header.
+    """
     try:
         # Build filter expression
-        filter_expression = f"student_id eq '{current_user['id']}'"
+        filter_expression = f"student_id eq {quote_odata_string(current_user['id'])}"
         if subject:
-            filter_expression += f" and subject eq '{subject}'"
+            filter_expression += f" and subject eq {quote_odata_string(subject)}"
+        if cursor:
+            try:
+                filter_expression += f" and {cursor_filter(cursor, 'created_at')}"
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=str(e)
+                )
         
         # Execute search
         results = await search_service.plans_index_client.search(
             search_text="*",
             filter=filter_expression,
+            select=PLAN_SELECT,
             order_by=["created_at desc"],
+            top=limit,
             include_total_count=True
         )
         
         # Convert results to list
-        plans = []
-        async for result in results:
-            plans.append(dict(result))
+        plans = [dict(result) async for result in results]
+        
+        if limit and len(plans) == limit:
+            response.headers["X-Next-Cursor"] = encode_cursor(plans, "created_at", cursor)
         
         return plans
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -528,15 +530,13 @@ async def get_learning_plans_endpoint(
 
 async def create_learning_plan_endpoint(
     subject: str = Body(..., embed=True),
-    current_user: Dict = Depends(get_current_user)
+    current_user: Dict = Depends(get_current_user),
+    search_service = Depends(provide_search_service)
 ):
     """Create a new personalized learning plan."""
-    search_service = await get_search_service()
-    openai_adapter = await get_openai_adapter()
-    
     try:
         # Get user profile
-        user = await search_service.get_user(current_user["id"])
+        user = await get_cached_user(search_service, current_user["id"])
         
         # Generate query for content
         query_text = f"Educational content for {subject} appropriate for a student in grade {user.get('grade_level', 'any')} "
@@ -548,22 +548,15 @@ async def create_learning_plan_endpoint(
             interests = ", ".join(user.get("subjects_of_interest"))
             query_text += f"Interested in {interests}."
         
-        # Generate embedding for query
-        embedding = await openai_adapter.create_embedding(
-            model=settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT,
-            text=query_text
-        )
+        # Generate embedding for query (reused across identical profiles)
+        embedding = await _embedding_batcher.embed(query_text)
         
         # Get relevant content using vector search
-        filter_expression = f"subject eq '{subject}'"
+        filter_expression = f"subject eq {quote_odata_string(subject)}"
         if user.get("grade_level"):
+            # The student's grade and the grades either side, in one collection traversal
             grade = user.get("grade_level")
-            grade_filters = [
-                f"grade_level/any(g: g eq {grade})",
-                f"grade_level/any(g: g eq {grade - 1})",
-                f"grade_level/any(g: g eq {grade + 1})"
-            ]
-            filter_expression += f" and ({' or '.join(grade_filters)})"
+            filter_expression += f" and grade_level/any(g: g ge {grade - 1} and g le {grade + 1})"
         
         results = await search_service.content_index_client.search(
             search_text=None,
@@ -575,9 +568,7 @@ async def create_learning_plan_endpoint(
         )
         
         # Extract content items
-        content_items = []
-        async for result in results:
-            content_items.append(dict(result))
+        content_items = [dict(result) async for result in results]
         
         # Get plan generator
         plan_generator = await get_plan_generator()
@@ -602,14 +593,6 @@ async def create_learning_plan_endpoint(
         plan_dict["status"] = "not_started"
         plan_dict["progress_percentage"] = 0.0
         
-        # Generate embedding for plan
-        plan_text = f"{plan_dict['title']} {plan_dict['description']} for {plan_dict['subject']}"
-        plan_embedding = await openai_adapter.create_embedding(
-            model=settings.AZURE_OPENAI_EMBEDDING_DEPLOYMENT,
-            text=plan_text
-        )
-        plan_dict["embedding"] = plan_embedding
-        
         # Save to Azure AI Search
         result = await search_service.plans_index_client.upload_documents(documents=[plan_dict])
         
@@ -619,6 +602,12 @@ async def create_learning_plan_endpoint(
                 detail="Failed to save learning plan"
             )
         
+        # Embed the plan after responding; only plan similarity search needs it
+        plan_text = f"{plan_dict['title']} {plan_dict['description']} for {plan_dict['subject']}"
+        task = asyncio.create_task(_add_plan_embedding(search_service, plan_id, plan_text))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+        
         return plan_dict
         
     except Exception as e:
@@ -627,16 +616,25 @@ async def create_learning_plan_endpoint(
             detail=f"Error creating learning plan: {str(e)}"
         )
 
+async def _add_plan_embedding(search_service, plan_id: str, plan_text: str):
+    """Generate the embedding for a saved learning plan and merge it into its document."""
+    try:
+        plan_embedding = await _embedding_batcher.embed(plan_text)
+        await search_service.plans_index_client.merge_documents(
+            documents=[{"id": plan_id, "embedding": plan_embedding}]
+        )
+    except Exception as e:
+        logger.error("Error adding embedding to learning plan %s: %s", plan_id, e)
+
 async def get_learning_plan_endpoint(
     plan_id: str = Path(..., description="Learning plan ID"),
-    current_user: Dict = Depends(get_current_user)
+    current_user: Dict = Depends(get_current_user),
+    search_service = Depends(provide_search_service)
 ):
     """Get a specific learning plan."""
-    search_service = await get_search_service()
-    
     try:
         # Get plan from index
-        plan = await search_service.plans_index_client.get_document(key=plan_id)
+        plan = await search_service.plans_index_client.get_document(key=plan_id, selected_fields=PLAN_SELECT)
         
         # Check ownership
         if plan.get("student_id") != current_user["id"]:
@@ -658,14 +656,16 @@ async def update_activity_status_endpoint(
     activity_id: str = Path(..., description="Activity ID"),
     status: str = Body(..., embed=True),
     completed_at: Optional[str] = Body(None, embed=True),
-    current_user: Dict = Depends(get_current_user)
+    current_user: Dict = Depends(get_current_user),
+    search_service = Depends(provide_search_service)
 ):
     """Update the status of a learning activity."""
-    search_service = await get_search_service()
-    
     try:
-        # Get plan from index
-        plan = await search_service.plans_index_client.get_document(key=plan_id)
+        # Get only the fields needed for the update from the index
+        plan = await search_service.plans_index_client.get_document(
+            key=plan_id,
+            selected_fields=["id", "student_id", "activities"]
+        )
         
         # Check ownership
         if plan.get("student_id") != current_user["id"]:
@@ -674,17 +674,21 @@ async def update_activity_status_endpoint(
                 detail="You don't have permission to update this plan"
             )
         
-        # Find and update activity
+        # Find and update activity, counting completed activities in the same pass
         activities = plan.get("activities", [])
+        now = datetime.utcnow().isoformat()
+        activity_update = {"status": status}
+        if status == "completed":
+            activity_update["completed_at"] = completed_at or now
         activity_found = False
+        completed_activities = 0
         
-        for i, activity in enumerate(activities):
-            if activity.get("id") == activity_id:
-                activities[i]["status"] = status
-                if status == "completed":
-                    activities[i]["completed_at"] = completed_at or datetime.utcnow().isoformat()
+        for activity in activities:
+            if not activity_found and activity.get("id") == activity_id:
+                activity.update(activity_update)
                 activity_found = True
-                break
+            if activity.get("status") == "completed":
+                completed_activities += 1
         
         if not activity_found:
             raise HTTPException(
@@ -694,7 +698,6 @@ async def update_activity_status_endpoint(
         
         # Calculate progress percentage
         total_activities = len(activities)
-        completed_activities = sum(1 for a in activities if a.get("status") == "completed")
         progress_percentage = (completed_activities / total_activities) * 100 if total_activities > 0 else 0
         
         # Determine plan status
@@ -704,14 +707,17 @@ async def update_activity_status_endpoint(
         elif completed_activities > 0:
             plan_status = "in_progress"
         
-        # Update plan
-        plan["activities"] = activities
-        plan["progress_percentage"] = progress_percentage
-        plan["status"] = plan_status
-        plan["updated_at"] = datetime.utcnow().isoformat()
+        # Merge only the changed fields; the rest of the plan (and its embedding) stays as is
+        plan_update = {
+            "id": plan_id,
+            "activities": activities,
+            "progress_percentage": progress_percentage,
+            "status": plan_status,
+            "updated_at": now
+        }
         
         # Save updated plan
-        result = await search_service.plans_index_client.upload_documents(documents=[plan])
+        result = await search_service.plans_index_client.merge_documents(documents=[plan_update])
         
         if not result[0].succeeded:
             raise HTTPException(
@@ -735,91 +741,40 @@ async def update_activity_status_endpoint(
 # Admin endpoints
 async def trigger_scraper_endpoint(
     background_tasks: BackgroundTasks,
-    current_user: Dict = Depends(get_current_user)
+    current_user: Dict = Depends(require_admin_role)
 ):
     """
     Manually trigger the content scraper.
     Available only to admin users.
     """
-    # Check if user is admin (would be in roles from Entra ID token)
-    if "admin" not in current_user.get("roles", []):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only admin users can trigger the scraper"
-        )
-    
     # Run scraper in background
-    from scrapers.abc_edu_scraper import run_scraper
-    background_tasks.add_task(run_scraper)
+    background_tasks.add_task(_run_scraper_and_reset_stats)
     
     return {"message": "Content scraper started in background"}
 
+async def _run_scraper_and_reset_stats():
+    """Run the content scraper, then drop the cached content statistics."""
+    from scrapers.abc_edu_scraper import run_scraper
+    try:
+        await run_scraper()
+    finally:
+        _stats_cache.clear()
+
 async def get_content_stats_endpoint(
-    current_user: Dict = Depends(get_current_user)
+    current_user: Dict = Depends(require_admin_role),
+    search_service = Depends(provide_search_service)
 ):
     """
     Get statistics about the content database.
     Available only to admin users.
     """
-    # Check if user is admin
-    if "admin" not in current_user.get("roles", []):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only admin users can access content statistics"
-        )
-    
-    search_service = await get_search_service()
-    
     try:
-        # Get subject counts
-        subject_counts = {}
-        for subject in ["Mathematics", "Science", "English", "History", "Geography", "Arts"]:
-            result = await search_service.content_index_client.search(
-                search_text="*",
-                filter=f"subject eq '{subject}'",
-                include_total_count=True,
-                top=0
-            )
-            subject_counts[subject] = result.get_count()
-        
-        # Get content type counts
-        content_type_counts = {}
-        for content_type in ["article", "video", "interactive", "quiz", "worksheet", "lesson", "activity"]:
-            result = await search_service.content_index_client.search(
-                search_text="*",
-                filter=f"content_type eq '{content_type}'",
-                include_total_count=True,
-                top=0
-            )
-            content_type_counts[content_type] = result.get_count()
-        
-        # Get total count
-        total_result = await search_service.content_index_client.search(
-            search_text="*",
-            include_total_count=True,
-            top=0
-        )
-        total_count = total_result.get_count()
-        
-        # Get last updated date
-        latest_result = await search_service.content_index_client.search(
-            search_text="*",
-            order_by=["updated_at desc"],
-            select=["updated_at"],
-            top=1
-        )
-        
-        latest_date = None
-        async for item in latest_result:
-            latest_date = item.get("updated_at")
-            break
-        
-        return {
-            "total_count": total_count,
-            "subject_counts": subject_counts,
-            "content_type_counts": content_type_counts,
-            "last_updated": latest_date
-        }
+        async with _stats_lock:
+            stats = _stats_cache.get("stats")
+            if stats is None:
+                stats = await _get_content_stats(search_service)
+                _stats_cache["stats"] = stats
+        return stats
         
     except Exception as e:
         raise HTTPException(
@@ -827,54 +782,81 @@ async def get_content_stats_endpoint(
             detail=f"Error retrieving content statistics: {str(e)}"
         )
 
+async def _get_content_stats(search_service) -> Dict[str, Any]:
+    """Query the content index for the content statistics."""
+    content_index_client = search_service.content_index_client
+    
+    # Subject, content type and total counts from one faceted query
+    counts_query = content_index_client.search(
+        search_text="*",
+        facets=["subject,count:20", "content_type,count:20"],
+        include_total_count=True,
+        top=0
+    )
+    
+    # Last updated date
+    latest_query = content_index_client.search(
+        search_text="*",
+        order_by=["updated_at desc"],
+        select=["updated_at"],
+        top=1
+    )
+    
+    counts_result, latest_result = await asyncio.gather(counts_query, latest_query)
+    
+    facets = await counts_result.get_facets() or {}
+    subject_facets = {facet["value"]: facet["count"] for facet in facets.get("subject", [])}
+    content_type_facets = {facet["value"]: facet["count"] for facet in facets.get("content_type", [])}
+    
+    subject_counts = {subject: subject_facets.get(subject, 0) for subject in STATS_SUBJECTS}
+    content_type_counts = {
+        content_type: content_type_facets.get(content_type, 0)
+        for content_type in STATS_CONTENT_TYPES
+    }
+    total_count = await counts_result.get_count()
+    
+    latest_date = None
+    async for item in latest_result:
+        latest_date = item.get("updated_at")
+        break
+    
+    return {
+        "total_count": total_count,
+        "subject_counts": subject_counts,
+        "content_type_counts": content_type_counts,
+        "last_updated": latest_date
+    }
+
 async def get_student_progress_endpoint(
-    current_user: Dict = Depends(get_current_user)
+    current_user: Dict = Depends(get_current_user),
+    search_service = Depends(provide_search_service)
 ):
     """Get student progress analytics."""
-    search_service = await get_search_service()
-    
     try:
-        # Get all user's learning plans
-        results = await search_service.plans_index_client.search(
-            search_text="*",
-            filter=f"student_id eq '{current_user['id']}'",
-            include_total_count=True
-        )
+        student_filter = f"student_id eq {quote_odata_string(current_user['id'])}"
         
-        # Extract plans
-        plans = []
-        async for result in results:
-            plans.append(dict(result))
+        # Count the user's plans per subject, overall and by status, in parallel
+        all_counts, completed_counts, in_progress_counts = await asyncio.gather(
+            _count_plans_by_subject(search_service, student_filter),
+            _count_plans_by_subject(search_service, f"{student_filter} and status eq 'completed'"),
+            _count_plans_by_subject(search_service, f"{student_filter} and status eq 'in_progress'")
+        )
+        total_plans, subject_totals = all_counts
+        completed_plans, subject_completed = completed_counts
+        in_progress_plans, subject_in_progress = in_progress_counts
         
-        # Calculate overall stats
-        total_plans = len(plans)
-        completed_plans = sum(1 for p in plans if p.get("status") == "completed")
-        in_progress_plans = sum(1 for p in plans if p.get("status") == "in_progress")
         overall_completion = (completed_plans / total_plans) * 100 if total_plans > 0 else 0
         
-        # Get subject-specific progress
-        subjects = {}
-        for plan in plans:
-            subject = plan.get("subject")
-            if subject not in subjects:
-                subjects[subject] = {
-                    "total": 0,
-                    "completed": 0,
-                    "in_progress": 0,
-                    "percentage": 0
-                }
-            
-            subjects[subject]["total"] += 1
-            
-            if plan.get("status") == "completed":
-                subjects[subject]["completed"] += 1
-            elif plan.get("status") == "in_progress":
-                subjects[subject]["in_progress"] += 1
-        
-        # Calculate percentages for each subject
-        for subject, stats in subjects.items():
-            if stats["total"] > 0:
-                stats["percentage"] = (stats["completed"] / stats["total"]) * 100
+        # Get subject-specific progress (facet buckets always have a non-zero count)
+        subjects = {
+            subject: {
+                "total": total,
+                "completed": subject_completed.get(subject, 0),
+                "in_progress": subject_in_progress.get(subject, 0),
+                "percentage": (subject_completed.get(subject, 0) / total) * 100
+            }
+            for subject, total in subject_totals.items()
+        }
         
         return {
             "total_plans": total_plans,
@@ -888,4 +870,24 @@ async def get_student_progress_endpoint(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving progress: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+async def _count_plans_by_subject(search_service, filter_expression: str):
+    """
+    Count the learning plans matching a filter, in total and per subject.
+    
+    Uses a subject facet, so no plan documents are returned.
+    
+    Returns:
+        Tuple of (total count, {subject: count})
+    """
+    results = await search_service.plans_index_client.search(
+        search_text="*",
+        filter=filter_expression,
+        facets=["subject,count:50"],
+        include_total_count=True,
+        top=0
+    )
+    facets = await results.get_facets() or {}
+    subject_counts = {facet["value"]: facet["count"] for facet in facets.get("subject", [])}
+    return await results.get_count(), subject_counts
@@ -4,84 +4,115 @@ API endpoints for LangChain-based functionality.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Body, status
-from typing import List, Dict, Any, Optional
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import List, Dict, Any, Optional, Tuple
+from cachetools import TTLCache
+import asyncio
+import base64
+import hashlib
 import logging
+import orjson
+import struct
 
 from models.user import User
+from models.content import Content, ContentType, DifficultyLevel
 from services.langchain_service import get_langchain_service
-from auth.authentication import get_current_user
+from auth.current_user import get_current_user, get_current_user_model
 from utils.vector_store import get_vector_store
-from config.settings import Settings
+from config.settings import get_settings
+from utils.odata import quote_odata_string
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
-# Create router
-router = APIRouter(prefix="/langchain", tags=["langchain"])
+# Create router; embeddings and plans serialize much faster with orjson, whichever app includes it
+router = APIRouter(prefix="/langchain", tags=["langchain"], default_response_class=ORJSONResponse)
+
+# Enum values by string, for converting content items without exception handling
+_CONTENT_TYPES = ContentType._value2member_map_
+_DIFFICULTY_LEVELS = DifficultyLevel._value2member_map_
+
+# Learning plan content filters: the subject alone, or with the student's grade and the grades either side
+_SUBJECT_FILTER = "subject eq {subject}".format
+_SUBJECT_GRADE_FILTER = "subject eq {subject} and grade_level/any(g: g ge {low} and g le {high})".format
+
+# Content fields used to generate a learning plan
+_PLAN_CONTENT_SELECT = [
+    "id", "title", "description", "subject", "content_type",
+    "difficulty_level", "url", "duration_minutes"
+]
+
+# Embeddings already generated by the embed endpoints, keyed by a hash of the text
+_embedding_cache: TTLCache = TTLCache(maxsize=50_000, ttl=3600)
+
+# Embeddings being generated right now, so concurrent requests for the same text share one call
+_inflight_embeddings: Dict[bytes, asyncio.Future] = {}
+
+# Most texts accepted by one /embed/batch request
+MAX_EMBED_BATCH_TEXTS = 256
+
+# Most texts sent to the embedding model in one call
+EMBED_CALL_BATCH_SIZE = 64
 
 @router.post("/learning-plan")
 async def create_learning_plan(
     subject: str = Body(..., embed=True),
-    current_user: Dict = Depends(get_current_user)
+    user: User = Depends(get_current_user_model)
 ):
     """
     Create a personalized learning plan using LangChain.
     
     Args:
         subject: Subject for the learning plan
-        current_user: Current authenticated user
+        user: Current authenticated user
         
     Returns:
         A personalized learning plan
     """
     try:
-        # Convert user dict to User model
-        user = User(**current_user)
-        
         # Get vector store for content retrieval
         vector_store = await get_vector_store()
         
         # Prepare query text for content retrieval
         query_text = f"Educational content for {subject} for a student in grade {user.grade_level if user.grade_level else 'unknown'}"
         
-        # Get relevant content for the subject
-        filter_expression = f"subject eq '{subject}'"
-        
-        # Add grade level filter if available
+        # Get relevant content for the subject, near the student's grade if known
         if user.grade_level:
-            grade_filters = [
-                f"grade_level/any(g: g eq {user.grade_level})",
-                f"grade_level/any(g: g eq {user.grade_level - 1})",
-                f"grade_level/any(g: g eq {user.grade_level + 1})"
-            ]
-            grade_filter = f"({' or '.join(grade_filters)})"
-            filter_expression = f"{filter_expression} and {grade_filter}"
-        
-        # Get content
-        content_items = await vector_store.vector_search(
-            query_text=query_text,
-            filter_expression=filter_expression,
-            limit=10
+            filter_expression = _SUBJECT_GRADE_FILTER(
+                subject=quote_odata_string(subject),
+                low=user.grade_level - 1,
+                high=user.grade_level + 1
+            )
+        else:
+            filter_expression = _SUBJECT_FILTER(subject=quote_odata_string(subject))
+        
+        # Get content (only the fields the plan generator uses) and the LangChain service together
+        content_items, langchain_service = await asyncio.gather(
+            vector_store.vector_search(
+                query_text=query_text,
+                filter_expression=filter_expression,
+                limit=10,
+                select=_PLAN_CONTENT_SELECT
+            ),
+            get_langchain_service()
         )
         
         # Convert to Content objects
-        from models.content import Content, ContentType, DifficultyLevel
-        
         contents = []
         for item in content_items:
-            try:
-                # Convert string enums to proper enum values
-                item["content_type"] = ContentType(item["content_type"])
-                item["difficulty_level"] = DifficultyLevel(item["difficulty_level"])
-                contents.append(Content(**item))
-            except Exception as e:
-                logger.error(f"Error converting content item: {e}")
-        
-        # Get LangChain service
-        langchain_service = await get_langchain_service()
+            # Convert string enums to proper enum values, skipping unknown ones
+            content_type = _CONTENT_TYPES.get(item.get("content_type"))
+            difficulty_level = _DIFFICULTY_LEVELS.get(item.get("difficulty_level"))
+            if content_type is None or difficulty_level is None:
+                logger.error(f"Error converting content item {item.get('id')}: unknown content type or difficulty level")
+                continue
+            item["content_type"] = content_type
+            item["difficulty_level"] = difficulty_level
+            # Items come from our own index, so skip validation
+            contents.append(Content.construct(**item))
         
         # Generate learning plan
         learning_plan = await langchain_service.generate_learning_plan(
@@ -93,8 +124,8 @@ async def create_learning_plan(
         # Save learning plan to database or storage
         # This would typically involve saving to a database
         
-        # For now, return the plan
-        return learning_plan.dict() if hasattr(learning_plan, "dict") else learning_plan
+        # For now, return the plan (the service always returns plain JSON data)
+        return learning_plan
         
     except Exception as e:
         logger.error(f"Error creating learning plan: {e}")
@@ -107,7 +138,7 @@ async def create_learning_plan(
 async def query_assistant(
     query: str = Body(..., embed=True),
     chat_history: Optional[List[Dict[str, str]]] = Body(None, embed=True),
-    current_user: Dict = Depends(get_current_user)
+    user: User = Depends(get_current_user_model)
 ):
     """
     Query the educational assistant using LangChain RAG.
@@ -115,15 +146,12 @@ async def query_assistant(
     Args:
         query: User query
         chat_history: Optional chat history
-        current_user: Current authenticated user
+        user: Current authenticated user
         
     Returns:
         Response with answer and sources
     """
     try:
-        # Convert user dict to User model
-        user = User(**current_user)
-        
         # Get LangChain service
         langchain_service = await get_langchain_service()
         
@@ -134,21 +162,10 @@ async def query_assistant(
             chat_history=chat_history
         )
         
-        # Format source documents if available
-        sources = []
-        if "source_documents" in response and response["source_documents"]:
-            for doc in response["source_documents"]:
-                source = {
-                    "title": doc.metadata.get("title", "Unknown source"),
-                    "content": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content,
-                    "url": doc.metadata.get("url", "")
-                }
-                sources.append(source)
-        
         # Return the response
         return {
             "answer": response["answer"],
-            "sources": sources
+            "sources": _format_sources(response.get("source_documents"))
         }
         
     except Exception as e:
@@ -158,9 +175,149 @@ async def query_assistant(
             detail=f"Error querying assistant: {str(e)}"
         )
 
+@router.post("/query/stream")
+async def stream_query_assistant(
+    query: str = Body(..., embed=True),
+    chat_history: Optional[List[Dict[str, str]]] = Body(None, embed=True),
+    user: User = Depends(get_current_user_model)
+):
+    """
+    Query the educational assistant, streaming the answer as Server-Sent Events.
+    
+    Each answer token is sent as a `{"delta": ...}` event as soon as the model
+    produces it; the last event is `{"sources": [...]}`.
+    
+    Args:
+        query: User query
+        chat_history: Optional chat history
+        user: Current authenticated user
+        
+    Returns:
+        Streaming text/event-stream response
+    """
+    # Get LangChain service
+    langchain_service = await get_langchain_service()
+    
+    async def events():
+        async for event in langchain_service.stream_personalized_response(
+            query=query,
+            student=user,
+            chat_history=chat_history
+        ):
+            if "delta" in event:
+                payload = {"delta": event["delta"]}
+            else:
+                payload = {"sources": _format_sources(event.get("source_documents"))}
+            yield b"data: " + orjson.dumps(payload) + b"\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+def _format_sources(source_documents) -> List[Dict[str, Any]]:
+    """Format the search result documents behind an answer for a query response."""
+    sources = []
+    for doc in source_documents or ():
+        content = doc.get("content") or doc.get("metadata_content_text") or ""
+        sources.append({
+            "title": doc.get("title", "Unknown source"),
+            "content": content[:200] + "..." if len(content) > 200 else content,
+            "url": doc.get("url", "")
+        })
+    return sources
+
+# Embedding encodings clients can request; fp16 and int8 are base64-encoded little-endian bytes
+EMBEDDING_DTYPE_PATTERN = "^(fp32|fp16|int8)$"
+
+def _encode_embedding(embedding: List[float], dtype: str) -> Tuple[Any, Optional[float]]:
+    """
+    Encode an embedding for a response.
+    
+    Args:
+        embedding: Embedding values
+        dtype: "fp32" (JSON floats), "fp16" or "int8" (base64 bytes)
+        
+    Returns:
+        Tuple of (encoded embedding, scale); the scale is only set for int8,
+        where each value is approximately int8 value * scale
+    """
+    if dtype == "fp16":
+        return base64.b64encode(struct.pack(f"<{len(embedding)}e", *embedding)).decode("ascii"), None
+    if dtype == "int8":
+        scale = max(map(abs, embedding), default=0.0) / 127 or 1.0
+        quantized = [round(value / scale) for value in embedding]
+        return base64.b64encode(struct.pack(f"<{len(quantized)}b", *quantized)).decode("ascii"), scale
+    return embedding, None
+
+async def _embed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    Embed texts with LangChain's embedding model, reusing cached embeddings.
+    
+    Texts that are not cached are embedded in calls of up to
+    EMBED_CALL_BATCH_SIZE texts. Texts that another request is already
+    embedding are not sent again; this request waits for that request's
+    result instead.
+    """
+    keys = [hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest() for text in texts]
+    found: Dict[bytes, List[float]] = {}
+    waiting: Dict[bytes, asyncio.Future] = {}
+    to_embed: Dict[bytes, str] = {}
+    
+    for key, text in zip(keys, texts):
+        if key in found or key in waiting or key in to_embed:
+            continue
+        cached = _embedding_cache.get(key)
+        if cached is not None:
+            found[key] = cached
+        elif key in _inflight_embeddings:
+            waiting[key] = _inflight_embeddings[key]
+        else:
+            to_embed[key] = text
+    
+    if to_embed:
+        loop = asyncio.get_running_loop()
+        futures = {key: loop.create_future() for key in to_embed}
+        _inflight_embeddings.update(futures)
+        try:
+            # Get LangChain service
+            langchain_service = await get_langchain_service()
+            
+            pending = list(to_embed.items())
+            for start in range(0, len(pending), EMBED_CALL_BATCH_SIZE):
+                chunk = pending[start:start + EMBED_CALL_BATCH_SIZE]
+                embeddings = await langchain_service.langchain_manager.generate_embeddings([text for _, text in chunk])
+                if len(embeddings) != len(chunk):
+                    raise ValueError("Embedding model returned no embeddings")
+                
+                # Waiting requests get each chunk's embeddings as soon as it is done
+                for (key, _), embedding in zip(chunk, embeddings):
+                    found[key] = _embedding_cache[key] = embedding
+                    future = futures[key]
+                    if not future.done():
+                        future.set_result(embedding)
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Nobody else may be waiting; don't log an unretrieved exception
+                    future.exception()
+            raise
+        finally:
+            for key, future in futures.items():
+                # Don't leave waiting requests hanging if this one was cancelled
+                if not future.done():
+                    future.set_exception(RuntimeError("Embedding request was cancelled"))
+                    future.exception()
+                _inflight_embeddings.pop(key, None)
+    
+    for key, future in waiting.items():
+        # Shielded, so a cancelled waiter doesn't cancel the embedding shared with other requests
+        found[key] = await asyncio.shield(future)
+    
+    return [found[key] for key in keys]
+
 @router.post("/embed")
 async def generate_embedding(
     text: str = Body(..., embed=True),
+    dtype: str = Query("fp32", regex=EMBEDDING_DTYPE_PATTERN, description="Embedding encoding: fp32, fp16 or int8"),
     current_user: Dict = Depends(get_current_user)
 ):
     """
@@ -168,22 +325,26 @@ async def generate_embedding(
     
     Args:
         text: Text to embed
+        dtype: Embedding encoding; fp16 and int8 return base64 bytes (with a
+            `scale` for int8), several times smaller than JSON floats
         current_user: Current authenticated user
         
     Returns:
         Text embedding
     """
     try:
-        # Get LangChain service
-        langchain_service = await get_langchain_service()
-        
-        # Generate embedding
-        embedding = await langchain_service.langchain_manager.generate_embedding(text)
+        embedding = (await _embed_texts([text]))[0]
+        encoded, scale = _encode_embedding(embedding, dtype)
         
-        return {
-            "embedding": embedding,
+        result = {
+            "embedding": encoded,
             "dimensions": len(embedding)
         }
+        if dtype != "fp32":
+            result["dtype"] = dtype
+        if scale is not None:
+            result["scale"] = scale
+        return result
         
     except Exception as e:
         logger.error(f"Error generating embedding: {e}")
@@ -192,5 +353,51 @@ async def generate_embedding(
             detail=f"Error generating embedding: {str(e)}"
         )
 
+@router.post("/embed/batch")
+async def generate_embeddings(
+    texts: List[str] = Body(..., embed=True),
+    dtype: str = Query("fp32", regex=EMBEDDING_DTYPE_PATTERN, description="Embedding encoding: fp32, fp16 or int8"),
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Generate embeddings for several texts in one request.
+    
+    Args:
+        texts: Texts to embed, at most MAX_EMBED_BATCH_TEXTS
+        dtype: Embedding encoding, as for /embed; int8 returns one scale per embedding
+        current_user: Current authenticated user
+        
+    Returns:
+        Text embeddings, in the same order as the texts
+    """
+    if len(texts) > MAX_EMBED_BATCH_TEXTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_EMBED_BATCH_TEXTS} texts can be embedded per request"
+        )
+    if not texts:
+        return {"embeddings": [], "dimensions": 0}
+    
+    try:
+        embeddings = await _embed_texts(texts)
+        encoded = [_encode_embedding(embedding, dtype) for embedding in embeddings]
+        
+        result = {
+            "embeddings": [value for value, _ in encoded],
+            "dimensions": len(embeddings[0])
+        }
+        if dtype != "fp32":
+            result["dtype"] = dtype
+        if dtype == "int8":
+            result["scales"] = [scale for _, scale in encoded]
+        return result
+        
+    except Exception as e:
+        logger.error(f"Error generating embeddings: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error generating embeddings: {str(e)}"
+        )
+
 # Export router
 langchain_router = router
\ No newline at end of file
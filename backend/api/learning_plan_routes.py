@@ -1,25 +1,428 @@
 # backend/api/learning_plan_routes.py
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body, status, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import uuid
 import logging
 import json
+import re
 import asyncio
+import orjson
+from functools import lru_cache
+from cachetools import TTLCache
 
-from models.learning_plan import LearningPlan, LearningActivity, ActivityStatus
-from auth.entra_auth import get_current_user
+from models.learning_plan import LearningPlan, LearningActivity, ActivityStatus, LearningPeriod
+from models.user import User
+from models.content import Content, ContentType, DifficultyLevel
+from auth.current_user import get_current_user, get_current_user_model
 from services.azure_learning_plan_service import get_learning_plan_service
-from rag.generator import get_plan_generator
 from rag.retriever import retrieve_relevant_content
 from services.search_service import get_search_service
+from api.dependencies import provide_learning_plan_service, provide_plan_generator
 
 # Setup logger
 logger = logging.getLogger(__name__)
 
-# Create router
-router = APIRouter(prefix="/learning-plans", tags=["learning-plans"])
+# Create router; plan payloads serialize much faster with orjson, whichever app includes it
+router = APIRouter(prefix="/learning-plans", tags=["learning-plans"], default_response_class=ORJSONResponse)
+
+# Map to main subject categories - more comprehensive mapping
+SUBJECT_CATEGORIES = {
+    "Mathematics": ["math", "mathematics", "algebra", "geometry", "calculus", "arithmetic", "statistics", "probability", "number theory"],
+    "Science": ["science", "biology", "physics", "chemistry", "laboratory", "environment", "ecology", "astronomy", "earth science"],
+    "English": ["english", "writing", "reading", "literature", "grammar", "vocabulary", "comprehension", "spelling", "composition"],
+    "History": ["history", "social studies", "geography", "civics", "world history", "american history", "economics", "politics"],
+    "Art": ["art", "creative", "drawing", "painting", "sculpture", "design", "photography", "visual arts"],
+    "Music": ["music", "singing", "instruments", "composition", "theory", "orchestra", "band", "choir"],
+    "Physical Education": ["physical education", "pe", "sports", "fitness", "exercise", "health", "teamwork"],
+    "Computer Science": ["computer", "programming", "coding", "technology", "software", "web development", "app development"],
+    "Foreign Languages": ["spanish", "french", "german", "chinese", "japanese", "latin", "language"]
+}
+
+# One pattern per category matching its name or any of its keywords at the start of a word,
+# so "math" matches "mathematical" but "pe" doesn't match "speaking"
+_SUBJECT_PATTERNS = {
+    subject: re.compile(r"\b(?:" + "|".join(re.escape(keyword) for keyword in [subject.lower(), *keywords]) + ")")
+    for subject, keywords in SUBJECT_CATEGORIES.items()
+}
+
+def _extract_subjects_from_terms(terms: List[str]) -> List[str]:
+    """
+    Extract the subject categories mentioned in student profile terms.
+    
+    Args:
+        terms: Interests, strengths or improvement areas from a student profile
+        
+    Returns:
+        Matching subjects, in order of first mention
+    """
+    extracted_subjects = []
+    for term in terms:
+        term_lower = term.lower()
+        for subject, pattern in _SUBJECT_PATTERNS.items():
+            if subject not in extracted_subjects and pattern.search(term_lower):
+                extracted_subjects.append(subject)
+    return extracted_subjects
+
+# Retrieved content per (student, subject, grade level, count bucket); a student creating
+# several plans in a session gets the same content for a subject
+_content_cache: TTLCache = TTLCache(maxsize=256, ttl=300)
+
+# Retrievals running right now, so concurrent requests for the same content share one
+_inflight_content: Dict[tuple, asyncio.Future] = {}
+
+# Content counts are rounded up to a multiple of this, so nearby counts share a cache entry
+CONTENT_COUNT_BUCKET = 15
+
+async def _retrieve_content_cached(
+    user: User,
+    subject: str,
+    k: int,
+    grade_level: Optional[int] = None
+) -> List[Content]:
+    """
+    Retrieve relevant content for a student and subject, reusing recent results.
+    
+    Args:
+        user: The student the content is personalized for
+        subject: Subject to retrieve content for
+        k: Number of content items to retrieve
+        grade_level: Optional grade level to override the student's
+        
+    Returns:
+        List of relevant Content objects; empty results are not cached
+    """
+    k_bucket = -(-k // CONTENT_COUNT_BUCKET) * CONTENT_COUNT_BUCKET
+    key = (user.id, subject, grade_level, k_bucket)
+    content = _content_cache.get(key)
+    if content is None:
+        if key in _inflight_content:
+            # Shielded, so a cancelled waiter doesn't cancel the retrieval shared with other requests
+            content = await asyncio.shield(_inflight_content[key])
+        else:
+            future = asyncio.get_running_loop().create_future()
+            _inflight_content[key] = future
+            try:
+                content = await retrieve_relevant_content(
+                    student_profile=user,
+                    subject=subject,
+                    grade_level=grade_level,
+                    k=k_bucket
+                )
+                if content:
+                    _content_cache[key] = content
+                if not future.done():
+                    future.set_result(content)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                    # Nobody else may be waiting; don't log an unretrieved exception
+                    future.exception()
+                raise
+            finally:
+                # Don't leave waiting requests hanging if this one was cancelled
+                if not future.done():
+                    future.set_exception(RuntimeError("Content retrieval was cancelled"))
+                    future.exception()
+                _inflight_content.pop(key, None)
+    # Callers get their own list
+    return list(content[:k])
+
+@lru_cache(maxsize=64)
+def _emergency_content(subject: str) -> Content:
+    """
+    Get the minimal fallback content item for a subject.
+    
+    Used when neither search nor the fallback content provide anything, so
+    plan generation still has one resource. The item is the same for every
+    request, so it is built once per subject.
+    """
+    return Content(
+        id=f"fallback-{subject.lower().replace(' ', '-')}",
+        title=f"Learning about {subject}",
+        description=f"A general introduction to {subject} concepts",
+        content_type=ContentType.ARTICLE,
+        subject=subject,
+        difficulty_level=DifficultyLevel.INTERMEDIATE,
+        url=f"https://example.com/{subject.lower().replace(' ', '-')}",
+        grade_level=[7, 8, 9],  # Middle school level as default
+        topics=[subject],
+        duration_minutes=30,
+        keywords=[subject],
+        source="Emergency Fallback Content"
+    )
+
+def _parse_learning_period(learning_period: Optional[str]) -> LearningPeriod:
+    """Parse a learning period from its string value, defaulting to one month."""
+    if learning_period:
+        try:
+            return LearningPeriod(learning_period)
+        except ValueError:
+            logger.warning(f"Invalid learning period: {learning_period}. Using default.")
+    return LearningPeriod.ONE_MONTH
+
+async def _get_plan_content(user: User, subject: str) -> List[Content]:
+    """
+    Get the content a learning plan for a subject is built from.
+    
+    Falls back to the bundled fallback content, then to a single emergency
+    item, when search finds nothing.
+    
+    Args:
+        user: The student the plan is for
+        subject: Subject for the learning plan
+        
+    Returns:
+        List of Content objects for the plan
+    """
+    # First try to get relevant content from Azure Search
+    # Flag to track if we need to use fallback content
+    use_fallback = False
+    try:
+        # Get relevant content for the learning plan with more items to ensure sufficient content for all activities
+        logger.info(f"Searching for content for subject: {subject}")
+        relevant_content = await _retrieve_content_cached(
+            user,
+            subject,
+            k=15  # Get more content to ensure we have enough for all activities
+        )
+        
+        # If we got results, log success
+        if relevant_content:
+            logger.info(f"✅ Found {len(relevant_content)} relevant content items for {subject}")
+        else:
+            logger.warning(f"⚠️ No content found in Azure Search for subject {subject}. Will try fallback.")
+            use_fallback = True
+    except Exception as e:
+        logger.error(f"Error retrieving content from Azure Search: {e}")
+        # Log detailed error information for debugging
+        import traceback
+        logger.debug(f"Full error details: {traceback.format_exc()}")
+        relevant_content = []
+        use_fallback = True
+    
+    # Add fallback content if no content was found
+    if use_fallback or not relevant_content:
+        logger.warning(f"🔄 Falling back to default content for subject {subject}")
+        try:
+            # Import fallback content function
+            from scripts.add_fallback_content import get_fallback_content
+            fallback_content = get_fallback_content(subject)
+            if fallback_content:
+                logger.info(f"✅ Using {len(fallback_content)} fallback content items for {subject}")
+                relevant_content = fallback_content
+            else:
+                logger.error(f"❌ No fallback content available for {subject}. This will cause planning errors.")
+                # Create bare minimum fallback content to prevent crashes
+                emergency_content = _emergency_content(subject)
+                relevant_content = [emergency_content]
+                logger.warning(f"Created emergency fallback content for {subject} to prevent application errors")
+        except Exception as e:
+            logger.error(f"Error getting fallback content: {e}")
+            # Log detailed error information for debugging
+            import traceback
+            logger.debug(f"Fallback content error details: {traceback.format_exc()}")
+    
+    return relevant_content
+
+# Weeks of one plan generated at once; more makes Azure OpenAI rate limiting likely
+MAX_CONCURRENT_WEEKS = 4
+
+# Extra attempts for a week whose generation fails
+WEEK_PLAN_RETRIES = 1
+
+async def _generate_week_plan(
+    plan_generator,
+    semaphore: asyncio.Semaphore,
+    user: User,
+    subject: str,
+    relevant_content: List[Content],
+    week_num: int
+) -> Dict[str, Any]:
+    """
+    Generate one week of a learning plan, retrying a failed attempt.
+    
+    Args:
+        plan_generator: Generator used for the weekly plan
+        semaphore: Limits the weeks generated at once
+        user: The student the plan is for
+        subject: Subject for the learning plan
+        relevant_content: Content the activities can reference
+        week_num: Zero-based week number, for logging
+        
+    Returns:
+        The generated weekly plan
+        
+    Raises:
+        Exception: The last error if every attempt fails
+    """
+    for attempt in range(WEEK_PLAN_RETRIES + 1):
+        try:
+            async with semaphore:
+                return await plan_generator.generate_plan(
+                    student=user,
+                    subject=subject,
+                    relevant_content=relevant_content,
+                    days=7,  # Always use 7 days for a weekly plan
+                    is_weekly_plan=True
+                )
+        except Exception as e:
+            if attempt == WEEK_PLAN_RETRIES:
+                raise
+            logger.warning(f"Error generating week {week_num + 1} of the learning plan, retrying: {e}")
+
+def _assemble_learning_plan(
+    week_plans: List[Dict[str, Any]],
+    subject: str,
+    period: LearningPeriod,
+    relevant_content: List[Content],
+    user: User,
+    owner_id: str
+) -> LearningPlan:
+    """
+    Combine generated weekly plans into one learning plan.
+    
+    Args:
+        week_plans: Generated plan for each week, in order
+        subject: Subject for the learning plan
+        period: Learning period the plan covers
+        relevant_content: Content the activities reference
+        user: The student the plan is for
+        owner_id: ID of the user who owns the plan
+        
+    Returns:
+        The learning plan, not yet saved
+    """
+    days = period.days
+    weeks_in_period = len(week_plans)
+    all_activities = []
+    
+    week_plan_dict = {}
+    for week_num, week_plan in enumerate(week_plans):
+        week_plan_dict = week_plan
+        
+        # Adjust day numbers to be relative to the entire learning period
+        week_activities = week_plan_dict.get("activities", [])
+        for activity in week_activities:
+            # Update day number to be relative to the full learning period
+            activity["day"] = activity["day"] + (week_num * 7)
+            all_activities.append(activity)
+    
+    # Create a combined plan dictionary with all weeks' activities
+    plan_dict = {
+        "title": week_plan_dict.get("title", f"{subject} Learning Plan for {period.display_name}"),
+        "description": f"A comprehensive {period.label} learning plan for {subject} spanning {weeks_in_period} weeks",
+        "subject": week_plan_dict.get("subject", subject),
+        "topics": week_plan_dict.get("topics", [subject]),
+        "activities": all_activities
+    }
+    
+    # Index the content once; activities reference it by id
+    content_by_id = {str(content.id): content for content in relevant_content}
+    used_content_ids = {a["content_id"] for a in plan_dict.get("activities", []) if a.get("content_id")}
+    # Content is handed out in retrieval order, so a single pass finds every unused item
+    content_iter = iter(relevant_content)
+    
+    # Process activities to ensure each has associated content
+    activities = []
+    for i, activity_dict in enumerate(plan_dict.get("activities", [])):
+        # Get existing content URL and ID from the activity
+        content_url = activity_dict.get("content_url")
+        content_id = activity_dict.get("content_id")
+        matching_content = None
+        
+        # Try to find matching content if the activity has a content_id
+        if content_id:
+            matching_content = content_by_id.get(content_id)
+            if matching_content and not content_url:
+                content_url = matching_content.url
+        
+        # If the activity doesn't have a content reference, assign one from available content
+        if not content_id and relevant_content:
+            # Pick a content item that hasn't been used yet
+            unused_content = next(
+                (content for content in content_iter if str(content.id) not in used_content_ids),
+                None
+            )
+            
+            if unused_content:
+                # Use the first unused content
+                matching_content = unused_content
+                content_id = str(matching_content.id)
+                content_url = matching_content.url
+                used_content_ids.add(content_id)
+                logger.info(f"Assigned content {content_id} to activity without content reference")
+            elif relevant_content:
+                # If all content has been used, reuse the first item
+                matching_content = relevant_content[0]
+                content_id = str(matching_content.id)
+                content_url = matching_content.url
+                logger.info(f"Reused content {content_id} for activity without content reference")
+        
+        # Prepare content metadata with detailed information about the educational resource
+        metadata = activity_dict.get("metadata", {"subject": subject})
+        if matching_content:
+            content_info = {
+                "title": matching_content.title,
+                "description": matching_content.description,
+                "subject": matching_content.subject,
+                "difficulty_level": matching_content.difficulty_level.value if hasattr(matching_content, "difficulty_level") else None,
+                "content_type": matching_content.content_type.value if hasattr(matching_content, "content_type") else None,
+                "grade_level": matching_content.grade_level if hasattr(matching_content, "grade_level") else None,
+                "url": matching_content.url
+            }
+            metadata["content_info"] = content_info
+        
+        # Update the activity dictionary with enhanced content information
+        activity_dict["content_id"] = content_id
+        activity_dict["content_url"] = content_url
+        activity_dict["metadata"] = metadata
+        
+        # Add enhanced learning benefit if not present
+        if "learning_benefit" not in activity_dict or not activity_dict["learning_benefit"]:
+            # Create a detailed learning benefit that includes content information
+            if matching_content:
+                activity_dict["learning_benefit"] = f"This activity helps develop skills in {subject} using {matching_content.title}. The educational resource is tailored to your learning style and grade level, providing an effective learning experience."
+            else:
+                activity_dict["learning_benefit"] = f"This activity helps develop skills in {subject} by using educational resources tailored to your learning style and needs."
+        
+        activities.append(activity_dict)
+    
+    # Create learning plan object from the returned dictionary with enhanced activities
+    now = datetime.utcnow()
+    
+    # Calculate start and end dates
+    start_date = now
+    end_date = now + timedelta(days=days)
+    
+    # Create metadata with learning period
+    metadata = {
+        "learning_period": period.value,
+        "period_days": days,
+        "weeks_in_period": weeks_in_period,
+        "activity_days": days  # Now we create activities for all days
+    }
+    
+    learning_plan = LearningPlan(
+        id=str(uuid.uuid4()),
+        student_id=user.id,
+        title=plan_dict.get("title", f"{subject} Learning Plan for {period.display_name}"),
+        description=plan_dict.get("description", f"A {period.label} learning plan for {subject}"),
+        subject=plan_dict.get("subject", subject),
+        topics=plan_dict.get("topics", [subject]),
+        activities=[LearningActivity(**activity) for activity in activities],
+        status=ActivityStatus.NOT_STARTED,
+        progress_percentage=0.0,
+        created_at=now,
+        updated_at=now,
+        start_date=start_date,
+        end_date=end_date,
+        metadata=metadata,
+        owner_id=owner_id  # Set the owner_id to the current user
+    )
+    
+    return learning_plan
 
 @router.get("/")
 async def get_learning_plans(
@@ -49,8 +452,9 @@ async def get_learning_plans(
             limit=limit
         )
         
-        # Convert to JSON-serializable format
-        return [plan.dict() for plan in plans]
+        # Serialize with orjson, which handles the datetimes and enums natively,
+        # instead of FastAPI's jsonable_encoder pass over every activity
+        return ORJSONResponse([plan.dict() for plan in plans])
         
     except Exception as e:
         raise HTTPException(
@@ -62,7 +466,10 @@ async def get_learning_plans(
 async def create_learning_plan(
     subject: str = Body(..., embed=True),
     learning_period: Optional[str] = Body(None, embed=True),
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    user: User = Depends(get_current_user_model),
+    learning_plan_service = Depends(provide_learning_plan_service),
+    plan_generator = Depends(provide_plan_generator)
 ):
     """
     Create a new personalized learning plan.
@@ -71,240 +478,43 @@ async def create_learning_plan(
         subject: Subject for the learning plan
         learning_period: Optional period for the learning plan (one_week, two_weeks, one_month, two_months, school_term)
         current_user: Current authenticated user
+        user: Current authenticated user as a `User` model
         
     Returns:
         Created learning plan
     """
     try:
-        # Create a user model from current user
-        from models.user import User, LearningStyle
-        
-        user = User(
-            id=current_user["id"],
-            username=current_user["username"],
-            email=current_user["email"],
-            full_name=current_user.get("full_name", ""),
-            grade_level=current_user.get("grade_level"),
-            subjects_of_interest=current_user.get("subjects_of_interest", []),
-            learning_style=LearningStyle(current_user.get("learning_style")) if current_user.get("learning_style") else None,
-            is_active=True
-        )
-        
-        # First try to get relevant content from Azure Search
-        # Flag to track if we need to use fallback content
-        use_fallback = False
-        try:
-            # Get relevant content for the learning plan with more items to ensure sufficient content for all activities
-            logger.info(f"Searching for content for subject: {subject}")
-            relevant_content = await retrieve_relevant_content(
-                student_profile=user,
-                subject=subject,
-                k=15  # Get more content to ensure we have enough for all activities
-            )
-            
-            # If we got results, log success
-            if relevant_content:
-                logger.info(f"✅ Found {len(relevant_content)} relevant content items for {subject}")
-            else:
-                logger.warning(f"⚠️ No content found in Azure Search for subject {subject}. Will try fallback.")
-                use_fallback = True
-        except Exception as e:
-            logger.error(f"Error retrieving content from Azure Search: {e}")
-            # Log detailed error information for debugging
-            import traceback
-            logger.debug(f"Full error details: {traceback.format_exc()}")
-            relevant_content = []
-            use_fallback = True
-        
-        # Add fallback content if no content was found
-        if use_fallback or not relevant_content:
-            logger.warning(f"🔄 Falling back to default content for subject {subject}")
-            try:
-                # Import fallback content function
-                from scripts.add_fallback_content import get_fallback_content
-                fallback_content = get_fallback_content(subject)
-                if fallback_content:
-                    logger.info(f"✅ Using {len(fallback_content)} fallback content items for {subject}")
-                    relevant_content = fallback_content
-                else:
-                    logger.error(f"❌ No fallback content available for {subject}. This will cause planning errors.")
-                    # Create bare minimum fallback content to prevent crashes
-                    from models.content import Content, ContentType, DifficultyLevel
-                    # uuid is already imported at the module level
-                    
-                    # Create a very basic fallback item for this subject
-                    emergency_content = Content(
-                        id=f"fallback-{uuid.uuid4()}",
-                        title=f"Learning about {subject}",
-                        description=f"A general introduction to {subject} concepts",
-                        content_type=ContentType.ARTICLE,
-                        subject=subject,
-                        difficulty_level=DifficultyLevel.INTERMEDIATE,
-                        url=f"https://example.com/{subject.lower().replace(' ', '-')}",
-                        grade_level=[7, 8, 9],  # Middle school level as default
-                        topics=[subject],
-                        duration_minutes=30,
-                        keywords=[subject],
-                        source="Emergency Fallback Content"
-                    )
-                    relevant_content = [emergency_content]
-                    logger.warning(f"Created emergency fallback content for {subject} to prevent application errors")
-            except Exception as e:
-                logger.error(f"Error getting fallback content: {e}")
-                # Log detailed error information for debugging
-                import traceback
-                logger.debug(f"Fallback content error details: {traceback.format_exc()}")
-        
-        # Get plan generator
-        plan_generator = await get_plan_generator()
+        relevant_content = await _get_plan_content(user, subject)
         
         # Set up start and end dates based on learning period
-        from models.learning_plan import LearningPeriod
+        period = _parse_learning_period(learning_period)
         
-        # Parse learning period from string to enum
-        period = None
-        if learning_period:
-            try:
-                period = LearningPeriod(learning_period)
-            except ValueError:
-                logger.warning(f"Invalid learning period: {learning_period}. Using default.")
-                period = LearningPeriod.ONE_MONTH
-        else:
-            period = LearningPeriod.ONE_MONTH
-        
-        # Calculate days and activity_days
-        days = LearningPeriod.to_days(period)
         # For very long periods, split into weeks and generate activities for all days
-        weeks_in_period = (days + 6) // 7  # Ceiling division to get full weeks
-        all_activities = []
+        days = period.days
+        weeks_in_period = period.weeks
         logger.info(f"Creating plan with {weeks_in_period} weeks for learning period: {period.value} ({days} days)")
         
-        # Generate a plan for each week of the learning period
-        for week_num in range(weeks_in_period):
-            week_plan_dict = await plan_generator.generate_plan(
-                student=user,
-                subject=subject,
-                relevant_content=relevant_content,
-                days=7,  # Always use 7 days for a weekly plan
-                is_weekly_plan=True
+        # Generate a plan for each week of the learning period; the weeks are independent,
+        # so a few generator calls run at once
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_WEEKS)
+        week_tasks = [
+            asyncio.create_task(
+                _generate_week_plan(plan_generator, semaphore, user, subject, relevant_content, week_num)
             )
-            
-            # Adjust day numbers to be relative to the entire learning period
-            week_activities = week_plan_dict.get("activities", [])
-            for activity in week_activities:
-                # Update day number to be relative to the full learning period
-                activity["day"] = activity["day"] + (week_num * 7)
-                all_activities.append(activity)
-        
-        # Create a combined plan dictionary with all weeks' activities
-        plan_dict = {
-            "title": week_plan_dict.get("title", f"{subject} Learning Plan for {period.value.replace('_', ' ').title()}"),
-            "description": f"A comprehensive {period.value.replace('_', ' ')} learning plan for {subject} spanning {weeks_in_period} weeks",
-            "subject": week_plan_dict.get("subject", subject),
-            "topics": week_plan_dict.get("topics", [subject]) if 'week_plan_dict' in locals() else [subject],
-            "activities": all_activities
-        }
-        
-        # Process activities to ensure each has associated content
-        activities = []
-        for i, activity_dict in enumerate(plan_dict.get("activities", [])):
-            # Get existing content URL and ID from the activity
-            content_url = activity_dict.get("content_url")
-            content_id = activity_dict.get("content_id")
-            matching_content = None
-            
-            # Try to find matching content if the activity has a content_id
-            if content_id:
-                matching_content = next(
-                    (content for content in relevant_content if str(content.id) == content_id),
-                    None
-                )
-                if matching_content and not content_url:
-                    content_url = matching_content.url
-            
-            # If the activity doesn't have a content reference, assign one from available content
-            if not content_id and relevant_content:
-                # Pick a content item that hasn't been used yet
-                used_content_ids = [a.get("content_id") for a in plan_dict.get("activities", []) if a.get("content_id")]
-                unused_content = [c for c in relevant_content if str(c.id) not in used_content_ids]
-                
-                if unused_content:
-                    # Use the first unused content
-                    matching_content = unused_content[0]
-                    content_id = str(matching_content.id)
-                    content_url = matching_content.url
-                    logger.info(f"Assigned content {content_id} to activity without content reference")
-                elif relevant_content:
-                    # If all content has been used, reuse the first item
-                    matching_content = relevant_content[0]
-                    content_id = str(matching_content.id)
-                    content_url = matching_content.url
-                    logger.info(f"Reused content {content_id} for activity without content reference")
-            
-            # Prepare content metadata with detailed information about the educational resource
-            metadata = activity_dict.get("metadata", {"subject": subject})
-            if matching_content:
-                content_info = {
-                    "title": matching_content.title,
-                    "description": matching_content.description,
-                    "subject": matching_content.subject,
-                    "difficulty_level": matching_content.difficulty_level.value if hasattr(matching_content, "difficulty_level") else None,
-                    "content_type": matching_content.content_type.value if hasattr(matching_content, "content_type") else None,
-                    "grade_level": matching_content.grade_level if hasattr(matching_content, "grade_level") else None,
-                    "url": matching_content.url
-                }
-                metadata["content_info"] = content_info
-            
-            # Update the activity dictionary with enhanced content information
-            activity_dict["content_id"] = content_id
-            activity_dict["content_url"] = content_url
-            activity_dict["metadata"] = metadata
-            
-            # Add enhanced learning benefit if not present
-            if "learning_benefit" not in activity_dict or not activity_dict["learning_benefit"]:
-                # Create a detailed learning benefit that includes content information
-                if matching_content:
-                    activity_dict["learning_benefit"] = f"This activity helps develop skills in {subject} using {matching_content.title}. The educational resource is tailored to your learning style and grade level, providing an effective learning experience."
-                else:
-                    activity_dict["learning_benefit"] = f"This activity helps develop skills in {subject} by using educational resources tailored to your learning style and needs."
-            
-            activities.append(activity_dict)
-        
-        # Create learning plan object from the returned dictionary with enhanced activities
-        now = datetime.utcnow()
-        
-        # Calculate start and end dates
-        start_date = now
-        end_date = now + timedelta(days=days)
-        
-        # Create metadata with learning period
-        metadata = {
-            "learning_period": period.value,
-            "period_days": days,
-            "weeks_in_period": weeks_in_period,
-            "activity_days": days  # Now we create activities for all days
-        }
-        
-        learning_plan = LearningPlan(
-            id=str(uuid.uuid4()),
-            student_id=user.id,
-            title=plan_dict.get("title", f"{subject} Learning Plan for {period.value.replace('_', ' ').title()}"),
-            description=plan_dict.get("description", f"A {period.value.replace('_', ' ')} learning plan for {subject}"),
-            subject=plan_dict.get("subject", subject),
-            topics=plan_dict.get("topics", [subject]),
-            activities=[LearningActivity(**activity) for activity in activities],
-            status=ActivityStatus.NOT_STARTED,
-            progress_percentage=0.0,
-            created_at=now,
-            updated_at=now,
-            start_date=start_date,
-            end_date=end_date,
-            metadata=metadata,
-            owner_id=current_user["id"]  # Set the owner_id to the current user
+            for week_num in range(weeks_in_period)
+        ]
+        try:
+            week_plans = await asyncio.gather(*week_tasks)
+        finally:
+            # A week that still fails after retrying fails the plan; stop generating the rest
+            for task in week_tasks:
+                task.cancel()
+        
+        learning_plan = _assemble_learning_plan(
+            week_plans, subject, period, relevant_content, user, current_user["id"]
         )
         
-        # Get learning plan service and save the plan
-        learning_plan_service = await get_learning_plan_service()
+        # Save the plan
         success = await learning_plan_service.create_learning_plan(learning_plan)
         
         if not success:
@@ -314,7 +524,7 @@ async def create_learning_plan(
             )
         
         # Return the created plan
-        return learning_plan.dict()
+        return ORJSONResponse(learning_plan.dict())
         
     except Exception as e:
         raise HTTPException(
@@ -322,10 +532,87 @@ async def create_learning_plan(
             detail=f"Error creating learning plan: {str(e)}"
         )
 
+@router.post("/stream")
+async def stream_learning_plan(
+    subject: str = Body(..., embed=True),
+    learning_period: Optional[str] = Body(None, embed=True),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    user: User = Depends(get_current_user_model),
+    learning_plan_service = Depends(provide_learning_plan_service),
+    plan_generator = Depends(provide_plan_generator)
+):
+    """
+    Create a new personalized learning plan, streaming each week as it is generated.
+    
+    The response is newline-delimited JSON. A `week` line with the week's
+    generated activities is sent as each week completes, in completion order.
+    The last line is a `plan` line with the saved plan, whose activities are
+    final, or an `error` line if the plan could not be created.
+    
+    Args:
+        subject: Subject for the learning plan
+        learning_period: Optional period for the learning plan (one_week, two_weeks, one_month, two_months, school_term)
+        current_user: Current authenticated user
+        user: Current authenticated user as a `User` model
+        
+    Returns:
+        Streaming response of plan events
+    """
+    period = _parse_learning_period(learning_period)
+    weeks_in_period = period.weeks
+    
+    async def generate_week(week_num: int, relevant_content: List[Content], semaphore: asyncio.Semaphore):
+        return week_num, await _generate_week_plan(
+            plan_generator, semaphore, user, subject, relevant_content, week_num
+        )
+    
+    async def stream_plan():
+        tasks = []
+        try:
+            relevant_content = await _get_plan_content(user, subject)
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_WEEKS)
+            tasks = [
+                asyncio.create_task(generate_week(week_num, relevant_content, semaphore))
+                for week_num in range(weeks_in_period)
+            ]
+            
+            week_plans = [None] * weeks_in_period
+            # A week that still fails after retrying fails the plan with an error line
+            for next_week in asyncio.as_completed(tasks):
+                week_num, week_plan = await next_week
+                week_plans[week_num] = week_plan
+                
+                # Days are relative to the entire learning period
+                week_activities = [
+                    {**activity, "day": activity["day"] + (week_num * 7)}
+                    for activity in week_plan.get("activities", [])
+                ]
+                yield orjson.dumps({"type": "week", "week": week_num + 1, "activities": week_activities}) + b"\n"
+            
+            learning_plan = _assemble_learning_plan(
+                week_plans, subject, period, relevant_content, user, current_user["id"]
+            )
+            if not await learning_plan_service.create_learning_plan(learning_plan):
+                yield orjson.dumps({"type": "error", "detail": "Failed to save learning plan"}) + b"\n"
+                return
+            
+            yield orjson.dumps({"type": "plan", "plan": learning_plan.dict()}) + b"\n"
+        except Exception as e:
+            logger.exception(f"Error streaming learning plan: {e}")
+            yield orjson.dumps({"type": "error", "detail": f"Error creating learning plan: {str(e)}"}) + b"\n"
+        finally:
+            # Stop generating weeks nobody will receive after a failure or disconnect
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(stream_plan(), media_type="application/x-ndjson")
+
 @router.post("/profile-based")
 async def create_profile_based_learning_plan(
     plan_data: Dict[str, Any] = Body(...),
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    learning_plan_service = Depends(provide_learning_plan_service),
+    plan_generator = Depends(provide_plan_generator)
 ):
     """
     Create a new personalized learning plan based on a student profile.
@@ -373,7 +660,9 @@ async def create_profile_based_learning_plan(
             _create_profile_based_learning_plan_async(
                 task_id=task_id,
                 plan_data=plan_data,
-                current_user=current_user
+                current_user=current_user,
+                learning_plan_service=learning_plan_service,
+                plan_generator=plan_generator
             )
         )
         
@@ -394,7 +683,9 @@ async def create_profile_based_learning_plan(
 async def _create_profile_based_learning_plan_async(
     task_id: str,
     plan_data: Dict[str, Any],
-    current_user: Dict[str, Any]
+    current_user: Dict[str, Any],
+    learning_plan_service,
+    plan_generator
 ):
     """
     Background task to create a learning plan based on a student profile.
@@ -404,6 +695,8 @@ async def _create_profile_based_learning_plan_async(
         task_id: Task ID for status tracking
         plan_data: Learning plan data
         current_user: Current authenticated user
+        learning_plan_service: Service used to save the plan
+        plan_generator: Generator for the weekly activities
     """
     # Import task tracker
     from utils import task_status_tracker
@@ -502,7 +795,7 @@ async def _create_profile_based_learning_plan_async(
             except:
                 areas_for_improvement = [area.strip() for area in areas_for_improvement.split(",") if area.strip()]
         
-        # Define known subjects (expanded list)
+        # Match profile terms to subject categories
         task_status_tracker.update_task_status(
             task_id=task_id,
             progress=15,
@@ -510,44 +803,10 @@ async def _create_profile_based_learning_plan_async(
             current_step="Analyzing student profile"
         )
         
-        known_subjects = [
-            "Mathematics", "Math", "Algebra", "Geometry", "Calculus", 
-            "Science", "Biology", "Chemistry", "Physics", 
-            "English", "Literature", "Writing", "Grammar", "Reading",
-            "History", "Social Studies", "Geography", "Civics", 
-            "Art", "Music", "Physical Education", "PE", "Computer Science",
-            "Technology", "Programming", "Foreign Languages", "Spanish", "French"
-        ]
-        
-        # Map to main subject categories - more comprehensive mapping
-        subject_categories = {
-            "Mathematics": ["math", "mathematics", "algebra", "geometry", "calculus", "arithmetic", "statistics", "probability", "number theory"],
-            "Science": ["science", "biology", "physics", "chemistry", "laboratory", "environment", "ecology", "astronomy", "earth science"],
-            "English": ["english", "writing", "reading", "literature", "grammar", "vocabulary", "comprehension", "spelling", "composition"],
-            "History": ["history", "social studies", "geography", "civics", "world history", "american history", "economics", "politics"],
-            "Art": ["art", "creative", "drawing", "painting", "sculpture", "design", "photography", "visual arts"],
-            "Music": ["music", "singing", "instruments", "composition", "theory", "orchestra", "band", "choir"],
-            "Physical Education": ["physical education", "pe", "sports", "fitness", "exercise", "health", "teamwork"],
-            "Computer Science": ["computer", "programming", "coding", "technology", "software", "web development", "app development"],
-            "Foreign Languages": ["spanish", "french", "german", "chinese", "japanese", "latin", "language"]
-        }
-        
-        # Extract subjects from student profile data
-        def extract_subjects_from_terms(terms, categories):
-            extracted_subjects = []
-            for term in terms:
-                term_lower = term.lower()
-                for subject, keywords in categories.items():
-                    # Match either direct subject name or keywords
-                    if subject.lower() in term_lower or any(keyword in term_lower for keyword in keywords):
-                        if subject not in extracted_subjects:
-                            extracted_subjects.append(subject)
-            return extracted_subjects
-        
         # Extract subjects from different profile sections
-        interest_subjects = extract_subjects_from_terms(interests, subject_categories)
-        strength_subjects = extract_subjects_from_terms(strengths, subject_categories)
-        improvement_subjects = extract_subjects_from_terms(areas_for_improvement, subject_categories)
+        interest_subjects = _extract_subjects_from_terms(interests)
+        strength_subjects = _extract_subjects_from_terms(strengths)
+        improvement_subjects = _extract_subjects_from_terms(areas_for_improvement)
         
         # Determine focus subjects (combining interests, strengths, and improvement areas with priority)
         focus_subjects = []
@@ -616,11 +875,11 @@ async def _create_profile_based_learning_plan_async(
         # Calculate start and end dates
         now = datetime.utcnow()
         start_date = now
-        days = LearningPeriod.to_days(period)
+        days = period.days
         end_date = now + timedelta(days=days)
         
         logger.info(f"Creating plan with learning period: {period.value} ({days} days)")
-        weeks_in_period = (days + 6) // 7  # Ceiling division to get full weeks
+        weeks_in_period = period.weeks
         
         task_status_tracker.update_task_status(
             task_id=task_id,
@@ -683,26 +942,39 @@ async def _create_profile_based_learning_plan_async(
         content_progress_per_subject = content_progress_total / len(focus_subjects)
         current_progress = 30
         
-        # First try getting content for all subjects
-        for i, subject in enumerate(focus_subjects):
-            estimated_content_needed = min(30, weeks_in_period * 3)  # Get enough items for all weeks
-            logger.info(f"Retrieving {estimated_content_needed} content items for {subject}")
-            
+        estimated_content_needed = min(30, weeks_in_period * 3)  # Get enough items for all weeks
+        logger.info(f"Retrieving {estimated_content_needed} content items for each of {len(focus_subjects)} subjects")
+        
+        task_status_tracker.update_task_status(
+            task_id=task_id,
+            progress=int(current_progress),
+            message=f"Retrieving content for {len(focus_subjects)} subjects",
+            current_step="Retrieving educational content"
+        )
+        
+        # First try getting content for all subjects; the searches are independent,
+        # so they run concurrently
+        retrieved_content = await asyncio.gather(*(
+            _retrieve_content_cached(
+                user,
+                subject,
+                k=estimated_content_needed,
+                grade_level=student_profile.get("grade_level")
+            )
+            for subject in focus_subjects
+        ), return_exceptions=True)
+        
+        for i, (subject, relevant_content) in enumerate(zip(focus_subjects, retrieved_content)):
             task_status_tracker.update_task_status(
                 task_id=task_id,
                 progress=int(current_progress),
-                message=f"Retrieving content for {subject} ({i+1}/{len(focus_subjects)})",
+                message=f"Processing content for {subject} ({i+1}/{len(focus_subjects)})",
                 current_step="Retrieving educational content"
             )
             
             try:
-                # Try to get relevant content from search
-                relevant_content = await retrieve_relevant_content(
-                    student_profile=user,
-                    subject=subject,
-                    grade_level=student_profile.get("grade_level"),
-                    k=estimated_content_needed
-                )
+                if isinstance(relevant_content, Exception):
+                    raise relevant_content
                 
                 if relevant_content:
                     logger.info(f"✅ Found {len(relevant_content)} relevant content items for {subject}")
@@ -735,22 +1007,8 @@ async def _create_profile_based_learning_plan_async(
                                 message=f"Using {len(fallback_content)} fallback content items for {subject}",
                             )
                         else:
-                            # Create emergency fallback
-                            from models.content import Content, ContentType, DifficultyLevel
-                            emergency_content = Content(
-                                id=f"fallback-{uuid.uuid4()}",
-                                title=f"Learning about {subject}",
-                                description=f"A general introduction to {subject} concepts",
-                                content_type=ContentType.ARTICLE,
-                                subject=subject,
-                                difficulty_level=DifficultyLevel.INTERMEDIATE,
-                                url=f"https://example.com/{subject.lower().replace(' ', '-')}",
-                                grade_level=[7, 8, 9],  # Middle school level as default
-                                topics=[subject],
-                                duration_minutes=30,
-                                keywords=[subject],
-                                source="Emergency Fallback Content"
-                            )
+                            # Create bare minimum fallback content to prevent crashes
+                            emergency_content = _emergency_content(subject)
                             all_content[subject] = [emergency_content]
                             logger.warning(f"Created emergency fallback content for {subject}")
                             
@@ -761,22 +1019,8 @@ async def _create_profile_based_learning_plan_async(
                             )
                     except Exception as e:
                         logger.error(f"Error getting fallback content: {e}")
-                        # Create minimal emergency content
-                        from models.content import Content, ContentType, DifficultyLevel
-                        emergency_content = Content(
-                            id=f"fallback-{uuid.uuid4()}",
-                            title=f"Learning about {subject}",
-                            description=f"A general introduction to {subject} concepts",
-                            content_type=ContentType.ARTICLE,
-                            subject=subject,
-                            difficulty_level=DifficultyLevel.INTERMEDIATE,
-                            url=f"https://example.com/{subject.lower().replace(' ', '-')}",
-                            grade_level=[7, 8, 9],
-                            topics=[subject],
-                            duration_minutes=30,
-                            keywords=[subject],
-                            source="Emergency Fallback Content"
-                        )
+                        # Create bare minimum fallback content to prevent crashes
+                        emergency_content = _emergency_content(subject)
                         all_content[subject] = [emergency_content]
                         
                         task_status_tracker.update_task_status(
@@ -786,22 +1030,8 @@ async def _create_profile_based_learning_plan_async(
                         )
             except Exception as e:
                 logger.error(f"Error retrieving content for {subject}: {e}")
-                # Create minimal emergency content 
-                from models.content import Content, ContentType, DifficultyLevel
-                emergency_content = Content(
-                    id=f"fallback-{uuid.uuid4()}",
-                    title=f"Learning about {subject}",
-                    description=f"A general introduction to {subject} concepts",
-                    content_type=ContentType.ARTICLE,
-                    subject=subject,
-                    difficulty_level=DifficultyLevel.INTERMEDIATE,
-                    url=f"https://example.com/{subject.lower().replace(' ', '-')}",
-                    grade_level=[7, 8, 9],
-                    topics=[subject],
-                    duration_minutes=30,
-                    keywords=[subject],
-                    source="Emergency Fallback Content"
-                )
+                # Create bare minimum fallback content to prevent crashes
+                emergency_content = _emergency_content(subject)
                 all_content[subject] = [emergency_content]
                 
                 task_status_tracker.update_task_status(
@@ -821,7 +1051,6 @@ async def _create_profile_based_learning_plan_async(
             current_step="Creating learning plan"
         )
         
-        plan_generator = await get_plan_generator()
         all_activities = []
         
         # Track used content to avoid duplicates across weeks
@@ -844,6 +1073,8 @@ async def _create_profile_based_learning_plan_async(
             # For each subject, generate activities for this week
             week_activities = []
             
+            week_subjects = []
+            week_content = []
             for subject, minutes in subject_times.items():
                 if subject not in all_content:
                     logger.warning(f"No content available for subject {subject}, skipping")
@@ -860,16 +1091,27 @@ async def _create_profile_based_learning_plan_async(
                     logger.info(f"Running low on unused content for {subject}, allowing reuse")
                     available_content = subject_content
                 
+                week_subjects.append((subject, minutes))
+                week_content.append(available_content)
+            
+            # Generate a mini plan for each subject for this week; the subjects are
+            # independent, so the generator calls run concurrently
+            subject_plans = await asyncio.gather(*(
+                plan_generator.generate_plan(
+                    student=user,
+                    subject=subject,
+                    relevant_content=available_content,
+                    days=7,  # One week
+                    is_weekly_plan=True
+                )
+                for (subject, _), available_content in zip(week_subjects, week_content)
+            ), return_exceptions=True)
+            
+            for (subject, minutes), subject_plan in zip(week_subjects, subject_plans):
                 # Generate activities for this subject for this week
                 try:
-                    # Generate a mini plan for this subject for this week
-                    subject_plan = await plan_generator.generate_plan(
-                        student=user,
-                        subject=subject,
-                        relevant_content=available_content,
-                        days=7,  # One week
-                        is_weekly_plan=True
-                    )
+                    if isinstance(subject_plan, Exception):
+                        raise subject_plan
                     
                     # Get this subject's activities (usually 1-3 per day)
                     subject_activities = subject_plan.get("activities", [])
@@ -939,6 +1181,14 @@ async def _create_profile_based_learning_plan_async(
         # Convert to LearningActivity objects with enhanced metadata
         activities = []
         
+        # Index each subject's content once; activities reference it by id
+        content_by_id = {
+            subject: {str(c.id): c for c in subject_content}
+            for subject, subject_content in all_content.items()
+        }
+        # Unused content is handed out in retrieval order, so one pass per subject finds it all
+        content_iters = {subject: iter(subject_content) for subject, subject_content in all_content.items()}
+        
         for i, activity_dict in enumerate(all_activities):
             # Extract the subject from the title
             activity_subject = activity_dict.get("title", "").split(":", 1)[0].strip() if ":" in activity_dict.get("title", "") else "General"
@@ -950,10 +1200,7 @@ async def _create_profile_based_learning_plan_async(
             
             # Find matching content
             if content_id and activity_subject in all_content:
-                matching_content = next(
-                    (c for c in all_content[activity_subject] if str(c.id) == content_id),
-                    None
-                )
+                matching_content = content_by_id[activity_subject].get(content_id)
                 
                 if matching_content and not content_url:
                     content_url = matching_content.url
@@ -961,10 +1208,13 @@ async def _create_profile_based_learning_plan_async(
             # If no content reference, assign one
             if not content_id and activity_subject in all_content:
                 # Try to find unused content
-                unused_content = [c for c in all_content[activity_subject] if str(c.id) not in used_content_ids]
+                unused_content = next(
+                    (c for c in content_iters[activity_subject] if str(c.id) not in used_content_ids),
+                    None
+                )
                 
                 if unused_content:
-                    matching_content = unused_content[0]
+                    matching_content = unused_content
                 elif all_content[activity_subject]:
                     matching_content = all_content[activity_subject][0]
                 
@@ -1020,7 +1270,7 @@ async def _create_profile_based_learning_plan_async(
         activities.sort(key=lambda x: (x.day, x.order))
         
         # Create the final learning plan
-        period_name = period.value.replace('_', ' ').title()
+        period_name = period.display_name
         learning_plan = LearningPlan(
             id=str(uuid.uuid4()),
             student_id=user.id,
@@ -1056,8 +1306,7 @@ async def _create_profile_based_learning_plan_async(
             current_step="Saving plan"
         )
         
-        # Get learning plan service and save the plan
-        learning_plan_service = await get_learning_plan_service()
+        # Save the plan
         success = await learning_plan_service.create_learning_plan(learning_plan)
         
         if not success:
@@ -1127,7 +1376,7 @@ async def get_learning_plan(
             )
         
         # Return the plan
-        return plan.dict()
+        return ORJSONResponse(plan.dict())
         
     except HTTPException:
         raise
@@ -1321,7 +1570,7 @@ async def update_learning_plan(
             )
         
         # Return the updated plan
-        return updated_plan.dict()
+        return ORJSONResponse(updated_plan.dict())
         
     except Exception as e:
         return JSONResponse(
@@ -1377,7 +1626,7 @@ async def export_learning_plan(
         # Format as requested
         if format.lower() == "json":
             # Return the plan as JSON
-            return plan.dict()
+            return ORJSONResponse(plan.dict())
         elif format.lower() == "html":
             # Generate HTML representation
             html_content = await learning_plan_service.generate_html_export(plan)
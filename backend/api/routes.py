@@ -5,7 +5,7 @@ from typing import List, Optional
 from models.user import User
 from models.content import Content
 from models.learning_plan import LearningPlan
-from auth.authentication import get_current_user
+from auth.current_user import get_current_user
 from api.endpoints import (
     get_user_endpoint,
     get_content_endpoint,
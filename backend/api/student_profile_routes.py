@@ -7,13 +7,13 @@ import traceback
 import uuid
 from datetime import datetime
 
-from auth.entra_auth import get_current_user
+from auth.current_user import get_current_user
 from utils.student_profile_manager import get_student_profile_manager
-from config.settings import Settings
+from config.settings import get_settings
 from services.search_service import get_search_service
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Configure logger
 logger = logging.getLogger(__name__)
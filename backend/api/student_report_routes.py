@@ -12,15 +12,15 @@ import traceback
 import re
 
 from models.student_report import StudentReport, ReportType
-from auth.entra_auth import get_current_user
+from auth.current_user import get_current_user
 from utils.report_processor import get_report_processor
 from utils.student_profile_manager import get_student_profile_manager
 from utils.filename_utils import extract_student_name_from_filename
-from config.settings import Settings
+from config.settings import get_settings
 from services.search_service import get_search_service
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Configure logger
 logger = logging.getLogger(__name__)
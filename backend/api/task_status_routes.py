@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Path, status
 from typing import Dict, List, Any, Optional
 import logging
 
-from auth.entra_auth import get_current_user
+from auth.current_user import get_current_user
 from utils import task_status_tracker
 
 # Setup logger
@@ -2,7 +2,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import Dict, Any, List
 
-from auth.authentication import get_current_user
+from auth.current_user import get_current_user
 
 # Create router
 router = APIRouter(prefix="/users", tags=["users"])
@@ -1,12 +1,13 @@
 # backend/app.py
 from fastapi import FastAPI, Depends, HTTPException, status, APIRouter
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional, Dict, Any
 import logging
 import os
 
 # Import settings
-from config.settings import Settings
-settings = Settings()
+from config.settings import get_settings
+settings = get_settings()
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +18,7 @@ app = FastAPI(
     title="Personalized Learning Co-pilot API",
     description="API for the Personalized Learning Co-pilot with Entra ID Authentication",
     version="0.2.0",
+    default_response_class=ORJSONResponse,  # orjson serializes large payloads much faster than stdlib json
 )
 
 # Add direct CORS middleware to handle all responses including errors
@@ -73,6 +75,10 @@ except ImportError:
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup."""
+    # Initialize response cache (Redis if configured, in-memory otherwise)
+    from utils.response_cache import init_response_cache
+    await init_response_cache()
+    
     # Initialize Azure LangChain integration if available
     try:
         from rag.azure_langchain_integration import get_azure_langchain
@@ -81,13 +87,9 @@ async def startup_event():
     except Exception as e:
         logger.warning(f"Could not initialize Azure LangChain integration: {e}")
     
-    # Initialize LangChain service if available
-    try:
-        from services.azure_langchain_service import get_azure_langchain_service
-        langchain_service = await get_azure_langchain_service()
-        logger.info("Azure LangChain service initialized")
-    except Exception as e:
-        logger.warning(f"Could not initialize Azure LangChain service: {e}")
+    # Create service singletons used by the routes and keep them on app.state
+    from api.dependencies import prefetch_services
+    await prefetch_services(app)
     
     # Initialize Learning Plan service
     try:
@@ -107,6 +109,12 @@ async def startup_event():
     logger.info(f"Client ID: {settings.CLIENT_ID}")
     logger.info(f"Tenant ID: {settings.TENANT_ID}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release shared resources on shutdown."""
+    from utils.http_client import close_http_session
+    await close_http_session()
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(learning_plan_router)
@@ -8,11 +8,11 @@ import logging
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 
-from config.settings import Settings
-from auth.entra_auth import get_current_user as entra_get_current_user
+from config.settings import get_settings
+from auth.current_user import get_current_user
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -30,9 +30,6 @@ app = ConfidentialClientApplication(
     authority=f"https://login.microsoftonline.com/{settings.TENANT_ID}"
 )
 
-# Use Entra ID authentication only
-get_current_user = entra_get_current_user
-
 async def get_ms_login_url(redirect_uri):
     """Generate Microsoft login URL."""
     if app is None:
@@ -1,13 +1,13 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from typing import List, Optional, Dict, Any, Callable
 from enum import Enum
 import logging
 from jose import jwt, JWTError
 from models.user import User
 from auth.authentication import get_current_user, verify_microsoft_token
-from config.settings import Settings
+from config.settings import get_settings
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 # Configure logger
 logger = logging.getLogger(__name__)
 class Role(str, Enum):
@@ -33,6 +33,9 @@ MS_APP_ROLE_MAPPING = {
     "Teacher": Role.TEACHER,
     "Administrator": Role.ADMIN,
 }
+async def get_authorization_header(request: Request) -> Optional[str]:
+    """Get the Authorization header (async, so FastAPI runs it on the event loop)."""
+    return request.headers.get("Authorization")
 async def get_user_role_from_token(token: str) -> Role:
     """Extract user role from Microsoft token."""
     try:
@@ -82,7 +85,7 @@ def require_permission(required_permission: Permission):
     """
     async def permission_dependency(
         current_user: User = Depends(get_current_user),
-        authorization: str = Depends(lambda x: x.headers.get("Authorization"))
+        authorization: Optional[str] = Depends(get_authorization_header)
     ):
         # Extract token from Authorization header
         if not authorization or not authorization.startswith("Bearer "):
@@ -145,7 +148,7 @@ def require_resource_owner(get_owner_id: Callable, admin_override: bool = True):
     """
     async def ownership_dependency(
         current_user: User = Depends(get_current_user),
-        authorization: str = Depends(lambda x: x.headers.get("Authorization"))
+        authorization: Optional[str] = Depends(get_authorization_header)
     ):
         # Extract token from Authorization header
         if not authorization or not authorization.startswith("Bearer "):
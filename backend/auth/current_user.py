@@ -0,0 +1,117 @@
+# backend/auth/current_user.py
+"""
+Current user dependency shared by all routers.
+
+Every router (and the authorization middleware) should import
+`get_current_user` from this module. FastAPI caches dependency results per
+request keyed by the callable, so a single callable means the token is
+validated and the user profile looked up only once per request.
+"""
+from fastapi import Depends, HTTPException, Request, status
+from typing import Callable, Dict, Any, FrozenSet, Optional
+
+from auth.entra_auth import oauth2_scheme, get_user_from_token
+from models.user import User, LearningStyle
+
+
+async def get_current_user(request: Request, token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
+    """
+    Get the current user for this request.
+    
+    The resolved user is stored on `request.state`, so a user already
+    resolved by the authorization middleware is reused by the route.
+    
+    Args:
+        request: The incoming request
+        token: The access token
+        
+    Returns:
+        User information
+        
+    Raises:
+        HTTPException: If the token is invalid
+    """
+    current_user = getattr(request.state, "current_user", None)
+    if current_user is None:
+        current_user = await get_user_from_token(token)
+        request.state.current_user = current_user
+    return current_user
+
+
+def _build_user_model(current_user: Dict[str, Any]) -> User:
+    """
+    Build a `User` model from a resolved user dict without re-running validation.
+    
+    The dict comes from our own token validation and profile lookup, so only
+    the fields that may arrive un-coerced from Azure Search are converted.
+    """
+    grade_level = current_user.get("grade_level")
+    learning_style = current_user.get("learning_style")
+    return User.construct(**{
+        **current_user,
+        "grade_level": int(grade_level) if grade_level not in (None, "") else None,
+        "learning_style": LearningStyle(learning_style) if learning_style else None,
+        "subjects_of_interest": current_user.get("subjects_of_interest") or [],
+    })
+
+
+async def get_current_user_model(
+    request: Request,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+) -> User:
+    """
+    Get the current user for this request as a `User` model.
+    
+    The model is built once per request and stored on `request.state`.
+    
+    Args:
+        request: The incoming request
+        current_user: Current user information
+        
+    Returns:
+        The current user
+    """
+    user: Optional[User] = getattr(request.state, "current_user_model", None)
+    if user is None:
+        user = _build_user_model(current_user)
+        request.state.current_user_model = user
+    return user
+
+
+def require_role(role: str) -> Callable:
+    """
+    Create a dependency that returns the current user if they have a role.
+    
+    The user's roles are collected into a frozenset once per request and
+    stored on `request.state`, so several role checks share it.
+    
+    Args:
+        role: The required role, e.g. "admin"
+        
+    Returns:
+        Dependency returning the current user information
+        
+    Raises:
+        HTTPException: 403 if the user does not have the role
+    """
+    async def role_dependency(
+        request: Request,
+        current_user: Dict[str, Any] = Depends(get_current_user)
+    ) -> Dict[str, Any]:
+        roles: Optional[FrozenSet[str]] = getattr(request.state, "current_user_roles", None)
+        if roles is None:
+            roles = frozenset(current_user.get("roles") or ())
+            request.state.current_user_roles = roles
+        if role not in roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Only {role} users can access this resource"
+            )
+        return current_user
+    
+    role_dependency.__name__ = f"require_{role}_role"
+    return role_dependency
+
+
+# Current user dependency for admin-only routes
+require_admin_role = require_role("admin")
@@ -1,18 +1,18 @@
 # backend/auth/entra_auth.py
-from fastapi import Depends, HTTPException, status, Request
+from fastapi import HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
 from msal import ConfidentialClientApplication
 import jwt
 import logging
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
-import aiohttp
 import json
 
-from config.settings import Settings
+from config.settings import get_settings
+from utils.http_client import get_http_session
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -91,10 +91,13 @@ async def validate_token(token: str) -> Dict[str, Any]:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
+async def get_user_from_token(token: str) -> Dict[str, Any]:
     """
     Get current user information from token.
     
+    Routes should depend on `auth.current_user.get_current_user`, which
+    resolves the user once per request using this function.
+    
     Args:
         token: The access token
         
@@ -151,28 +154,28 @@ async def get_user_profile(user_id: str) -> Optional[Dict[str, Any]]:
         }
         
         # Execute search
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                search_url,
-                json=search_body,
-                headers={
-                    "Content-Type": "application/json",
-                    "api-key": settings.AZURE_SEARCH_KEY
-                }
-            ) as response:
-                if response.status != 200:
-                    logger.error(f"Azure Search error: {response.status} - {await response.text()}")
-                    return None
-                
-                # Parse response
-                result = await response.json()
-                
-                # Extract user profile
-                if "value" in result and len(result["value"]) > 0:
-                    return result["value"][0]
-                
+        session = await get_http_session()
+        async with session.post(
+            search_url,
+            json=search_body,
+            headers={
+                "Content-Type": "application/json",
+                "api-key": settings.AZURE_SEARCH_KEY
+            }
+        ) as response:
+            if response.status != 200:
+                logger.error(f"Azure Search error: {response.status} - {await response.text()}")
                 return None
-                
+            
+            # Parse response
+            result = await response.json()
+            
+            # Extract user profile
+            if "value" in result and len(result["value"]) > 0:
+                return result["value"][0]
+            
+            return None
+            
     except Exception as e:
         logger.error(f"Error getting user profile: {e}")
         return None
@@ -216,31 +219,31 @@ async def create_or_update_user_profile(user_info: Dict[str, Any]) -> bool:
         }
         
         # Execute request
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                index_url,
-                json=request_body,
-                headers={
-                    "Content-Type": "application/json",
-                    "api-key": settings.AZURE_SEARCH_KEY
-                }
-            ) as response:
-                if response.status != 200 and response.status != 201:
-                    logger.error(f"Azure Search error: {response.status} - {await response.text()}")
-                    return False
-                
-                # Parse response
-                result = await response.json()
-                
-                # Check for errors
-                if "value" in result:
-                    for item in result["value"]:
-                        if not item.get("status", False):
-                            logger.error(f"Error creating/updating user profile: {item.get('errorMessage')}")
-                            return False
-                
-                return True
-                
+        session = await get_http_session()
+        async with session.post(
+            index_url,
+            json=request_body,
+            headers={
+                "Content-Type": "application/json",
+                "api-key": settings.AZURE_SEARCH_KEY
+            }
+        ) as response:
+            if response.status != 200 and response.status != 201:
+                logger.error(f"Azure Search error: {response.status} - {await response.text()}")
+                return False
+            
+            # Parse response
+            result = await response.json()
+            
+            # Check for errors
+            if "value" in result:
+                for item in result["value"]:
+                    if not item.get("status", False):
+                        logger.error(f"Error creating/updating user profile: {item.get('errorMessage')}")
+                        return False
+            
+            return True
+            
     except Exception as e:
         logger.error(f"Error creating/updating user profile: {e}")
         return False
@@ -1,5 +1,6 @@
 # backend/config/settings.py
 from pydantic import BaseSettings
+from functools import lru_cache
 import os
 from typing import List, Optional, Any, Dict
 import logging
@@ -116,6 +117,9 @@ class Settings(BaseSettings):
         # Remove duplicates and empty strings
         return list(set([origin for origin in default_origins if origin]))
     
+    # Redis cache (optional - in-process caches are used when not configured)
+    REDIS_URL: str = os.getenv("REDIS_URL", "")
+    
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     
@@ -127,5 +131,15 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = True
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Get the shared settings instance.
+    
+    Environment variables are parsed once per process; use this (or
+    `Depends(get_settings)` in routes) instead of constructing `Settings()`.
+    """
+    return Settings()
+
 # Create settings instance
-settings = Settings()
\ No newline at end of file
+settings = get_settings()
\ No newline at end of file
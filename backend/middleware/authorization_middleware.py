@@ -7,7 +7,7 @@ for specific resource types (student reports, profiles, learning plans).
 from typing import List, Dict, Any, Optional, Callable
 from fastapi import Request, Response, HTTPException, status
 from starlette.middleware.base import BaseHTTPMiddleware
-from auth.authentication import get_current_user
+from auth.current_user import get_current_user
 import re
 import logging
 import json
@@ -99,7 +99,7 @@ class ResourceAuthorizationMiddleware(BaseHTTPMiddleware):
             
         try:
             # Get current user from token
-            current_user = await get_current_user(token)
+            current_user = await get_current_user(request, token)
             
             # Check resource ownership
             resource_type = self._get_resource_type(request.url.path)
@@ -39,6 +39,7 @@ def setup_cors(app: FastAPI, allowed_origins: List[str] = None):
         allow_credentials=True,
         allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],  # Next page cursor for paginated lists
         max_age=86400,  # 24 hours for preflight caching
     )
     
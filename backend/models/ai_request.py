@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from typing import Optional
+# AI learning plan request
+class AILearningPlanRequest(BaseModel):
+    subject: str
+# AI question request
+class AskRequest(BaseModel):
+    question: str
+    subject: Optional[str] = None
+# AI content search request
+class SearchRequest(BaseModel):
+    query: str
+    subject: Optional[str] = None
+    content_type: Optional[str] = None
+    limit: int = 10
@@ -21,17 +21,40 @@ class LearningPeriod(str, Enum):
     @staticmethod
     def to_days(period) -> int:
         """Convert learning period to approximate number of days."""
-        if period == LearningPeriod.ONE_WEEK:
-            return 7
-        elif period == LearningPeriod.TWO_WEEKS:
-            return 14
-        elif period == LearningPeriod.ONE_MONTH:
-            return 30
-        elif period == LearningPeriod.TWO_MONTHS:
-            return 60
-        elif period == LearningPeriod.SCHOOL_TERM:
-            return 90  # Approximately 3 months for a school term
-        return 30  # Default to one month
+        return _PERIOD_DAYS.get(period, 30)  # Default to one month
+    
+    @property
+    def days(self) -> int:
+        """Approximate number of days in the period."""
+        return _PERIOD_DAYS[self]
+    
+    @property
+    def weeks(self) -> int:
+        """Number of weeks needed to cover the period, counting a partial week."""
+        return _PERIOD_WEEKS[self]
+    
+    @property
+    def label(self) -> str:
+        """Period name for use in text, e.g. "one month"."""
+        return _PERIOD_LABELS[self]
+    
+    @property
+    def display_name(self) -> str:
+        """Period name for use in titles, e.g. "One Month"."""
+        return _PERIOD_DISPLAY_NAMES[self]
+
+# Per-period values, computed once
+_PERIOD_DAYS = {
+    LearningPeriod.ONE_WEEK: 7,
+    LearningPeriod.TWO_WEEKS: 14,
+    LearningPeriod.ONE_MONTH: 30,
+    LearningPeriod.TWO_MONTHS: 60,
+    LearningPeriod.SCHOOL_TERM: 90,  # Approximately 3 months for a school term
+}
+_PERIOD_WEEKS = {period: (days + 6) // 7 for period, days in _PERIOD_DAYS.items()}
+_PERIOD_LABELS = {period: period.value.replace('_', ' ') for period in LearningPeriod}
+_PERIOD_DISPLAY_NAMES = {period: label.title() for period, label in _PERIOD_LABELS.items()}
+
 # Learning Activity model
 class LearningActivity(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -0,0 +1,33 @@
+from pydantic import BaseModel, Field, validator
+from typing import List, Optional
+# Student profile sent to the direct-index endpoints; missing fields get test defaults
+class ProfileIndexRequest(BaseModel):
+    id: Optional[str] = None
+    full_name: Optional[str] = None
+    gender: Optional[str] = None
+    grade_level: Optional[int] = None
+    learning_style: Optional[str] = None
+    strengths: Optional[List[str]] = None
+    interests: Optional[List[str]] = None
+    areas_for_improvement: Optional[List[str]] = None
+    school_name: Optional[str] = None
+    teacher_name: Optional[str] = None
+    report_ids: Optional[List[str]] = None
+    current_school_year: Optional[str] = None
+    current_term: Optional[str] = None
+    years_and_terms: Optional[List[str]] = None
+    created_at: Optional[str] = None
+    last_report_date: Optional[str] = None
+    historical_data: Optional[str] = None
+    owner_id: Optional[str] = None
+    # Embedding returned by an earlier index call, with its fingerprint
+    embedding: Optional[List[float]] = None
+    fingerprint: Optional[str] = Field(None, alias="_fingerprint")
+    class Config:
+        # Unknown fields are dropped rather than rejected
+        extra = "ignore"
+        allow_population_by_field_name = True
+    # Forms send an unselected grade as an empty string
+    @validator("grade_level", pre=True)
+    def empty_grade_level_as_missing(cls, value):
+        return None if value == "" else value
@@ -7,8 +7,9 @@ Azure OpenAI and Azure AI Search services.
 
 import logging
 import os
+import json
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 
 # LangChain imports
 from langchain_openai import AzureChatOpenAI, AzureOpenAIEmbeddings
@@ -25,10 +26,10 @@ from azure.core.credentials import AzureKeyCredential
 from azure.search.documents.aio import SearchClient
 
 # Internal imports
-from config.settings import Settings
+from config.settings import get_settings
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -353,6 +354,126 @@ class AzureLangChainIntegration:
             logger.error(f"Error in similarity search: {e}")
             return []
     
+    def _create_learning_plan_chain(
+        self,
+        student_profile: Dict[str, Any],
+        subject: str,
+        available_content: List[Dict[str, Any]]
+    ):
+        """
+        Build the learning plan generation chain and its inputs.
+        
+        Args:
+            student_profile: Student information
+            subject: Subject for the learning plan
+            available_content: Available content resources
+            
+        Returns:
+            Tuple of (chain, chain inputs)
+        """
+        # Format content resources
+        formatted_content = "\n\n".join([
+            f"Resource {i+1}:\n"
+            f"Title: {content.get('title', 'Untitled')}\n"
+            f"ID: {content.get('id', f'resource_{i}')}\n"
+            f"Type: {content.get('content_type', 'unknown')}\n"
+            f"Description: {content.get('description', 'No description')}"
+            for i, content in enumerate(available_content[:10])  # Limit to 10 resources
+        ])
+        
+        # Format student profile
+        formatted_profile = (
+            f"Student Grade Level: {student_profile.get('grade_level', 'Unknown')}\n"
+            f"Learning Style: {student_profile.get('learning_style', 'Mixed')}\n"
+            f"Interests: {', '.join(student_profile.get('subjects_of_interest', []))}"
+        )
+        
+        # Create prompt template for learning plan generation
+        prompt = PromptTemplate.from_template(
+            """
+            You are an expert educational planner. Create a personalized learning plan for a student with
+            the following profile:
+            {student_profile}
+            
+            The plan should focus on the subject: {subject}
+            
+            Available educational resources:
+            {resources}
+            
+            Create a comprehensive learning plan that includes:
+            1. An appropriate title
+            2. A brief description
+            3. 4-6 learning activities that use the available resources
+            4. Each activity should:
+               - Have a title and description
+               - Reference a specific resource ID where applicable
+               - Specify an estimated duration in minutes
+               - Be in a logical sequence
+            
+            Format your response as JSON with the following structure:
+            {{
+                "title": "Learning Plan Title",
+                "description": "Brief description of the learning plan",
+                "subject": "{subject}",
+                "topics": ["topic1", "topic2"...],
+                "activities": [
+                    {{
+                        "title": "Activity Title",
+                        "description": "Activity description",
+                        "content_id": "resource_id or null",
+                        "duration_minutes": estimated_minutes,
+                        "order": sequence_number
+                    }},
+                    ...
+                ]
+            }}
+            
+            Return ONLY the JSON with no additional text.
+            """
+        )
+        
+        # Run the prompt through the language model
+        chain = prompt | self.llm | StrOutputParser()
+        inputs = {
+            "student_profile": formatted_profile,
+            "subject": subject,
+            "resources": formatted_content
+        }
+        
+        return chain, inputs
+    
+    def parse_learning_plan(self, result: str, subject: str) -> Dict[str, Any]:
+        """
+        Parse the raw LLM output of the learning plan chain.
+        
+        Args:
+            result: Raw text returned by the language model
+            subject: Subject for the learning plan
+            
+        Returns:
+            Learning plan dictionary
+        """
+        try:
+            # Clean up the response to ensure it's valid JSON
+            json_start = result.find("{")
+            json_end = result.rfind("}")
+            if json_start >= 0 and json_end > json_start:
+                clean_json = result[json_start:json_end+1]
+                return json.loads(clean_json)
+            return json.loads(result)
+            
+        except json.JSONDecodeError:
+            logger.error(f"Error parsing learning plan JSON: {result}")
+            # Return a basic plan with the raw response
+            return {
+                "title": f"{subject} Learning Plan",
+                "description": f"A learning plan for {subject}",
+                "subject": subject,
+                "topics": [subject],
+                "raw_response": result,
+                "activities": []
+            }
+    
     async def generate_learning_plan_with_rag(
         self,
         student_profile: Dict[str, Any],
@@ -374,102 +495,9 @@ class AzureLangChainIntegration:
             await self.initialize()
             
         try:
-            # Format content resources
-            formatted_content = "\n\n".join([
-                f"Resource {i+1}:\n"
-                f"Title: {content.get('title', 'Untitled')}\n"
-                f"ID: {content.get('id', f'resource_{i}')}\n"
-                f"Type: {content.get('content_type', 'unknown')}\n"
-                f"Description: {content.get('description', 'No description')}"
-                for i, content in enumerate(available_content[:10])  # Limit to 10 resources
-            ])
-            
-            # Format student profile
-            formatted_profile = (
-                f"Student Grade Level: {student_profile.get('grade_level', 'Unknown')}\n"
-                f"Learning Style: {student_profile.get('learning_style', 'Mixed')}\n"
-                f"Interests: {', '.join(student_profile.get('subjects_of_interest', []))}"
-            )
-            
-            # Create prompt template for learning plan generation
-            prompt = PromptTemplate.from_template(
-                """
-                You are an expert educational planner. Create a personalized learning plan for a student with
-                the following profile:
-                {student_profile}
-                
-                The plan should focus on the subject: {subject}
-                
-                Available educational resources:
-                {resources}
-                
-                Create a comprehensive learning plan that includes:
-                1. An appropriate title
-                2. A brief description
-                3. 4-6 learning activities that use the available resources
-                4. Each activity should:
-                   - Have a title and description
-                   - Reference a specific resource ID where applicable
-                   - Specify an estimated duration in minutes
-                   - Be in a logical sequence
-                
-                Format your response as JSON with the following structure:
-                {{
-                    "title": "Learning Plan Title",
-                    "description": "Brief description of the learning plan",
-                    "subject": "{subject}",
-                    "topics": ["topic1", "topic2"...],
-                    "activities": [
-                        {{
-                            "title": "Activity Title",
-                            "description": "Activity description",
-                            "content_id": "resource_id or null",
-                            "duration_minutes": estimated_minutes,
-                            "order": sequence_number
-                        }},
-                        ...
-                    ]
-                }}
-                
-                Return ONLY the JSON with no additional text.
-                """
-            )
-            
-            # Run the prompt through the language model
-            chain = prompt | self.llm | StrOutputParser()
-            
-            result = await chain.ainvoke({
-                "student_profile": formatted_profile,
-                "subject": subject,
-                "resources": formatted_content
-            })
-            
-            # Parse the JSON result
-            import json
-            
-            try:
-                # Clean up the response to ensure it's valid JSON
-                json_start = result.find("{")
-                json_end = result.rfind("}")
-                if json_start >= 0 and json_end > json_start:
-                    clean_json = result[json_start:json_end+1]
-                    learning_plan = json.loads(clean_json)
-                else:
-                    learning_plan = json.loads(result)
-                    
-                return learning_plan
-                
-            except json.JSONDecodeError:
-                logger.error(f"Error parsing learning plan JSON: {result}")
-                # Return a basic plan with the raw response
-                return {
-                    "title": f"{subject} Learning Plan",
-                    "description": f"A learning plan for {subject}",
-                    "subject": subject,
-                    "topics": [subject],
-                    "raw_response": result,
-                    "activities": []
-                }
+            chain, inputs = self._create_learning_plan_chain(student_profile, subject, available_content)
+            result = await chain.ainvoke(inputs)
+            return self.parse_learning_plan(result, subject)
             
         except Exception as e:
             logger.error(f"Error generating learning plan: {e}")
@@ -479,6 +507,31 @@ class AzureLangChainIntegration:
                 "subject": subject,
                 "activities": []
             }
+    
+    async def stream_learning_plan_with_rag(
+        self,
+        student_profile: Dict[str, Any],
+        subject: str,
+        available_content: List[Dict[str, Any]]
+    ) -> AsyncIterator[str]:
+        """
+        Stream the raw LLM output for a personalized learning plan as it is generated.
+        
+        Args:
+            student_profile: Student information
+            subject: Subject for the learning plan
+            available_content: Available content resources
+            
+        Yields:
+            Text chunks of the JSON learning plan; use `parse_learning_plan`
+            on the concatenated output to get the plan dictionary
+        """
+        if not self.initialized:
+            await self.initialize()
+            
+        chain, inputs = self._create_learning_plan_chain(student_profile, subject, available_content)
+        async for chunk in chain.astream(inputs):
+            yield chunk
 
 # Singleton instance
 azure_langchain = None
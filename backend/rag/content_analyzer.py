@@ -4,10 +4,10 @@ from azure.ai.textanalytics import TextAnalyticsClient, ExtractSummaryAction
 from azure.core.credentials import AzureKeyCredential
 import json
 from models.content import Content
-from config.settings import Settings
+from config.settings import get_settings
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -2,10 +2,10 @@
 import logging
 from typing import List, Dict, Any, Optional
 from openai import OpenAI, AzureOpenAI
-from config.settings import Settings
+from config.settings import get_settings
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -26,10 +26,10 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -168,6 +168,26 @@ class LangChainManager:
             # Return an empty embedding of the correct dimension
             return [0.0] * 1536  # Default dimension for text-embedding-ada-002
     
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for several texts in one embedding model call.
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            List of embeddings in the same order as the texts, or an empty list on error
+        """
+        if not self.embeddings:
+            self.initialize()
+            
+        try:
+            return await self.embeddings.aembed_documents(texts)
+            
+        except Exception as e:
+            logger.error(f"Error generating embeddings for {len(texts)} texts: {e}")
+            return []
+    
     async def generate_rag_response(
         self,
         query: str,
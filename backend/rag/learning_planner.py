@@ -7,11 +7,11 @@ from models.user import User
 from models.content import Content
 from models.learning_plan import LearningPlan, LearningActivity, ActivityStatus
 from rag.retriever import retrieve_relevant_content
-from config.settings import Settings
+from config.settings import get_settings
 from rag.openai_adapter import get_openai_adapter
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Initialize logger
 logger = logging.getLogger(__name__)
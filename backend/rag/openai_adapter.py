@@ -1,7 +1,9 @@
 # backend/rag/openai_adapter.py
+import base64
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 import os
+import struct
 import sys
 
 # Fix import paths by adding the project root to sys.path
@@ -11,19 +13,35 @@ project_root = os.path.dirname(backend_dir)
 sys.path.insert(0, project_root)  # Add project root to path
 
 # Now use absolute imports
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
+# The app imports the backend directory's modules directly; scripts import them through
+# the backend package. Use whichever layout is loaded so the shared client stays a singleton.
+try:
+    from utils.http_client import get_httpx_client
+except ImportError:
+    from backend.utils.http_client import get_httpx_client
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+# Request timeout for Azure OpenAI calls; matches the SDK default of 10 minutes
+OPENAI_TIMEOUT_SECONDS = 600.0
+
 try:
-    from openai import OpenAI, AzureOpenAI
+    from openai import AsyncAzureOpenAI
 except ImportError:
     logger.warning("OpenAI package not installed. Please run: pip install openai>=1.0.0")
 
+def _decode_embedding(embedding: Union[str, List[float]]) -> List[float]:
+    """Decode an embedding requested with encoding_format="base64" (packed little-endian float32)."""
+    if isinstance(embedding, str):
+        packed = base64.b64decode(embedding)
+        return list(struct.unpack(f"<{len(packed) // 4}f", packed))
+    return embedding
+
 class OpenAIAdapter:
     """
     Adapter class for Azure OpenAI API using the v1.x OpenAI package.
@@ -36,19 +54,15 @@ class OpenAIAdapter:
         api_base = settings.get_openai_endpoint()
         api_version = settings.AZURE_OPENAI_API_VERSION
 
-        # Initialize the appropriate client based on the API type
-        if hasattr(settings, 'OPENAI_API_TYPE') and settings.OPENAI_API_TYPE == "azure":
-            self.client = AzureOpenAI(
-                api_key=api_key,
-                api_version=api_version,
-                azure_endpoint=api_base
-            )
-        else:
-            self.client = AzureOpenAI(
-                api_key=api_key,
-                api_version=api_version,
-                azure_endpoint=api_base
-            )
+        # Async client on the shared connection pool, so calls don't block the event loop
+        self.client = AsyncAzureOpenAI(
+            api_key=api_key,
+            api_version=api_version,
+            azure_endpoint=api_base,
+            http_client=get_httpx_client(),
+            # Long learning plans can take minutes to generate
+            timeout=OPENAI_TIMEOUT_SECONDS
+        )
     
     async def create_chat_completion(
         self,
@@ -86,7 +100,7 @@ class OpenAIAdapter:
                 params["response_format"] = response_format
                 
             # Make the API call
-            response = self.client.chat.completions.create(**params)
+            response = await self.client.chat.completions.create(**params)
             
             # Convert response to dictionary format for backward compatibility
             # This allows existing code to continue working without major changes
@@ -132,17 +146,52 @@ class OpenAIAdapter:
         """
         try:
             # Make the API call
-            response = self.client.embeddings.create(
+            # base64 sends the vector as packed float32 instead of JSON numbers
+            response = await self.client.embeddings.create(
                 model=model,  # Use the deployment name 
-                input=text
+                input=text,
+                encoding_format="base64"
             )
             
             # Extract the embedding and return as a flat list
-            return response.data[0].embedding
+            return _decode_embedding(response.data[0].embedding)
                 
         except Exception as e:
             logger.error(f"Error creating embedding: {e}")
             raise
+    
+    async def create_embeddings(
+        self,
+        model: str,
+        texts: List[str]
+    ) -> List[List[float]]:
+        """
+        Create embeddings for several texts in a single Azure OpenAI call.
+        Args:
+            model: The deployment name in Azure OpenAI
+            texts: Texts to embed
+        Returns:
+            List of embeddings, in the same order as the texts
+        """
+        if not texts:
+            return []
+        try:
+            # Make the API call
+            response = await self.client.embeddings.create(
+                model=model,  # Use the deployment name
+                input=texts,
+                encoding_format="base64"
+            )
+            
+            # Results carry the index of their input text
+            return [
+                _decode_embedding(item.embedding)
+                for item in sorted(response.data, key=lambda item: item.index)
+            ]
+                
+        except Exception as e:
+            logger.error(f"Error creating embeddings: {e}")
+            raise
 
 # Singleton instance
 openai_adapter = None
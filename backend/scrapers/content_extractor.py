@@ -23,10 +23,10 @@ try:
     
     # Import models and settings
     from models.content import Content, ContentType, DifficultyLevel
-    from config.settings import Settings
+    from config.settings import get_settings
     
     # Initialize settings
-    settings = Settings()
+    settings = get_settings()
 except ImportError:
     # Fallback ContentType enum for testing
     class ContentType:
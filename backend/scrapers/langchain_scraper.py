@@ -31,10 +31,10 @@ from playwright.async_api import async_playwright, Page, Browser
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import settings
-from config.settings import Settings
+from config.settings import get_settings
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Configure logging
 logging.basicConfig(
@@ -17,7 +17,7 @@ sys.path.insert(0, project_root)  # Add project root first
 
 # Now we can properly import from the backend package
 from backend.utils.vector_store import get_vector_store
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.rag.openai_adapter import get_openai_adapter
 from backend.scrapers.edu_resource_indexer import run_indexer
 from backend.scrapers.content_extractor import run_extractor
@@ -44,7 +44,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 class EnhancedScraperManager:
     """Enhanced scraper with Azure OpenAI and Azure Search integration."""
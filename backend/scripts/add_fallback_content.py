@@ -8,6 +8,7 @@ import asyncio
 import sys
 import os
 import logging
+from functools import lru_cache
 from pprint import pprint
 
 # Add the parent directory to the Python path
@@ -182,6 +183,12 @@ FALLBACK_CONTENT = {
 
 def get_fallback_content(subject):
     """Get fallback content for a specific subject or a default if not found."""
+    # The content items are built once per subject and shared; callers get their own list
+    return list(_build_fallback_content(subject))
+
+@lru_cache(maxsize=64)
+def _build_fallback_content(subject):
+    """Build the fallback Content objects for a subject."""
     if subject in FALLBACK_CONTENT:
         content_list = FALLBACK_CONTENT[subject]
     else:
@@ -218,7 +225,7 @@ def get_fallback_content(subject):
         except Exception as e:
             logging.error(f"Error creating fallback content: {e}")
     
-    return contents
+    return tuple(contents)
 
 # Example of usage
 if __name__ == "__main__":
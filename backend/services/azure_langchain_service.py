@@ -4,8 +4,9 @@ Azure LangChain Service for the Personalized Learning Co-pilot.
 This module provides high-level Azure-specific LangChain functionality.
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 import os
 import sys
 import json
@@ -48,6 +49,96 @@ class AzureLangChainService:
                 # Allow service to continue even if initialization fails
                 # Methods will check for self.azure_langchain before use
     
+    def _content_to_dicts(self, relevant_content: List[Content]) -> List[Dict[str, Any]]:
+        """Convert content objects to dictionaries for the prompt."""
+        content_dicts = []
+        for content in relevant_content:
+            try:
+                content_dict = {
+                    "id": content.id,
+                    "title": content.title,
+                    "description": content.description,
+                    "content_type": str(content.content_type),
+                    "difficulty_level": str(content.difficulty_level),
+                    "url": str(content.url)
+                }
+                content_dicts.append(content_dict)
+            except Exception as e:
+                logger.warning(f"Error converting content to dict: {e}")
+        return content_dicts
+    
+    def _student_to_dict(self, student: User) -> Dict[str, Any]:
+        """Convert a student to a dictionary for the prompt."""
+        return {
+            "full_name": student.full_name or student.username,
+            "grade_level": student.grade_level,
+            "learning_style": student.learning_style.value if student.learning_style else "mixed",
+            "subjects_of_interest": student.subjects_of_interest
+        }
+    
+    def _learning_plan_from_dict(
+        self,
+        student: User,
+        subject: str,
+        relevant_content: List[Content],
+        plan_dict: Dict[str, Any]
+    ) -> LearningPlan:
+        """
+        Convert a generated plan dictionary to a LearningPlan object.
+        
+        Args:
+            student: The student
+            subject: Subject for the learning plan
+            relevant_content: List of relevant content
+            plan_dict: Plan dictionary produced by the language model
+            
+        Returns:
+            Learning plan
+        """
+        now = datetime.utcnow()
+        plan_id = plan_dict.get("id", str(uuid.uuid4()))
+        
+        # Process activities
+        activities = []
+        for activity_dict in plan_dict.get("activities", []):
+            activity_id = activity_dict.get("id", str(uuid.uuid4()))
+            content_id = activity_dict.get("content_id")
+            
+            # Validate content_id exists in relevant_content
+            if content_id:
+                if not any(str(content.id) == content_id for content in relevant_content):
+                    content_id = None
+            
+            # Create activity
+            activity = LearningActivity(
+                id=activity_id,
+                title=activity_dict.get("title", "Activity"),
+                description=activity_dict.get("description", "Learn about this topic"),
+                content_id=content_id,
+                duration_minutes=activity_dict.get("duration_minutes", 30),
+                order=activity_dict.get("order", 1),
+                status=ActivityStatus.NOT_STARTED,
+                completed_at=None
+            )
+            activities.append(activity)
+        
+        # Create learning plan
+        return LearningPlan(
+            id=plan_id,
+            student_id=student.id,
+            title=plan_dict.get("title", f"{subject} Learning Plan"),
+            description=plan_dict.get("description", f"A personalized learning plan for {subject}"),
+            subject=subject,
+            topics=plan_dict.get("topics", [subject]),
+            activities=activities,
+            status=ActivityStatus.NOT_STARTED,
+            progress_percentage=0.0,
+            created_at=now,
+            updated_at=now,
+            start_date=now,
+            end_date=now + timedelta(days=14)  # Default to 2 weeks
+        )
+    
     async def generate_personalized_learning_plan(
         self,
         student: User,
@@ -73,88 +164,66 @@ class AzureLangChainService:
                 logger.warning("Azure LangChain not available. Creating simple learning plan instead.")
                 return await self._create_simple_learning_plan(student, subject, relevant_content)
             
-            # Convert content objects to dictionaries for the prompt
-            content_dicts = []
-            for content in relevant_content:
-                try:
-                    content_dict = {
-                        "id": content.id,
-                        "title": content.title,
-                        "description": content.description,
-                        "content_type": str(content.content_type),
-                        "difficulty_level": str(content.difficulty_level),
-                        "url": str(content.url)
-                    }
-                    content_dicts.append(content_dict)
-                except Exception as e:
-                    logger.warning(f"Error converting content to dict: {e}")
-            
-            # Convert student to dictionary
-            student_dict = {
-                "full_name": student.full_name or student.username,
-                "grade_level": student.grade_level,
-                "learning_style": student.learning_style.value if student.learning_style else "mixed",
-                "subjects_of_interest": student.subjects_of_interest
-            }
-            
             # Generate learning plan
             plan_dict = await self.azure_langchain.generate_learning_plan_with_rag(
-                student_profile=student_dict,
+                student_profile=self._student_to_dict(student),
                 subject=subject,
-                available_content=content_dicts
+                available_content=self._content_to_dicts(relevant_content)
             )
             
-            # Convert the plan dict to a LearningPlan object
-            now = datetime.utcnow()
-            plan_id = plan_dict.get("id", str(uuid.uuid4()))
+            return self._learning_plan_from_dict(student, subject, relevant_content, plan_dict)
             
-            # Process activities
-            activities = []
-            for activity_dict in plan_dict.get("activities", []):
-                activity_id = activity_dict.get("id", str(uuid.uuid4()))
-                content_id = activity_dict.get("content_id")
-                
-                # Validate content_id exists in relevant_content
-                if content_id:
-                    if not any(str(content.id) == content_id for content in relevant_content):
-                        content_id = None
-                
-                # Create activity
-                activity = LearningActivity(
-                    id=activity_id,
-                    title=activity_dict.get("title", "Activity"),
-                    description=activity_dict.get("description", "Learn about this topic"),
-                    content_id=content_id,
-                    duration_minutes=activity_dict.get("duration_minutes", 30),
-                    order=activity_dict.get("order", 1),
-                    status=ActivityStatus.NOT_STARTED,
-                    completed_at=None
-                )
-                activities.append(activity)
+        except Exception as e:
+            logger.error(f"Error creating learning plan: {e}", exc_info=True)
+            # Create a simple plan as fallback
+            return await self._create_simple_learning_plan(student, subject, relevant_content)
+    
+    async def stream_personalized_learning_plan(
+        self,
+        student: User,
+        subject: str,
+        relevant_content: List[Content]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a personalized learning plan as the language model generates it.
+        
+        Args:
+            student: The student
+            subject: Subject for the learning plan
+            relevant_content: List of relevant content
             
-            # Create learning plan
-            learning_plan = LearningPlan(
-                id=plan_id,
-                student_id=student.id,
-                title=plan_dict.get("title", f"{subject} Learning Plan"),
-                description=plan_dict.get("description", f"A personalized learning plan for {subject}"),
+        Yields:
+            `{"delta": text}` events with raw model output, followed by a
+            final `{"plan": plan}` event with the parsed learning plan
+        """
+        # Ensure Azure LangChain is initialized
+        await self.initialize()
+        
+        if not self.azure_langchain:
+            logger.warning("Azure LangChain not available. Creating simple learning plan instead.")
+            learning_plan = await self._create_simple_learning_plan(student, subject, relevant_content)
+            yield {"plan": learning_plan.dict()}
+            return
+        
+        chunks = []
+        try:
+            async for chunk in self.azure_langchain.stream_learning_plan_with_rag(
+                student_profile=self._student_to_dict(student),
                 subject=subject,
-                topics=plan_dict.get("topics", [subject]),
-                activities=activities,
-                status=ActivityStatus.NOT_STARTED,
-                progress_percentage=0.0,
-                created_at=now,
-                updated_at=now,
-                start_date=now,
-                end_date=now + timedelta(days=14)  # Default to 2 weeks
-            )
+                available_content=self._content_to_dicts(relevant_content)
+            ):
+                chunks.append(chunk)
+                yield {"delta": chunk}
             
-            return learning_plan
+            plan_dict = self.azure_langchain.parse_learning_plan("".join(chunks), subject)
+            learning_plan = self._learning_plan_from_dict(student, subject, relevant_content, plan_dict)
             
         except Exception as e:
-            logger.error(f"Error creating learning plan: {e}", exc_info=True)
+            logger.error(f"Error streaming learning plan: {e}", exc_info=True)
             # Create a simple plan as fallback
-            return await self._create_simple_learning_plan(student, subject, relevant_content)
+            learning_plan = await self._create_simple_learning_plan(student, subject, relevant_content)
+        
+        yield {"plan": learning_plan.dict()}
     
     async def _create_simple_learning_plan(
         self,
@@ -224,6 +293,43 @@ class AzureLangChainService:
         
         return learning_plan
     
+    def _question_system_prompt(
+        self,
+        student_grade: Optional[int] = None,
+        subject: Optional[str] = None
+    ) -> str:
+        """Create the system prompt for an educational question."""
+        system_prompt = "You are an educational assistant that provides accurate, helpful information."
+        
+        if student_grade:
+            system_prompt += f" The student is in grade {student_grade}, so tailor your response appropriately."
+            
+        if subject:
+            system_prompt += f" The question is about {subject}."
+        
+        return system_prompt
+    
+    async def _get_question_sources(
+        self,
+        question: str,
+        subject: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get the content sources relevant to a question."""
+        # Get vector store for retrieving sources
+        vector_store = await get_vector_store()
+        
+        # Build filter expression
+        filter_expression = None
+        if subject:
+            filter_expression = f"subject eq '{subject}'"
+            
+        # Get relevant sources
+        return await vector_store.vector_search(
+            query_text=question,
+            filter_expression=filter_expression,
+            limit=3
+        )
+    
     async def answer_educational_question(
         self,
         question: str,
@@ -251,34 +357,15 @@ class AzureLangChainService:
                     "sources": []
                 }
             
-            # Create system prompt with context
-            system_prompt = "You are an educational assistant that provides accurate, helpful information."
-            
-            if student_grade:
-                system_prompt += f" The student is in grade {student_grade}, so tailor your response appropriately."
-                
-            if subject:
-                system_prompt += f" The question is about {subject}."
-            
             # Create RAG chain
-            rag_chain = await self.azure_langchain.create_rag_chain(system_prompt)
-            
-            # Generate answer
-            answer = await rag_chain.ainvoke(question)
-            
-            # Get vector store for retrieving sources
-            vector_store = await get_vector_store()
+            rag_chain = await self.azure_langchain.create_rag_chain(
+                self._question_system_prompt(student_grade, subject)
+            )
             
-            # Build filter expression
-            filter_expression = None
-            if subject:
-                filter_expression = f"subject eq '{subject}'"
-                
-            # Get relevant sources
-            sources = await vector_store.vector_search(
-                query_text=question,
-                filter_expression=filter_expression,
-                limit=3
+            # Generate answer and look up sources concurrently
+            answer, sources = await asyncio.gather(
+                rag_chain.ainvoke(question),
+                self._get_question_sources(question, subject)
             )
             
             return {
@@ -293,6 +380,50 @@ class AzureLangChainService:
                 "sources": []
             }
     
+    async def stream_educational_answer(
+        self,
+        question: str,
+        student_grade: Optional[int] = None,
+        subject: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the answer to an educational question as it is generated.
+        
+        Args:
+            question: The question to answer
+            student_grade: Optional grade level for context
+            subject: Optional subject for context
+            
+        Yields:
+            `{"delta": text}` events with answer tokens, followed by a
+            final `{"sources": [...]}` event
+        """
+        # Ensure Azure LangChain is initialized
+        await self.initialize()
+        
+        if not self.azure_langchain:
+            yield {"delta": "I'm sorry, but the AI service is currently unavailable. Please try again later."}
+            yield {"sources": []}
+            return
+        
+        # Create RAG chain
+        rag_chain = await self.azure_langchain.create_rag_chain(
+            self._question_system_prompt(student_grade, subject)
+        )
+        
+        # Look up sources in the background while the answer streams
+        sources_task = asyncio.create_task(self._get_question_sources(question, subject))
+        
+        try:
+            # Stream answer tokens as they are generated
+            async for token in rag_chain.astream(question):
+                yield {"delta": token}
+        except BaseException:
+            sources_task.cancel()
+            raise
+        
+        yield {"sources": await sources_task}
+    
     async def search_educational_content(
         self,
         query: str,
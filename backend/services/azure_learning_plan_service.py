@@ -4,14 +4,14 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 import uuid
 import json
-import aiohttp
 
 from models.user import User
 from models.learning_plan import LearningPlan, LearningActivity, ActivityStatus
-from config.settings import Settings
+from config.settings import get_settings
+from utils.http_client import get_http_session
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -103,150 +103,150 @@ class AzureLearningPlanService:
             }
             
             # Execute search
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    search_url,
-                    json=search_body,
-                    headers={
-                        "Content-Type": "application/json",
-                        "api-key": self.search_key
-                    }
-                ) as response:
-                    if response.status != 200:
-                        logger.error(f"Azure Search error: {response.status} - {await response.text()}")
-                        return []
-                    
-                    # Parse response
-                    result = await response.json()
-                    
-                    # Convert to LearningPlan objects
-                    plans = []
-                    for item in result.get("value", []):
-                        try:
-                            # Get activities from the complex type collection
-                            activities = []
+            session = await get_http_session()
+            async with session.post(
+                search_url,
+                json=search_body,
+                headers={
+                    "Content-Type": "application/json",
+                    "api-key": self.search_key
+                }
+            ) as response:
+                if response.status != 200:
+                    logger.error(f"Azure Search error: {response.status} - {await response.text()}")
+                    return []
+                
+                # Parse response
+                result = await response.json()
+                
+                # Convert to LearningPlan objects
+                plans = []
+                for item in result.get("value", []):
+                    try:
+                        # Get activities from the complex type collection
+                        activities = []
+                        
+                        # Process activities collection directly from Azure Search response
+                        if "activities" in item and isinstance(item["activities"], list):
+                            logger.info(f"Found {len(item['activities'])} activities in complex type collection")
                             
-                            # Process activities collection directly from Azure Search response
-                            if "activities" in item and isinstance(item["activities"], list):
-                                logger.info(f"Found {len(item['activities'])} activities in complex type collection")
-                                
-                                # Convert to LearningActivity objects
-                                for activity_obj in item["activities"]:
-                                    try:
-                                        # Create a LearningActivity with fields from the complex type
-                                        # Add default values for fields not in the schema
-                                        activity = LearningActivity(
-                                            id=activity_obj.get("id", str(uuid.uuid4())),
-                                            title=activity_obj.get("title", "Activity"),
-                                            description=activity_obj.get("description", ""),
-                                            content_id=activity_obj.get("content_id"),
-                                            content_url="",  # Not in schema but needed
-                                            duration_minutes=activity_obj.get("duration_minutes", 30),
-                                            order=activity_obj.get("order", 1),
-                                            day=1,  # Default day since not in schema
-                                            status=ActivityStatus(activity_obj.get("status", "not_started")),
-                                            completed_at=activity_obj.get("completed_at"),
-                                            learning_benefit="",  # Not in schema
-                                            metadata={}  # Not in schema
-                                        )
-                                        activities.append(activity)
-                                    except Exception as activity_error:
-                                        logger.error(f"Error creating activity: {activity_error}")
-                            else:
-                                logger.warning("No activities field found in the learning plan")
-                                
-                            # Fallback for backward compatibility with old schema
-                            if not activities:
-                                # Try old field names
-                                for field_name in ["activities_json", "activities_content"]:
-                                    if field_name in item and item[field_name]:
-                                        try:
-                                            old_activities = json.loads(item[field_name])
-                                            logger.info(f"Found {len(old_activities)} activities in {field_name}")
-                                            for activity_dict in old_activities:
-                                                activity = LearningActivity(
-                                                    id=activity_dict.get("id", str(uuid.uuid4())),
-                                                    title=activity_dict.get("title", "Activity"),
-                                                    description=activity_dict.get("description", ""),
-                                                    content_id=activity_dict.get("content_id"),
-                                                    content_url=activity_dict.get("content_url"),
-                                                    duration_minutes=activity_dict.get("duration_minutes", 30),
-                                                    order=activity_dict.get("order", 1),
-                                                    day=activity_dict.get("day", 1),
-                                                    status=ActivityStatus(activity_dict.get("status", "not_started")),
-                                                    completed_at=activity_dict.get("completed_at"),
-                                                    learning_benefit=activity_dict.get("learning_benefit", ""),
-                                                    metadata=activity_dict.get("metadata", {})
-                                                )
-                                                activities.append(activity)
-                                        except json.JSONDecodeError:
-                                            logger.error(f"Error parsing {field_name}: {item.get(field_name)}")
-                            # Fallback to activities field for backward compatibility
-                            elif "activities" in item:
-                                # Convert activities JSON if it's stored as a string
-                                if isinstance(item.get("activities"), str):
-                                    try:
-                                        item["activities"] = json.loads(item["activities"])
-                                    except json.JSONDecodeError:
-                                        item["activities"] = []
-                                
-                                # Convert each activity to LearningActivity
-                                for activity_dict in item.get("activities", []):
+                            # Convert to LearningActivity objects
+                            for activity_obj in item["activities"]:
+                                try:
+                                    # Create a LearningActivity with fields from the complex type
+                                    # Add default values for fields not in the schema
                                     activity = LearningActivity(
-                                        id=activity_dict.get("id", str(uuid.uuid4())),
-                                        title=activity_dict.get("title", "Activity"),
-                                        description=activity_dict.get("description", ""),
-                                        content_id=activity_dict.get("content_id"),
-                                        content_url=activity_dict.get("content_url"),
-                                        duration_minutes=activity_dict.get("duration_minutes", 30),
-                                        order=activity_dict.get("order", 1),
-                                        day=activity_dict.get("day", 1),
-                                        status=ActivityStatus(activity_dict.get("status", "not_started")),
-                                        completed_at=activity_dict.get("completed_at"),
-                                        learning_benefit=activity_dict.get("learning_benefit", ""),
-                                        metadata=activity_dict.get("metadata", {})
+                                        id=activity_obj.get("id", str(uuid.uuid4())),
+                                        title=activity_obj.get("title", "Activity"),
+                                        description=activity_obj.get("description", ""),
+                                        content_id=activity_obj.get("content_id"),
+                                        content_url="",  # Not in schema but needed
+                                        duration_minutes=activity_obj.get("duration_minutes", 30),
+                                        order=activity_obj.get("order", 1),
+                                        day=1,  # Default day since not in schema
+                                        status=ActivityStatus(activity_obj.get("status", "not_started")),
+                                        completed_at=activity_obj.get("completed_at"),
+                                        learning_benefit="",  # Not in schema
+                                        metadata={}  # Not in schema
                                     )
                                     activities.append(activity)
+                                except Exception as activity_error:
+                                    logger.error(f"Error creating activity: {activity_error}")
+                        else:
+                            logger.warning("No activities field found in the learning plan")
                             
-                            # Sort activities by day and order
-                            activities.sort(key=lambda x: (getattr(x, "day", 1), x.order))
-                            
-                            # Parse metadata from the simplified schema
-                            metadata = {}
-                            if "metadata" in item and item["metadata"]:
+                        # Fallback for backward compatibility with old schema
+                        if not activities:
+                            # Try old field names
+                            for field_name in ["activities_json", "activities_content"]:
+                                if field_name in item and item[field_name]:
+                                    try:
+                                        old_activities = json.loads(item[field_name])
+                                        logger.info(f"Found {len(old_activities)} activities in {field_name}")
+                                        for activity_dict in old_activities:
+                                            activity = LearningActivity(
+                                                id=activity_dict.get("id", str(uuid.uuid4())),
+                                                title=activity_dict.get("title", "Activity"),
+                                                description=activity_dict.get("description", ""),
+                                                content_id=activity_dict.get("content_id"),
+                                                content_url=activity_dict.get("content_url"),
+                                                duration_minutes=activity_dict.get("duration_minutes", 30),
+                                                order=activity_dict.get("order", 1),
+                                                day=activity_dict.get("day", 1),
+                                                status=ActivityStatus(activity_dict.get("status", "not_started")),
+                                                completed_at=activity_dict.get("completed_at"),
+                                                learning_benefit=activity_dict.get("learning_benefit", ""),
+                                                metadata=activity_dict.get("metadata", {})
+                                            )
+                                            activities.append(activity)
+                                    except json.JSONDecodeError:
+                                        logger.error(f"Error parsing {field_name}: {item.get(field_name)}")
+                        # Fallback to activities field for backward compatibility
+                        elif "activities" in item:
+                            # Convert activities JSON if it's stored as a string
+                            if isinstance(item.get("activities"), str):
                                 try:
-                                    if isinstance(item["metadata"], str):
-                                        metadata = json.loads(item["metadata"])
-                                    elif isinstance(item["metadata"], dict):
-                                        metadata = item["metadata"]
+                                    item["activities"] = json.loads(item["activities"])
                                 except json.JSONDecodeError:
-                                    logger.warning(f"Failed to parse metadata: {item.get('metadata')}")
+                                    item["activities"] = []
                             
-                            # Create LearningPlan with field name mapping
-                            plan = LearningPlan(
-                                id=item.get("id", str(uuid.uuid4())),
-                                student_id=item.get("student_id", user_id),
-                                title=item.get("title", "Learning Plan"),
-                                description=item.get("description", ""),
-                                subject=item.get("subject", "General"),
-                                topics=item.get("topics", []),
-                                activities=activities,
-                                status=ActivityStatus(item.get("status", "not_started")),
-                                # Map from simplified fields
-                                progress_percentage=item.get("progress_percentage", 0.0),
-                                created_at=self._parse_datetime(item.get("created_at")) if item.get("created_at") else datetime.utcnow(),
-                                updated_at=self._parse_datetime(item.get("updated_at")) if item.get("updated_at") else datetime.utcnow(),
-                                start_date=self._parse_datetime(item.get("start_date")) if item.get("start_date") else None,
-                                end_date=self._parse_datetime(item.get("end_date")) if item.get("end_date") else None,
-                                metadata=metadata,
-                                owner_id=item.get("owner_id")  # Get owner_id from the document
-                            )
-                            plans.append(plan)
-                        except Exception as e:
-                            logger.error(f"Error converting plan: {e}")
-                    
-                    return plans
-                    
+                            # Convert each activity to LearningActivity
+                            for activity_dict in item.get("activities", []):
+                                activity = LearningActivity(
+                                    id=activity_dict.get("id", str(uuid.uuid4())),
+                                    title=activity_dict.get("title", "Activity"),
+                                    description=activity_dict.get("description", ""),
+                                    content_id=activity_dict.get("content_id"),
+                                    content_url=activity_dict.get("content_url"),
+                                    duration_minutes=activity_dict.get("duration_minutes", 30),
+                                    order=activity_dict.get("order", 1),
+                                    day=activity_dict.get("day", 1),
+                                    status=ActivityStatus(activity_dict.get("status", "not_started")),
+                                    completed_at=activity_dict.get("completed_at"),
+                                    learning_benefit=activity_dict.get("learning_benefit", ""),
+                                    metadata=activity_dict.get("metadata", {})
+                                )
+                                activities.append(activity)
+                        
+                        # Sort activities by day and order
+                        activities.sort(key=lambda x: (getattr(x, "day", 1), x.order))
+                        
+                        # Parse metadata from the simplified schema
+                        metadata = {}
+                        if "metadata" in item and item["metadata"]:
+                            try:
+                                if isinstance(item["metadata"], str):
+                                    metadata = json.loads(item["metadata"])
+                                elif isinstance(item["metadata"], dict):
+                                    metadata = item["metadata"]
+                            except json.JSONDecodeError:
+                                logger.warning(f"Failed to parse metadata: {item.get('metadata')}")
+                        
+                        # Create LearningPlan with field name mapping
+                        plan = LearningPlan(
+                            id=item.get("id", str(uuid.uuid4())),
+                            student_id=item.get("student_id", user_id),
+                            title=item.get("title", "Learning Plan"),
+                            description=item.get("description", ""),
+                            subject=item.get("subject", "General"),
+                            topics=item.get("topics", []),
+                            activities=activities,
+                            status=ActivityStatus(item.get("status", "not_started")),
+                            # Map from simplified fields
+                            progress_percentage=item.get("progress_percentage", 0.0),
+                            created_at=self._parse_datetime(item.get("created_at")) if item.get("created_at") else datetime.utcnow(),
+                            updated_at=self._parse_datetime(item.get("updated_at")) if item.get("updated_at") else datetime.utcnow(),
+                            start_date=self._parse_datetime(item.get("start_date")) if item.get("start_date") else None,
+                            end_date=self._parse_datetime(item.get("end_date")) if item.get("end_date") else None,
+                            metadata=metadata,
+                            owner_id=item.get("owner_id")  # Get owner_id from the document
+                        )
+                        plans.append(plan)
+                    except Exception as e:
+                        logger.error(f"Error converting plan: {e}")
+                
+                return plans
+                
         except Exception as e:
             logger.error(f"Error getting learning plans: {e}")
             return []
@@ -343,27 +343,27 @@ class AzureLearningPlanService:
             # Execute request
             try:
                 logger.info(f"Sending update request to Azure Search index: {self.index_name}")
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        index_url,
-                        json=request_body,
-                        headers={
-                            "Content-Type": "application/json",
-                            "api-key": self.search_key
-                        }
-                    ) as response:
-                        response_text = await response.text()
-                        if response.status != 200 and response.status != 201:
-                            logger.error(f"Azure Search error: {response.status} - {response_text}")
-                            return False
-                        
-                        # Parse response
-                        logger.info(f"Got successful response from Azure Search: {response.status}")
-                        try:
-                            result = json.loads(response_text)
-                        except json.JSONDecodeError as je:
-                            logger.error(f"Failed to parse Azure Search response: {je} - Response: {response_text}")
-                            return False
+                session = await get_http_session()
+                async with session.post(
+                    index_url,
+                    json=request_body,
+                    headers={
+                        "Content-Type": "application/json",
+                        "api-key": self.search_key
+                    }
+                ) as response:
+                    response_text = await response.text()
+                    if response.status != 200 and response.status != 201:
+                        logger.error(f"Azure Search error: {response.status} - {response_text}")
+                        return False
+                    
+                    # Parse response
+                    logger.info(f"Got successful response from Azure Search: {response.status}")
+                    try:
+                        result = json.loads(response_text)
+                    except json.JSONDecodeError as je:
+                        logger.error(f"Failed to parse Azure Search response: {je} - Response: {response_text}")
+                        return False
             except Exception as e:
                 logger.exception(f"Network error when updating Azure Search index: {e}")
                 return False
@@ -424,171 +424,171 @@ class AzureLearningPlanService:
             }
             
             # Execute search
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    search_url,
-                    json=search_body,
-                    headers={
-                        "Content-Type": "application/json",
-                        "api-key": self.search_key
-                    }
-                ) as response:
-                    if response.status != 200:
-                        logger.error(f"Azure Search error: {response.status} - {await response.text()}")
-                        return None
-                    
-                    # Parse response
-                    result = await response.json()
-                    
-                    # Check if plan was found
-                    if not result.get("value") or len(result["value"]) == 0:
-                        return None
-                    
-                    # Get plan data
-                    item = result["value"][0]
-                    
-                    # Check user permission - allow access to both owner and student
-                    stored_owner_id = item.get("owner_id")
-                    stored_student_id = item.get("student_id")
-                    
-                    # For debug logging
-                    logger.info(f"Permission check for plan {plan_id}: user_id={user_id}, owner_id={stored_owner_id}, student_id={stored_student_id}")
+            session = await get_http_session()
+            async with session.post(
+                search_url,
+                json=search_body,
+                headers={
+                    "Content-Type": "application/json",
+                    "api-key": self.search_key
+                }
+            ) as response:
+                if response.status != 200:
+                    logger.error(f"Azure Search error: {response.status} - {await response.text()}")
+                    return None
+                
+                # Parse response
+                result = await response.json()
+                
+                # Check if plan was found
+                if not result.get("value") or len(result["value"]) == 0:
+                    return None
+                
+                # Get plan data
+                item = result["value"][0]
+                
+                # Check user permission - allow access to both owner and student
+                stored_owner_id = item.get("owner_id")
+                stored_student_id = item.get("student_id")
+                
+                # For debug logging
+                logger.info(f"Permission check for plan {plan_id}: user_id={user_id}, owner_id={stored_owner_id}, student_id={stored_student_id}")
+                
+                if (stored_owner_id and stored_owner_id != user_id) and (stored_student_id and stored_student_id != user_id):
+                    logger.warning(f"User {user_id} does not have permission to access plan {plan_id}")
+                    return None
+                
+                # Get activities from the complex type collection
+                activities = []
+                
+                # Process activities collection directly from Azure Search response
+                if "activities" in item and isinstance(item["activities"], list):
+                    logger.info(f"Found {len(item['activities'])} activities in complex type collection")
                     
-                    if (stored_owner_id and stored_owner_id != user_id) and (stored_student_id and stored_student_id != user_id):
-                        logger.warning(f"User {user_id} does not have permission to access plan {plan_id}")
-                        return None
+                    # Convert to LearningActivity objects
+                    for activity_obj in item["activities"]:
+                        try:
+                            # Create a LearningActivity with fields from the complex type
+                            # Add default values for fields not in the schema
+                            activity = LearningActivity(
+                                id=activity_obj.get("id", str(uuid.uuid4())),
+                                title=activity_obj.get("title", "Activity"),
+                                description=activity_obj.get("description", ""),
+                                content_id=activity_obj.get("content_id"),
+                                content_url="",  # Not in schema but needed
+                                duration_minutes=activity_obj.get("duration_minutes", 30),
+                                order=activity_obj.get("order", 1),
+                                day=1,  # Default day since not in schema
+                                status=ActivityStatus(activity_obj.get("status", "not_started")),
+                                completed_at=activity_obj.get("completed_at"),
+                                learning_benefit="",  # Not in schema
+                                metadata={}  # Not in schema
+                            )
+                            activities.append(activity)
+                        except Exception as activity_error:
+                            logger.error(f"Error creating activity: {activity_error}")
+                else:
+                    logger.warning("No activities field found in the learning plan")
                     
-                    # Get activities from the complex type collection
-                    activities = []
+                # Fallback for backward compatibility with old schema
+                if not activities:
+                    # Try old field names
+                    for field_name in ["activities_json", "activities_content"]:
+                        if field_name in item and item[field_name]:
+                            try:
+                                old_activities = json.loads(item[field_name])
+                                logger.info(f"Found {len(old_activities)} activities in {field_name}")
+                                for activity_dict in old_activities:
+                                    activity = LearningActivity(
+                                        id=activity_dict.get("id", str(uuid.uuid4())),
+                                        title=activity_dict.get("title", "Activity"),
+                                        description=activity_dict.get("description", ""),
+                                        content_id=activity_dict.get("content_id"),
+                                        content_url=activity_dict.get("content_url"),
+                                        duration_minutes=activity_dict.get("duration_minutes", 30),
+                                        order=activity_dict.get("order", 1),
+                                        day=activity_dict.get("day", 1),
+                                        status=ActivityStatus(activity_dict.get("status", "not_started")),
+                                        completed_at=activity_dict.get("completed_at"),
+                                        learning_benefit=activity_dict.get("learning_benefit", ""),
+                                        metadata=activity_dict.get("metadata", {})
+                                    )
+                                    activities.append(activity)
+                            except json.JSONDecodeError:
+                                logger.error(f"Error parsing {field_name}: {item.get(field_name)}")
                     
-                    # Process activities collection directly from Azure Search response
-                    if "activities" in item and isinstance(item["activities"], list):
-                        logger.info(f"Found {len(item['activities'])} activities in complex type collection")
-                        
-                        # Convert to LearningActivity objects
-                        for activity_obj in item["activities"]:
+                    # Fallback to activities field for backward compatibility
+                    if not activities and "activities" in item:
+                        # Convert activities JSON if it's stored as a string
+                        if isinstance(item.get("activities"), str):
                             try:
-                                # Create a LearningActivity with fields from the complex type
-                                # Add default values for fields not in the schema
-                                activity = LearningActivity(
-                                    id=activity_obj.get("id", str(uuid.uuid4())),
-                                    title=activity_obj.get("title", "Activity"),
-                                    description=activity_obj.get("description", ""),
-                                    content_id=activity_obj.get("content_id"),
-                                    content_url="",  # Not in schema but needed
-                                    duration_minutes=activity_obj.get("duration_minutes", 30),
-                                    order=activity_obj.get("order", 1),
-                                    day=1,  # Default day since not in schema
-                                    status=ActivityStatus(activity_obj.get("status", "not_started")),
-                                    completed_at=activity_obj.get("completed_at"),
-                                    learning_benefit="",  # Not in schema
-                                    metadata={}  # Not in schema
-                                )
-                                activities.append(activity)
-                            except Exception as activity_error:
-                                logger.error(f"Error creating activity: {activity_error}")
-                    else:
-                        logger.warning("No activities field found in the learning plan")
-                        
-                    # Fallback for backward compatibility with old schema
-                    if not activities:
-                        # Try old field names
-                        for field_name in ["activities_json", "activities_content"]:
-                            if field_name in item and item[field_name]:
-                                try:
-                                    old_activities = json.loads(item[field_name])
-                                    logger.info(f"Found {len(old_activities)} activities in {field_name}")
-                                    for activity_dict in old_activities:
-                                        activity = LearningActivity(
-                                            id=activity_dict.get("id", str(uuid.uuid4())),
-                                            title=activity_dict.get("title", "Activity"),
-                                            description=activity_dict.get("description", ""),
-                                            content_id=activity_dict.get("content_id"),
-                                            content_url=activity_dict.get("content_url"),
-                                            duration_minutes=activity_dict.get("duration_minutes", 30),
-                                            order=activity_dict.get("order", 1),
-                                            day=activity_dict.get("day", 1),
-                                            status=ActivityStatus(activity_dict.get("status", "not_started")),
-                                            completed_at=activity_dict.get("completed_at"),
-                                            learning_benefit=activity_dict.get("learning_benefit", ""),
-                                            metadata=activity_dict.get("metadata", {})
-                                        )
-                                        activities.append(activity)
-                                except json.JSONDecodeError:
-                                    logger.error(f"Error parsing {field_name}: {item.get(field_name)}")
+                                item["activities"] = json.loads(item["activities"])
+                            except json.JSONDecodeError:
+                                item["activities"] = []
                         
-                        # Fallback to activities field for backward compatibility
-                        if not activities and "activities" in item:
-                            # Convert activities JSON if it's stored as a string
-                            if isinstance(item.get("activities"), str):
-                                try:
-                                    item["activities"] = json.loads(item["activities"])
-                                except json.JSONDecodeError:
-                                    item["activities"] = []
-                            
-                            # Convert each activity to LearningActivity
-                            for activity_dict in item.get("activities", []):
-                                activity = LearningActivity(
-                                    id=activity_dict.get("id", str(uuid.uuid4())),
-                                    title=activity_dict.get("title", "Activity"),
-                                    description=activity_dict.get("description", ""),
-                                    content_id=activity_dict.get("content_id"),
-                                    content_url=activity_dict.get("content_url"),
-                                    duration_minutes=activity_dict.get("duration_minutes", 30),
-                                    order=activity_dict.get("order", 1),
-                                    day=activity_dict.get("day", 1),
-                                    status=ActivityStatus(activity_dict.get("status", "not_started")),
-                                    completed_at=activity_dict.get("completed_at"),
-                                    learning_benefit=activity_dict.get("learning_benefit", ""),
-                                    metadata=activity_dict.get("metadata", {})
-                                )
-                                activities.append(activity)
-                    
-                    # Sort activities by day and order
-                    activities.sort(key=lambda x: (getattr(x, "day", 1), x.order))
-                    
-                    # Parse metadata if it exists (either from metadata or metadata_json field)
-                    metadata = {}
-                    # Try the new metadata_json field first (used with API version 2023-07-01-Preview)
-                    if "metadata_json" in item and item["metadata_json"]:
-                        try:
-                            if isinstance(item["metadata_json"], str):
-                                metadata = json.loads(item["metadata_json"])
-                            elif isinstance(item["metadata_json"], dict):
-                                metadata = item["metadata_json"]
-                        except json.JSONDecodeError:
-                            logger.warning(f"Failed to parse metadata_json: {item.get('metadata_json')}")
-                    # Fallback to the original metadata field for backward compatibility
-                    elif "metadata" in item and item["metadata"]:
-                        try:
-                            if isinstance(item["metadata"], str):
-                                metadata = json.loads(item["metadata"])
-                            elif isinstance(item["metadata"], dict):
-                                metadata = item["metadata"]
-                        except json.JSONDecodeError:
-                            logger.warning(f"Failed to parse metadata JSON: {item.get('metadata')}")
-                    
-                    # Create LearningPlan - using field names that match the schema
-                    plan = LearningPlan(
-                        id=item.get("id", str(uuid.uuid4())),
-                        student_id=item.get("student_id", user_id),
-                        title=item.get("title", "Learning Plan"),
-                        description=item.get("description", ""),
-                        subject=item.get("subject", "General"),
-                        topics=item.get("topics", []),
-                        activities=activities,
-                        status=ActivityStatus(item.get("status", "not_started")),
-                        progress_percentage=item.get("progress_percentage", 0.0),
-                        created_at=self._parse_datetime(item.get("created_at")) if item.get("created_at") else datetime.utcnow(),
-                        updated_at=self._parse_datetime(item.get("updated_at")) if item.get("updated_at") else datetime.utcnow(),
-                        start_date=self._parse_datetime(item.get("start_date")) if item.get("start_date") else None,
-                        end_date=self._parse_datetime(item.get("end_date")) if item.get("end_date") else None,
-                        metadata=metadata,
-                        owner_id=item.get("owner_id")  # Include owner_id from the document
-                    )
-                    
-                    return plan
-                    
+                        # Convert each activity to LearningActivity
+                        for activity_dict in item.get("activities", []):
+                            activity = LearningActivity(
+                                id=activity_dict.get("id", str(uuid.uuid4())),
+                                title=activity_dict.get("title", "Activity"),
+                                description=activity_dict.get("description", ""),
+                                content_id=activity_dict.get("content_id"),
+                                content_url=activity_dict.get("content_url"),
+                                duration_minutes=activity_dict.get("duration_minutes", 30),
+                                order=activity_dict.get("order", 1),
+                                day=activity_dict.get("day", 1),
+                                status=ActivityStatus(activity_dict.get("status", "not_started")),
+                                completed_at=activity_dict.get("completed_at"),
+                                learning_benefit=activity_dict.get("learning_benefit", ""),
+                                metadata=activity_dict.get("metadata", {})
+                            )
+                            activities.append(activity)
+                
+                # Sort activities by day and order
+                activities.sort(key=lambda x: (getattr(x, "day", 1), x.order))
+                
+                # Parse metadata if it exists (either from metadata or metadata_json field)
+                metadata = {}
+                # Try the new metadata_json field first (used with API version 2023-07-01-Preview)
+                if "metadata_json" in item and item["metadata_json"]:
+                    try:
+                        if isinstance(item["metadata_json"], str):
+                            metadata = json.loads(item["metadata_json"])
+                        elif isinstance(item["metadata_json"], dict):
+                            metadata = item["metadata_json"]
+                    except json.JSONDecodeError:
+                        logger.warning(f"Failed to parse metadata_json: {item.get('metadata_json')}")
+                # Fallback to the original metadata field for backward compatibility
+                elif "metadata" in item and item["metadata"]:
+                    try:
+                        if isinstance(item["metadata"], str):
+                            metadata = json.loads(item["metadata"])
+                        elif isinstance(item["metadata"], dict):
+                            metadata = item["metadata"]
+                    except json.JSONDecodeError:
+                        logger.warning(f"Failed to parse metadata JSON: {item.get('metadata')}")
+                
+                # Create LearningPlan - using field names that match the schema
+                plan = LearningPlan(
+                    id=item.get("id", str(uuid.uuid4())),
+                    student_id=item.get("student_id", user_id),
+                    title=item.get("title", "Learning Plan"),
+                    description=item.get("description", ""),
+                    subject=item.get("subject", "General"),
+                    topics=item.get("topics", []),
+                    activities=activities,
+                    status=ActivityStatus(item.get("status", "not_started")),
+                    progress_percentage=item.get("progress_percentage", 0.0),
+                    created_at=self._parse_datetime(item.get("created_at")) if item.get("created_at") else datetime.utcnow(),
+                    updated_at=self._parse_datetime(item.get("updated_at")) if item.get("updated_at") else datetime.utcnow(),
+                    start_date=self._parse_datetime(item.get("start_date")) if item.get("start_date") else None,
+                    end_date=self._parse_datetime(item.get("end_date")) if item.get("end_date") else None,
+                    metadata=metadata,
+                    owner_id=item.get("owner_id")  # Include owner_id from the document
+                )
+                
+                return plan
+                
         except Exception as e:
             logger.error(f"Error getting learning plan: {e}")
             return None
@@ -754,35 +754,35 @@ class AzureLearningPlanService:
             }
             
             # Execute delete request
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    delete_url,
-                    json=request_body,
-                    headers={
-                        "Content-Type": "application/json",
-                        "api-key": self.search_key
-                    }
-                ) as response:
-                    if response.status != 200 and response.status != 201:
-                        response_text = await response.text()
-                        logger.error(f"Azure Search error deleting plan: {response.status} - {response_text}")
-                        return False
-                    
-                    # Parse response to check for errors
-                    try:
-                        result = await response.json()
-                        if "value" in result:
-                            for item in result["value"]:
-                                if not item.get("status", False):
-                                    logger.error(f"Error deleting learning plan: {item.get('errorMessage')}")
-                                    return False
-                    except json.JSONDecodeError:
-                        # Some successful responses might not have a JSON body
-                        pass
-                    
-                    logger.info(f"Successfully deleted learning plan {plan_id}")
-                    return True
+            session = await get_http_session()
+            async with session.post(
+                delete_url,
+                json=request_body,
+                headers={
+                    "Content-Type": "application/json",
+                    "api-key": self.search_key
+                }
+            ) as response:
+                if response.status != 200 and response.status != 201:
+                    response_text = await response.text()
+                    logger.error(f"Azure Search error deleting plan: {response.status} - {response_text}")
+                    return False
                 
+                # Parse response to check for errors
+                try:
+                    result = await response.json()
+                    if "value" in result:
+                        for item in result["value"]:
+                            if not item.get("status", False):
+                                logger.error(f"Error deleting learning plan: {item.get('errorMessage')}")
+                                return False
+                except json.JSONDecodeError:
+                    # Some successful responses might not have a JSON body
+                    pass
+                
+                logger.info(f"Successfully deleted learning plan {plan_id}")
+                return True
+            
         except Exception as e:
             logger.error(f"Error deleting learning plan: {e}")
             return False
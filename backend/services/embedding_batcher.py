@@ -0,0 +1,97 @@
+# backend/services/embedding_batcher.py
+"""
+Coalesces single-text embedding requests into batched Azure OpenAI calls.
+
+Callers await `embed` as if it were a direct embedding call; texts arriving
+within a short window are embedded together, so concurrent requests share
+one round trip instead of making one call each.
+"""
+import asyncio
+import logging
+from typing import List, Optional, Set, Tuple
+
+from rag.openai_adapter import get_openai_adapter
+from utils.embedding_cache import get_cached_embeddings
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Maximum texts collected into one batch
+MAX_BATCH_SIZE = 64
+
+# How long to wait for more texts after the first one arrives
+MAX_BATCH_WAIT_SECONDS = 0.02
+
+
+class EmbeddingBatcher:
+    """Batches texts for one embedding deployment and embeds them in the background."""
+
+    def __init__(
+        self,
+        model: str,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait_seconds: float = MAX_BATCH_WAIT_SECONDS
+    ):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._flush_loop_task: Optional[asyncio.Task] = None
+        self._flush_tasks: Set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Queue a text for embedding and wait for its batch to be embedded.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            List of embedding values
+        """
+        if self._flush_loop_task is None:
+            self._queue = asyncio.Queue()
+            self._flush_loop_task = asyncio.create_task(self._flush_loop())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _flush_loop(self):
+        """Collect queued texts into batches and start their embedding calls."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_seconds
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            task = asyncio.create_task(self._flush(batch))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Embed a batch and resolve each caller's future."""
+        try:
+            openai_client = await get_openai_adapter()
+            # Identical texts are embedded once and cached embeddings are reused
+            embeddings = await get_cached_embeddings(
+                openai_client,
+                model=self.model,
+                texts=[text for text, _ in batch]
+            )
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+        except Exception as e:
+            logger.error(f"Error embedding batch of {len(batch)} texts: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
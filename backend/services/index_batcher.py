@@ -0,0 +1,95 @@
+# backend/services/index_batcher.py
+"""
+Coalesces single-document index requests into batched uploads.
+
+Callers await `index_document` as if it were a direct upload; documents
+arriving within a short window are sent to Azure AI Search together, so the
+per-request HTTPS and auth overhead is shared across the batch.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from services.search_service import get_search_service
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Maximum documents collected into one batch
+MAX_BATCH_SIZE = 1000
+
+# How long to wait for more documents after the first one arrives
+MAX_BATCH_WAIT_SECONDS = 0.05
+
+
+class IndexBatcher:
+    """Batches documents for one index and uploads them in the background."""
+
+    def __init__(
+        self,
+        index_name: str,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait_seconds: float = MAX_BATCH_WAIT_SECONDS
+    ):
+        self.index_name = index_name
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._flush_loop_task: Optional[asyncio.Task] = None
+        self._flush_tasks: Set[asyncio.Task] = set()
+
+    async def index_document(self, document: Dict[str, Any]) -> bool:
+        """
+        Queue a document for indexing and wait for its batch to be uploaded.
+
+        Args:
+            document: Document to index
+
+        Returns:
+            Success status
+        """
+        if self._flush_loop_task is None:
+            self._queue = asyncio.Queue()
+            self._flush_loop_task = asyncio.create_task(self._flush_loop())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((document, future))
+        return await future
+
+    async def _flush_loop(self):
+        """Collect queued documents into batches and start their uploads."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_seconds
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Upload concurrency is capped by the search service
+            task = asyncio.create_task(self._flush(batch))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        """Upload a batch and resolve each caller's future."""
+        try:
+            search_service = await get_search_service()
+            results = await search_service.index_documents(
+                self.index_name,
+                [document for document, _ in batch]
+            )
+            for (_, future), success in zip(batch, results):
+                if not future.done():
+                    future.set_result(success)
+        except Exception as e:
+            logger.error(f"Error flushing batch of {len(batch)} documents to {self.index_name}: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
@@ -5,7 +5,7 @@ This module provides high-level LangChain functionality for the application.
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 import os
 import sys
 import json
@@ -97,6 +97,73 @@ class LangChainService:
                 "activities": []
             }
     
+    async def _build_personalized_messages(
+        self,
+        query: str,
+        student: User,
+        chat_history: Optional[List[Dict[str, str]]] = None
+    ) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]]]:
+        """
+        Build the chat messages for a personalized response to a student's query.
+        
+        Args:
+            query: The student's query
+            student: The student asking the query
+            chat_history: Optional chat history
+            
+        Returns:
+            Tuple of (messages, search results used as context)
+        """
+        # Create system prompt with personalization
+        grade_level = student.grade_level or "unknown"
+        learning_style = student.learning_style.value if student.learning_style else "mixed"
+        
+        system_prompt = f"""
+        You are an educational assistant for a student in grade {grade_level} with a 
+        {learning_style} learning style. Provide helpful, accurate information that 
+        is appropriate for their educational level and learning preferences.
+        
+        When possible, provide explanations that cater to their learning style:
+        - For visual learners: describe concepts with visual analogies and suggest diagrams
+        - For auditory learners: use rhythm and emphasize how concepts would be explained verbally
+        - For reading/writing learners: use precise terminology and suggest reading materials
+        - For kinesthetic learners: relate concepts to physical activities and real-world applications
+        - For mixed learners: provide a balanced approach
+        
+        Answer the student's questions accurately, but keep your responses at an appropriate 
+        level for grade {grade_level}.
+        """
+        
+        # Get vector store for content retrieval
+        vector_store = await get_vector_store()
+        
+        # Search for relevant content
+        search_results = await vector_store.vector_search(
+            query_text=query,
+            filter_expression=None,
+            limit=5
+        )
+        
+        # Extract context from search results
+        context = "\n\n".join([
+            f"Title: {result.get('title', 'Untitled')}\n"
+            f"{result.get('page_content', result.get('metadata_content_text', ''))}"
+            for result in search_results
+        ])
+        
+        # Generate response using LangChain
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Context information: {context}\n\nQuestion: {query}"}
+        ]
+        
+        # Add chat history if provided
+        if chat_history:
+            for message in chat_history:
+                messages.append({"role": message["role"], "content": message["content"]})
+        
+        return messages, search_results
+    
     async def generate_personalized_response(
         self,
         query: str,
@@ -115,53 +182,7 @@ class LangChainService:
             Response with answer and sources
         """
         try:
-            # Create system prompt with personalization
-            grade_level = student.grade_level or "unknown"
-            learning_style = student.learning_style.value if student.learning_style else "mixed"
-            
-            system_prompt = f"""
-            You are an educational assistant for a student in grade {grade_level} with a 
-            {learning_style} learning style. Provide helpful, accurate information that 
-            is appropriate for their educational level and learning preferences.
-            
-            When possible, provide explanations that cater to their learning style:
-            - For visual learners: describe concepts with visual analogies and suggest diagrams
-            - For auditory learners: use rhythm and emphasize how concepts would be explained verbally
-            - For reading/writing learners: use precise terminology and suggest reading materials
-            - For kinesthetic learners: relate concepts to physical activities and real-world applications
-            - For mixed learners: provide a balanced approach
-            
-            Answer the student's questions accurately, but keep your responses at an appropriate 
-            level for grade {grade_level}.
-            """
-            
-            # Get vector store for content retrieval
-            vector_store = await get_vector_store()
-            
-            # Search for relevant content
-            search_results = await vector_store.vector_search(
-                query_text=query,
-                filter_expression=None,
-                limit=5
-            )
-            
-            # Extract context from search results
-            context = "\n\n".join([
-                f"Title: {result.get('title', 'Untitled')}\n"
-                f"{result.get('page_content', result.get('metadata_content_text', ''))}"
-                for result in search_results
-            ])
-            
-            # Generate response using LangChain
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Context information: {context}\n\nQuestion: {query}"}
-            ]
-            
-            # Add chat history if provided
-            if chat_history:
-                for message in chat_history:
-                    messages.append({"role": message["role"], "content": message["content"]})
+            messages, search_results = await self._build_personalized_messages(query, student, chat_history)
             
             # Generate response
             response = await self.langchain_manager.llm.ainvoke(messages)
@@ -179,6 +200,39 @@ class LangChainService:
                 "source_documents": []
             }
     
+    async def stream_personalized_response(
+        self,
+        query: str,
+        student: User,
+        chat_history: Optional[List[Dict[str, str]]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a personalized response to a student's query.
+        
+        Args:
+            query: The student's query
+            student: The student asking the query
+            chat_history: Optional chat history
+            
+        Yields:
+            {"delta": text} events as the answer is generated, then a final
+            {"source_documents": [...]} event
+        """
+        search_results = []
+        try:
+            messages, search_results = await self._build_personalized_messages(query, student, chat_history)
+            
+            # Yield tokens as the model produces them
+            async for chunk in self.langchain_manager.llm.astream(messages):
+                if chunk.content:
+                    yield {"delta": chunk.content}
+            
+        except Exception as e:
+            logger.error(f"Error streaming personalized response: {e}")
+            yield {"delta": f"I'm sorry, I wasn't able to generate a response. Error: {str(e)}"}
+        
+        yield {"source_documents": search_results}
+    
     async def search_educational_content(
         self,
         query: str,
@@ -9,11 +9,11 @@ from azure.search.documents.models import Vector
 
 from models.user import User
 from models.content import Content, ContentType, DifficultyLevel
-from config.settings import Settings
+from config.settings import get_settings
 from rag.openai_adapter import get_openai_adapter
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -1,28 +1,61 @@
 # services/search_service.py
 from azure.core.credentials import AzureKeyCredential
+from azure.core.exceptions import ResourceNotFoundError
+from azure.core.pipeline.transport import AioHttpTransport
 from azure.search.documents.aio import SearchClient
 # Vector is not available in this version of the SDK
 # from azure.search.documents.models import Vector
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
+import asyncio
 import json
 import logging
+import random
+import time
 import traceback
+from collections import defaultdict
 from datetime import datetime
 
-from config.settings import Settings
+from config.settings import get_settings
 from rag.openai_adapter import get_openai_adapter
+from utils.http_client import get_http_session
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+# Maximum documents per upload request (documents with embeddings are large,
+# so stay well under the 16 MB request limit)
+INDEX_BATCH_SIZE = 100
+
+# Maximum concurrent upload requests, to avoid 503 throttling
+MAX_CONCURRENT_UPLOADS = 4
+
+# Maximum concurrent single-document write requests
+MAX_CONCURRENT_WRITES = 16
+
+# Per-document status codes Azure Search reports for transient failures
+RETRYABLE_STATUS_CODES = frozenset({409, 422, 429, 503})
+
+# Retries for documents that failed with a retryable status
+MAX_UPLOAD_ATTEMPTS = 5
+RETRY_BASE_DELAY_SECONDS = 0.2
+RETRY_MAX_DELAY_SECONDS = 5.0
+
+# How long a positive index existence check is reused
+INDEX_EXISTS_TTL_SECONDS = 300
+
 class SearchService:
     """Service for interacting with Azure AI Search."""
     
     def __init__(self):
         self.search_clients = {}
+        self._upload_semaphore = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+        self._write_semaphore = asyncio.Semaphore(MAX_CONCURRENT_WRITES)
+        # index name -> monotonic time the index was last seen to exist
+        self._index_seen_at: Dict[str, float] = {}
+        self._index_check_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
     
     async def get_search_client(self, index_name: str) -> Optional[SearchClient]:
         """
@@ -42,10 +75,13 @@ class SearchService:
         
         if index_name not in self.search_clients:
             try:
+                # Share the pooled HTTP session so all indexes reuse warm connections
+                transport = AioHttpTransport(session=await get_http_session(), session_owner=False)
                 self.search_clients[index_name] = SearchClient(
                     endpoint=settings.AZURE_SEARCH_ENDPOINT,
                     index_name=index_name,
-                    credential=AzureKeyCredential(settings.AZURE_SEARCH_KEY)
+                    credential=AzureKeyCredential(settings.AZURE_SEARCH_KEY),
+                    transport=transport
                 )
                 logger.info(f"Created new search client for index: {index_name}")
             except Exception as e:
@@ -58,6 +94,9 @@ class SearchService:
         """
         Check if an index exists in Azure Search.
         
+        An index seen to exist is not checked again for INDEX_EXISTS_TTL_SECONDS;
+        a missing index is checked on every call.
+        
         Args:
             index_name: Name of the index to check
             
@@ -67,10 +106,29 @@ class SearchService:
         if not settings.AZURE_SEARCH_ENDPOINT or not settings.AZURE_SEARCH_KEY:
             logger.warning("Azure Search not configured")
             return False
-            
-        import aiohttp
-        import json
         
+        if self._index_recently_seen(index_name):
+            return True
+        
+        # Only one request per index goes to Azure Search at a time
+        async with self._index_check_locks[index_name]:
+            if self._index_recently_seen(index_name):
+                return True
+            
+            exists = await self._fetch_index_exists(index_name)
+            if exists:
+                self._index_seen_at[index_name] = time.monotonic()
+            else:
+                self._index_seen_at.pop(index_name, None)
+            return exists
+    
+    def _index_recently_seen(self, index_name: str) -> bool:
+        """Check if the index was seen to exist within the TTL."""
+        seen_at = self._index_seen_at.get(index_name)
+        return seen_at is not None and time.monotonic() - seen_at < INDEX_EXISTS_TTL_SECONDS
+    
+    async def _fetch_index_exists(self, index_name: str) -> bool:
+        """Ask Azure Search whether an index exists."""
         try:
             # Use the REST API to check if the index exists
             headers = {
@@ -78,21 +136,21 @@ class SearchService:
                 "Content-Type": "application/json"
             }
             
-            # Use aiohttp for the HTTP request
-            async with aiohttp.ClientSession() as session:
-                url = f"{settings.AZURE_SEARCH_ENDPOINT}/indexes/{index_name}?api-version=2023-07-01-Preview"
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        logger.info(f"Index {index_name} exists")
-                        return True
-                    elif response.status == 404:
-                        logger.warning(f"Index {index_name} does not exist")
-                        return False
-                    else:
-                        logger.error(f"Error checking if index {index_name} exists: {response.status}")
-                        text = await response.text()
-                        logger.error(f"Response: {text}")
-                        return False
+            # Use the shared HTTP session for the request
+            session = await get_http_session()
+            url = f"{settings.AZURE_SEARCH_ENDPOINT}/indexes/{index_name}?api-version=2023-07-01-Preview"
+            async with session.get(url, headers=headers) as response:
+                if response.status == 200:
+                    logger.info(f"Index {index_name} exists")
+                    return True
+                elif response.status == 404:
+                    logger.warning(f"Index {index_name} does not exist")
+                    return False
+                else:
+                    logger.error(f"Error checking if index {index_name} exists: {response.status}")
+                    text = await response.text()
+                    logger.error(f"Response: {text}")
+                    return False
         except Exception as e:
             logger.error(f"Error checking if index {index_name} exists: {e}")
             return False
@@ -193,6 +251,116 @@ class SearchService:
             logger.error(traceback.format_exc())
             return []
     
+    async def iter_documents(
+        self,
+        index_name: str,
+        query: str,
+        filter: Optional[str] = None,
+        top: int = 10,
+        skip: int = 0,
+        select: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Search for documents in an index, yielding them as they are received.
+        
+        Unlike `search_documents` nothing is collected, so callers can start
+        sending results before the last page has arrived. Errors are raised
+        to the caller.
+        
+        Args:
+            index_name: Name of the index
+            query: Search query
+            filter: Filter expression
+            top: Maximum number of results
+            skip: Number of results to skip
+            select: Fields to include in results
+            
+        Yields:
+            Matching documents
+        """
+        client = await self.get_search_client(index_name)
+        if not client:
+            logger.warning(f"No search client available for index {index_name}")
+            return
+        
+        results = await client.search(
+            query,
+            filter=filter,
+            top=top,
+            skip=skip,
+            select=select.split(",") if select else None
+        )
+        async for result in results:
+            yield dict(result)
+    
+    async def get_document(
+        self,
+        index_name: str,
+        key: str,
+        selected_fields: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Get a single document by its key.
+        
+        This is a direct key lookup, cheaper than a filtered search.
+        
+        Args:
+            index_name: Name of the index
+            key: Document key
+            selected_fields: Fields to include in the result
+            
+        Returns:
+            The document, or None if not found
+        """
+        try:
+            client = await self.get_search_client(index_name)
+            if not client:
+                logger.warning(f"No search client available for index {index_name}")
+                return None
+            
+            document = await client.get_document(key=key, selected_fields=selected_fields)
+            return dict(document)
+            
+        except ResourceNotFoundError:
+            logger.info(f"Document {key} not found in index {index_name}")
+            return None
+        except Exception as e:
+            logger.error(f"Error getting document {key} from index {index_name}: {e}")
+            return None
+    
+    async def get_facet_values(
+        self,
+        index_name: str,
+        field: str,
+        count: int = 50
+    ) -> List[str]:
+        """
+        Get the distinct values of a facetable field.
+        
+        Uses a facet query, so no documents are returned or scanned client-side.
+        
+        Args:
+            index_name: Name of the index
+            field: Facetable field name
+            count: Maximum number of values to return
+            
+        Returns:
+            List of field values, most common first
+        """
+        try:
+            client = await self.get_search_client(index_name)
+            if not client:
+                logger.warning(f"No search client available for index {index_name}")
+                return []
+            
+            results = await client.search("*", facets=[f"{field},count:{count}"], top=0)
+            facets = await results.get_facets() or {}
+            return [facet["value"] for facet in facets.get(field, []) if facet.get("value")]
+            
+        except Exception as e:
+            logger.error(f"Error getting facet values for {field} in index {index_name}: {e}")
+            return []
+    
     def _prepare_document_for_indexing(self, document: Dict[str, Any]) -> Dict[str, Any]:
         """
         Prepare a document for indexing in Azure AI Search.
@@ -337,7 +505,8 @@ class SearchService:
                 logger.info(f"DEBUG: Azure Search key present: {bool(settings.AZURE_SEARCH_KEY)}")
                 
                 # Upload document
-                result = await client.upload_documents(documents=[prepared_doc])
+                async with self._write_semaphore:
+                    result = await self._upload_with_retry(client, [prepared_doc])
                 
                 # Check if the operation was successful
                 is_success = result[0].succeeded
@@ -384,6 +553,102 @@ class SearchService:
             logger.error(traceback.format_exc())
             return False
     
+    async def _upload_with_retry(
+        self,
+        client: SearchClient,
+        documents: List[Dict[str, Any]]
+    ) -> List[Any]:
+        """
+        Upload documents, retrying the ones that failed with a transient status.
+        
+        Throttled requests as a whole (429/503 responses) are already retried
+        by the SDK's retry policy, which honors Retry-After. This handles the
+        per-document failures reported inside a successful (207) response.
+        
+        Args:
+            client: Search client for the index
+            documents: Prepared documents to upload
+            
+        Returns:
+            The final indexing result for each document
+        """
+        results_by_key = {}
+        pending = documents
+        for attempt in range(MAX_UPLOAD_ATTEMPTS):
+            results = await client.upload_documents(documents=pending)
+            for result in results:
+                results_by_key[result.key] = result
+            
+            retry_keys = {
+                result.key for result in results
+                if not result.succeeded and result.status_code in RETRYABLE_STATUS_CODES
+            }
+            if not retry_keys or attempt == MAX_UPLOAD_ATTEMPTS - 1:
+                break
+            
+            # Exponential backoff with jitter
+            delay = min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * 2 ** attempt)
+            delay += random.uniform(0, RETRY_BASE_DELAY_SECONDS)
+            logger.warning(f"Retrying {len(retry_keys)} throttled documents in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            pending = [document for document in pending if document.get("id") in retry_keys]
+        
+        return list(results_by_key.values())
+    
+    async def index_documents(
+        self,
+        index_name: str,
+        documents: List[Dict[str, Any]]
+    ) -> List[bool]:
+        """
+        Index a batch of documents in Azure AI Search.
+        
+        Documents are uploaded in batches of up to INDEX_BATCH_SIZE, one batch
+        after another. MAX_CONCURRENT_UPLOADS caps the upload requests in flight
+        across concurrent calls. A batch that fails only marks its own
+        documents as failed.
+        
+        Args:
+            index_name: Name of the index
+            documents: Documents to index
+            
+        Returns:
+            Success status for each document, in input order
+        """
+        if not documents:
+            return []
+            
+        try:
+            client = await self.get_search_client(index_name)
+            if not client:
+                logger.warning(f"No search client available for index {index_name}")
+                return [False] * len(documents)
+            
+            prepared_docs = [self._prepare_document_for_indexing(document) for document in documents]
+            
+            succeeded = {}
+            for start in range(0, len(prepared_docs), INDEX_BATCH_SIZE):
+                batch = prepared_docs[start:start + INDEX_BATCH_SIZE]
+                try:
+                    async with self._upload_semaphore:
+                        results = await self._upload_with_retry(client, batch)
+                except Exception as e:
+                    logger.error(f"Error indexing batch of {len(batch)} documents in {index_name}: {e}")
+                    continue
+                
+                for result in results:
+                    succeeded[result.key] = result.succeeded
+                    if not result.succeeded:
+                        logger.error(f"Failed to index document {result.key}: {result.error_message}")
+            
+            logger.info(f"Indexed {sum(succeeded.values())} of {len(prepared_docs)} documents in {index_name}")
+            return [succeeded.get(doc.get("id"), False) for doc in prepared_docs]
+            
+        except Exception as e:
+            logger.error(f"Error indexing documents: {e}")
+            logger.error(traceback.format_exc())
+            return [False] * len(documents)
+    
     async def delete_document(
         self,
         index_name: str,
@@ -405,7 +670,8 @@ class SearchService:
                 return False
             
             # Delete the document
-            result = await client.delete_documents(documents=[{"id": document_id}])
+            async with self._write_semaphore:
+                result = await client.delete_documents(documents=[{"id": document_id}])
             
             # Check if the operation was successful
             return result[0].succeeded
@@ -0,0 +1,70 @@
+import sys
+import os
+import base64
+import struct
+import unittest
+import uuid
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from api.langchain_endpoints import _encode_embedding
+    from api.direct_profile_indexer import _new_profile_id
+except ImportError as e:  # The API modules need the full app dependencies
+    IMPORT_ERROR = e
+else:
+    IMPORT_ERROR = None
+
+@unittest.skipIf(IMPORT_ERROR is not None, f"API dependencies not installed: {IMPORT_ERROR}")
+class TestEncodeEmbedding(unittest.TestCase):
+    """Test embedding response encodings."""
+    
+    EMBEDDING = [0.5, -0.25, 0.125, 0.0]
+    
+    def test_fp32(self):
+        """Test that fp32 returns the values unchanged."""
+        self.assertEqual(_encode_embedding(self.EMBEDDING, "fp32"), (self.EMBEDDING, None))
+    
+    def test_fp16(self):
+        """Test that fp16 packs little-endian half floats."""
+        encoded, scale = _encode_embedding(self.EMBEDDING, "fp16")
+        packed = base64.b64decode(encoded)
+        
+        self.assertIsNone(scale)
+        self.assertEqual(len(packed), 2 * len(self.EMBEDDING))
+        self.assertEqual(list(struct.unpack("<4e", packed)), self.EMBEDDING)
+    
+    def test_int8(self):
+        """Test that int8 values times the scale approximate the embedding."""
+        encoded, scale = _encode_embedding(self.EMBEDDING, "int8")
+        quantized = struct.unpack("<4b", base64.b64decode(encoded))
+        
+        self.assertEqual(max(map(abs, quantized)), 127)
+        for value, q in zip(self.EMBEDDING, quantized):
+            with self.subTest(value=value):
+                self.assertAlmostEqual(q * scale, value, delta=scale / 2)
+    
+    def test_int8_zero_embedding(self):
+        """Test that an all-zero embedding doesn't divide by zero."""
+        encoded, scale = _encode_embedding([0.0, 0.0], "int8")
+        self.assertEqual(struct.unpack("<2b", base64.b64decode(encoded)), (0, 0))
+        self.assertEqual(scale, 1.0)
+
+@unittest.skipIf(IMPORT_ERROR is not None, f"API dependencies not installed: {IMPORT_ERROR}")
+class TestNewProfileId(unittest.TestCase):
+    """Test time-ordered profile ids."""
+    
+    def test_version_and_variant(self):
+        """Test that ids are RFC 4122 version 7 UUIDs."""
+        profile_id = uuid.UUID(_new_profile_id())
+        self.assertEqual(profile_id.version, 7)
+        self.assertEqual(profile_id.variant, uuid.RFC_4122)
+    
+    def test_unique(self):
+        """Test that ids don't repeat."""
+        ids = {_new_profile_id() for _ in range(1000)}
+        self.assertEqual(len(ids), 1000)
+
+if __name__ == "__main__":
+    unittest.main()
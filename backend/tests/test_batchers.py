@@ -0,0 +1,79 @@
+import sys
+import os
+import asyncio
+import unittest
+from unittest import mock
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from services.embedding_batcher import EmbeddingBatcher
+    from services.index_batcher import IndexBatcher
+except ImportError as e:  # The batchers import the Azure and OpenAI clients
+    IMPORT_ERROR = e
+else:
+    IMPORT_ERROR = None
+
+@unittest.skipIf(IMPORT_ERROR is not None, f"Service dependencies not installed: {IMPORT_ERROR}")
+class TestIndexBatcher(unittest.IsolatedAsyncioTestCase):
+    """Test that batched index requests resolve each caller's result."""
+    
+    async def test_results_per_document(self):
+        """Test that concurrent documents share one upload and get their own status."""
+        search_service = mock.AsyncMock()
+        search_service.index_documents.side_effect = lambda index, docs: [doc["id"] != "bad" for doc in docs]
+        
+        with mock.patch("services.index_batcher.get_search_service", mock.AsyncMock(return_value=search_service)):
+            batcher = IndexBatcher("profiles", max_wait_seconds=0.01)
+            results = await asyncio.gather(*(
+                batcher.index_document({"id": id_}) for id_ in ("a", "bad", "c")
+            ))
+        
+        self.assertEqual(results, [True, False, True])
+        search_service.index_documents.assert_awaited_once()
+    
+    async def test_upload_error(self):
+        """Test that an upload error reaches every caller in the batch."""
+        search_service = mock.AsyncMock()
+        search_service.index_documents.side_effect = RuntimeError("upload failed")
+        
+        with mock.patch("services.index_batcher.get_search_service", mock.AsyncMock(return_value=search_service)):
+            batcher = IndexBatcher("profiles", max_wait_seconds=0.01)
+            results = await asyncio.gather(
+                batcher.index_document({"id": "a"}),
+                batcher.index_document({"id": "b"}),
+                return_exceptions=True
+            )
+        
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+@unittest.skipIf(IMPORT_ERROR is not None, f"Service dependencies not installed: {IMPORT_ERROR}")
+class TestEmbeddingBatcher(unittest.IsolatedAsyncioTestCase):
+    """Test that batched embedding requests resolve each caller's result."""
+    
+    async def test_results_per_text(self):
+        """Test that concurrent texts share one embedding call and get their own embedding."""
+        embed = mock.AsyncMock(side_effect=lambda client, model, texts: [[float(len(text))] for text in texts])
+        
+        with mock.patch("services.embedding_batcher.get_openai_adapter", mock.AsyncMock()), \
+                mock.patch("services.embedding_batcher.get_cached_embeddings", embed):
+            batcher = EmbeddingBatcher("embedding-model", max_wait_seconds=0.01)
+            results = await asyncio.gather(*(batcher.embed(text) for text in ("a", "bb", "ccc")))
+        
+        self.assertEqual(results, [[1.0], [2.0], [3.0]])
+        embed.assert_awaited_once()
+    
+    async def test_embedding_error(self):
+        """Test that an embedding error reaches every caller in the batch."""
+        embed = mock.AsyncMock(side_effect=RuntimeError("rate limited"))
+        
+        with mock.patch("services.embedding_batcher.get_openai_adapter", mock.AsyncMock()), \
+                mock.patch("services.embedding_batcher.get_cached_embeddings", embed):
+            batcher = EmbeddingBatcher("embedding-model", max_wait_seconds=0.01)
+            results = await asyncio.gather(batcher.embed("a"), batcher.embed("b"), return_exceptions=True)
+        
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+if __name__ == "__main__":
+    unittest.main()
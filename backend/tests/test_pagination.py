@@ -0,0 +1,82 @@
+import sys
+import os
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.odata import quote_odata_string
+from utils.pagination import cursor_filter, encode_cursor
+
+CREATED_AT = "2026-10-18T12:00:00Z"
+
+class TestQuoteOdataString(unittest.TestCase):
+    """Test OData string literal quoting."""
+    
+    def test_quote_odata_string(self):
+        """Test that values are quoted and single quotes are escaped."""
+        test_cases = [
+            ("Math", "'Math'"),
+            ("O'Brien", "'O''Brien'"),
+            ("' or 1 eq 1 or '", "''' or 1 eq 1 or '''"),
+            ("", "''"),
+            (7, "'7'"),
+        ]
+        
+        for value, expected_output in test_cases:
+            with self.subTest(value=value):
+                self.assertEqual(quote_odata_string(value), expected_output)
+
+class TestPagination(unittest.TestCase):
+    """Test the keyset pagination cursors."""
+    
+    def test_round_trip(self):
+        """Test that a cursor filters out the page it was built from."""
+        page = [
+            {"id": "a", "created_at": "2026-10-18T13:00:00Z"},
+            {"id": "b", "created_at": CREATED_AT},
+        ]
+        cursor = encode_cursor(page, "created_at")
+        self.assertEqual(
+            cursor_filter(cursor, "created_at"),
+            f"(created_at lt {CREATED_AT} or (created_at eq {CREATED_AT} and not search.in(id, 'b', ',')))"
+        )
+    
+    def test_malformed_cursor(self):
+        """Test that malformed cursors raise ValueError."""
+        test_cases = [
+            "not base64!",
+            "e30=",  # {}
+            encode_cursor([{"id": "a", "created_at": "yesterday"}], "created_at"),
+            encode_cursor([{"id": 1, "created_at": CREATED_AT}], "created_at"),
+        ]
+        
+        for cursor in test_cases:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ValueError):
+                    cursor_filter(cursor, "created_at")
+    
+    def test_tie_spanning_pages(self):
+        """Test that ids tied across several pages stay excluded."""
+        documents = [{"id": id_, "created_at": CREATED_AT} for id_ in "ABCDEF"]
+        
+        first = encode_cursor(documents[:2], "created_at")
+        second = encode_cursor(documents[2:4], "created_at", first)
+        third = encode_cursor(documents[4:], "created_at", second)
+        
+        self.assertIn("search.in(id, 'A,B,C,D', ',')", cursor_filter(second, "created_at"))
+        self.assertIn("search.in(id, 'A,B,C,D,E,F', ',')", cursor_filter(third, "created_at"))
+    
+    def test_tie_ends_on_page(self):
+        """Test that ids from earlier pages are dropped once the tie is passed."""
+        first = encode_cursor([{"id": "A", "created_at": CREATED_AT}], "created_at")
+        second = encode_cursor(
+            [{"id": "B", "created_at": CREATED_AT}, {"id": "C", "created_at": "2026-10-17T12:00:00Z"}],
+            "created_at",
+            first
+        )
+        
+        self.assertIn("search.in(id, 'C', ',')", cursor_filter(second, "created_at"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+# backend/utils/embedding_cache.py
+"""
+Cache for text embeddings.
+Embeddings are keyed by embedding model and a hash of the text, held in an
+in-process TTL cache and, when Redis is configured, in Redis so they are
+shared between workers. Both layers store vectors packed as float16, about
+1/16 the memory of a list of Python floats; the precision loss has a
+negligible effect on cosine similarity.
+"""
+import hashlib
+import logging
+import struct
+from typing import Dict, List
+
+from cachetools import TTLCache
+
+from utils.redis_client import get_redis
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Cache limits
+EMBEDDING_CACHE_MAXSIZE = 4096
+EMBEDDING_CACHE_TTL_SECONDS = 86400
+
+# Maximum texts sent in one embeddings request
+EMBEDDING_BATCH_SIZE = 16
+
+# In-process cache: key -> packed embedding
+_local_cache: TTLCache = TTLCache(maxsize=EMBEDDING_CACHE_MAXSIZE, ttl=EMBEDDING_CACHE_TTL_SECONDS)
+
+
+def _pack(embedding: List[float]) -> bytes:
+    """Pack an embedding as little-endian float16."""
+    return struct.pack(f"<{len(embedding)}e", *embedding)
+
+
+def _unpack(packed: bytes) -> List[float]:
+    """Unpack a float16-packed embedding."""
+    return list(struct.unpack(f"<{len(packed) // 2}e", packed))
+
+
+def embedding_cache_key(model: str, text: str) -> str:
+    """
+    Get the cache key for an embedding.
+
+    The key includes the model (deployment) name, so switching the embedding
+    deployment never returns vectors from the old model.
+    """
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+    return f"emb:f16:{model}:{digest}"
+
+
+async def get_cached_embedding(openai_client, model: str, text: str) -> List[float]:
+    """
+    Get the embedding for a text, creating it only on a cache miss.
+
+    Args:
+        openai_client: OpenAI adapter used on a cache miss
+        model: The embedding deployment name
+        text: Text to embed
+
+    Returns:
+        List of embedding values
+    """
+    embeddings = await get_cached_embeddings(openai_client, model, [text])
+    return embeddings[0]
+
+
+async def get_cached_embeddings(openai_client, model: str, texts: List[str]) -> List[List[float]]:
+    """
+    Get embeddings for several texts, creating the missing ones in batched calls.
+
+    Args:
+        openai_client: OpenAI adapter used for cache misses
+        model: The embedding deployment name
+        texts: Texts to embed
+
+    Returns:
+        List of embeddings, in the same order as the texts
+    """
+    keys = [embedding_cache_key(model, text) for text in texts]
+    found: Dict[str, bytes] = {}
+
+    for key in keys:
+        packed = _local_cache.get(key)
+        if packed is not None:
+            found[key] = packed
+
+    redis = await get_redis()
+    missing = [key for key in dict.fromkeys(keys) if key not in found]
+    if missing and redis is not None:
+        try:
+            for key, packed in zip(missing, await redis.mget(missing)):
+                if packed:
+                    found[key] = _local_cache[key] = packed
+        except Exception as e:
+            logger.warning(f"Error reading embeddings from Redis: {e}")
+
+    # Embed each distinct uncached text once
+    to_embed = {key: text for key, text in zip(keys, texts) if key not in found}
+    pending = list(to_embed.items())
+    created: Dict[str, List[float]] = {}
+    for start in range(0, len(pending), EMBEDDING_BATCH_SIZE):
+        batch = pending[start:start + EMBEDDING_BATCH_SIZE]
+        embeddings = await openai_client.create_embeddings(
+            model=model,
+            texts=[text for _, text in batch]
+        )
+        for (key, _), embedding in zip(batch, embeddings):
+            created[key] = embedding
+            found[key] = _local_cache[key] = _pack(embedding)
+
+        if redis is not None:
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for key, _ in batch:
+                        pipe.set(key, found[key], ex=EMBEDDING_CACHE_TTL_SECONDS)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Error writing embeddings to Redis: {e}")
+
+    # Freshly created embeddings are returned at full precision
+    return [created[key] if key in created else _unpack(found[key]) for key in keys]
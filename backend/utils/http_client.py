@@ -0,0 +1,91 @@
+# backend/utils/http_client.py
+"""
+Shared HTTP client session for calls to Azure services.
+
+Azure AI Search and Entra ID requests reuse one pooled aiohttp session, and
+Azure OpenAI requests one pooled httpx client, so TCP and TLS connections
+stay open between requests instead of being set up for every call.
+"""
+import aiohttp
+import httpx
+import logging
+import uuid
+from typing import Optional
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Connection pool limits
+HTTP_POOL_LIMIT = 100
+HTTP_POOL_LIMIT_PER_HOST = 50
+HTTP_KEEPALIVE_SECONDS = 60
+
+HTTPX_MAX_KEEPALIVE_CONNECTIONS = 50
+
+# Singleton session
+http_session: Optional[aiohttp.ClientSession] = None
+
+# Singleton httpx client for the OpenAI SDK
+httpx_client: Optional[httpx.AsyncClient] = None
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """
+    Get the shared HTTP client session.
+
+    Callers must not close the returned session; it is closed on shutdown
+    by `close_http_session`.
+
+    Returns:
+        Shared aiohttp client session
+    """
+    global http_session
+    if http_session is None or http_session.closed:
+        http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=HTTP_POOL_LIMIT,
+                limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+                ttl_dns_cache=300
+            )
+        )
+        logger.info("Created shared HTTP client session")
+    return http_session
+
+async def _add_request_id(request: httpx.Request):
+    """Tag each request with an X-Request-ID so it can be traced in Azure logs."""
+    request.headers.setdefault("X-Request-ID", uuid.uuid4().hex)
+
+def get_httpx_client() -> httpx.AsyncClient:
+    """
+    Get the shared httpx client used by the Azure OpenAI SDK.
+
+    Callers must not close the returned client; it is closed on shutdown
+    by `close_http_session`. The client keeps httpx's default timeout, so
+    the OpenAI SDK applies its own (or the one it is given) rather than
+    inheriting a client-wide one.
+
+    Returns:
+        Shared httpx async client
+    """
+    global httpx_client
+    if httpx_client is None or httpx_client.is_closed:
+        httpx_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_LIMIT,
+                max_keepalive_connections=HTTPX_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_SECONDS
+            ),
+            event_hooks={"request": [_add_request_id]}
+        )
+        logger.info("Created shared httpx client")
+    return httpx_client
+
+async def close_http_session():
+    """Close the shared HTTP client session and httpx client."""
+    global http_session, httpx_client
+    if http_session is not None and not http_session.closed:
+        await http_session.close()
+    http_session = None
+    if httpx_client is not None and not httpx_client.is_closed:
+        await httpx_client.aclose()
+    httpx_client = None
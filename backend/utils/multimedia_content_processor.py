@@ -35,10 +35,10 @@ from azure.search.documents.aio import SearchClient
 # Internal modules – make sure these exist in your project
 ###############################################################################
 from utils.vector_compat import Vector  # noqa: F401 – converts numpy → list when needed
-from config.settings import Settings
+from config.settings import get_settings
 from rag.openai_adapter import get_openai_adapter
 
-settings = Settings()
+settings = get_settings()
 logger = logging.getLogger(__name__)
 ISO = lambda dt: dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")  # noqa: E731
 
@@ -0,0 +1,20 @@
+# backend/utils/odata.py
+"""
+Helpers for building Azure AI Search OData filter expressions.
+"""
+
+
+def quote_odata_string(value: str) -> str:
+    """
+    Quote a value as an OData string literal.
+
+    Single quotes are escaped by doubling them, so user input cannot end
+    the literal and change the filter.
+
+    Args:
+        value: The string value
+
+    Returns:
+        The quoted literal, e.g. `'O''Brien'`
+    """
+    return "'" + str(value).replace("'", "''") + "'"
@@ -0,0 +1,82 @@
+# backend/utils/pagination.py
+"""
+Keyset (cursor) pagination for Azure AI Search.
+Deep pages read with `skip` cost the search service time proportional to the
+offset, and `skip` is capped at 100000. A cursor records where the previous
+page ended instead: the sort value of its last document, plus the ids of the
+documents sharing that value, so ties are neither repeated nor skipped. When a
+tie spans several pages, the ids from all of them are carried forward.
+"""
+import base64
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+
+from utils.odata import quote_odata_string
+
+# OData DateTimeOffset literal, e.g. 2024-05-01T10:00:00.123Z
+_DATETIME_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:\d{2})$")
+
+
+def encode_cursor(documents: List[Dict[str, Any]], field: str, previous_cursor: Optional[str] = None) -> str:
+    """
+    Build the cursor for the page after `documents`.
+
+    Args:
+        documents: The current page, sorted by `field` descending
+        field: DateTimeOffset field the page is sorted on
+        previous_cursor: Cursor the current page was read with, if any
+
+    Returns:
+        Opaque URL-safe cursor string
+    """
+    last_value = documents[-1][field]
+    last_ids = [document["id"] for document in documents if document.get(field) == last_value]
+    if previous_cursor:
+        previous_value, previous_ids = _decode_cursor(previous_cursor)
+        # The whole page shares the previous cursor's value, so the tie spans pages;
+        # keep excluding the ids returned on the earlier pages too
+        if previous_value == last_value:
+            last_ids = previous_ids + last_ids
+    return base64.urlsafe_b64encode(orjson.dumps([last_value, last_ids])).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, List[str]]:
+    """
+    Decode and validate a cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        last_value, last_ids = orjson.loads(base64.urlsafe_b64decode(cursor))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+    if not isinstance(last_value, str) or not _DATETIME_PATTERN.match(last_value):
+        raise ValueError("Invalid cursor")
+    if not isinstance(last_ids, list) or not all(isinstance(id_, str) for id_ in last_ids):
+        raise ValueError("Invalid cursor")
+    return last_value, last_ids
+
+
+def cursor_filter(cursor: str, field: str) -> str:
+    """
+    Build the filter selecting the documents after a cursor.
+
+    Args:
+        cursor: Cursor returned by `encode_cursor`
+        field: DateTimeOffset field the pages are sorted on, descending
+
+    Returns:
+        OData filter expression
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    last_value, last_ids = _decode_cursor(cursor)
+    if not last_ids:
+        return f"{field} lt {last_value}"
+    seen_ids = quote_odata_string(",".join(last_ids))
+    return f"({field} lt {last_value} or ({field} eq {last_value} and not search.in(id, {seen_ids}, ',')))"
@@ -0,0 +1,33 @@
+# backend/utils/redis_client.py
+"""
+Shared Redis client.
+Redis is optional: when REDIS_URL is not configured (or the redis package is
+not installed) callers get None and should fall back to in-process caching.
+"""
+import logging
+from typing import Optional
+
+from config.settings import get_settings
+
+# Initialize settings
+settings = get_settings()
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:
+    aioredis = None
+    logger.warning("redis package not installed, Redis caching disabled")
+
+# Singleton instance
+redis_client = None
+
+async def get_redis() -> Optional["aioredis.Redis"]:
+    """Get or create the Redis client singleton, or None if Redis is not configured."""
+    global redis_client
+    if redis_client is None and settings.REDIS_URL and aioredis is not None:
+        redis_client = aioredis.from_url(settings.REDIS_URL)
+        logger.info("Redis client initialized")
+    return redis_client
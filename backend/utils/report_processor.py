@@ -17,11 +17,11 @@ from azure.ai.formrecognizer import DocumentAnalysisClient
 from azure.storage.blob import BlobServiceClient, ContentSettings
 from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
 
-from config.settings import Settings
+from config.settings import get_settings
 from models.student_report import StudentReport, Subject, ReportType
 from rag.openai_adapter import get_openai_adapter
 
-settings = Settings()
+settings = get_settings()
 logger = logging.getLogger(__name__)
 
 class StudentReportProcessor:
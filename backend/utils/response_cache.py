@@ -0,0 +1,72 @@
+# backend/utils/response_cache.py
+"""
+Response caching for read-heavy GET endpoints.
+Uses fastapi-cache with a Redis backend when Redis is configured and an
+in-process backend otherwise. Cached responses are scoped per user so one
+user's data is never served to another.
+"""
+import hashlib
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+
+from utils.redis_client import get_redis
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Key prefix for all cached responses
+CACHE_PREFIX = "plc"
+
+# Default expiry for per-user cached responses
+USER_CACHE_EXPIRE_SECONDS = 300
+
+
+def user_namespace(user_id: str) -> str:
+    """Get the cache namespace holding all cached responses for a user."""
+    return f"user:{user_id}"
+
+
+def user_id_key_builder(
+    func: Callable,
+    namespace: str = "",
+    request: Optional[Request] = None,
+    response: Optional[Response] = None,
+    args: Tuple[Any, ...] = (),
+    kwargs: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Build a cache key scoped to the current user.
+    
+    The key is `<prefix>:user:<id>:<hash>` where the hash covers the endpoint
+    and its query parameters, so `invalidate_user_cache` can drop every
+    cached response for a user at once.
+    """
+    current_user = (kwargs or {}).get("current_user") or {}
+    query = sorted(request.query_params.multi_items()) if request else []
+    digest = hashlib.sha256(f"{func.__module__}.{func.__name__}:{query}".encode()).hexdigest()
+    return f"{FastAPICache.get_prefix()}:{user_namespace(current_user.get('id'))}:{digest}"
+
+
+async def init_response_cache():
+    """Initialize the response cache backend. Call once on startup."""
+    redis = await get_redis()
+    if redis is not None:
+        FastAPICache.init(RedisBackend(redis), prefix=CACHE_PREFIX)
+        logger.info("Response cache initialized with Redis backend")
+    else:
+        FastAPICache.init(InMemoryBackend(), prefix=CACHE_PREFIX)
+        logger.info("Response cache initialized with in-memory backend")
+
+
+async def invalidate_user_cache(user_id: str):
+    """Remove all cached responses for a user."""
+    try:
+        await FastAPICache.clear(namespace=user_namespace(user_id))
+    except Exception as e:
+        logger.warning(f"Could not invalidate response cache for user {user_id}: {e}")
+
@@ -0,0 +1,54 @@
+# backend/utils/streaming.py
+"""
+Helpers for streaming responses to the client.
+Formats events produced by the AI services as Server-Sent Events (SSE).
+"""
+import logging
+from typing import Any, AsyncIterator, Dict
+
+import orjson
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Media type and headers for Server-Sent Events responses
+SSE_MEDIA_TYPE = "text/event-stream"
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Disable proxy buffering (nginx) so tokens flush immediately
+}
+
+# Final event sent once a stream has finished
+SSE_DONE = b"data: [DONE]\n\n"
+
+
+def format_sse(data: Dict[str, Any]) -> bytes:
+    """
+    Format a single event as an SSE `data:` frame.
+
+    Serialized with orjson, like the app's non-streaming responses, so
+    datetimes, UUIDs and enums come out in the same format either way.
+    """
+    return b"data: " + orjson.dumps(data, default=str) + b"\n\n"
+
+
+async def sse_stream(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """
+    Convert an async iterator of event dicts into SSE frames.
+
+    Errors raised while streaming are sent to the client as an `error` event,
+    since the response status has already been sent at that point.
+
+    Args:
+        events: Async iterator of JSON-serializable event dicts
+
+    Yields:
+        SSE-formatted frames
+    """
+    try:
+        async for event in events:
+            yield format_sse(event)
+    except Exception as e:
+        logger.error(f"Error while streaming response: {e}", exc_info=True)
+        yield format_sse({"error": str(e)})
+    yield SSE_DONE
@@ -14,11 +14,11 @@ from datetime import datetime
 from typing import Dict, Any, List, Optional
 
 from services.search_service import get_search_service
-from config.settings import Settings
+from config.settings import get_settings
 from rag.openai_adapter import get_openai_adapter
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -0,0 +1,95 @@
+# backend/utils/user_cache.py
+"""
+Cache for user profile documents.
+User documents are read from the users index at the start of most user and
+learning plan requests. When Redis is configured they are cached there, so
+those reads skip the Azure AI Search round trip. The embedding is not
+cached; none of the readers need it. Every profile write goes through
+`refresh_cached_user`, so no stale profile is served after an update.
+"""
+import logging
+from typing import Any, Dict, Optional
+
+import orjson
+
+from utils.redis_client import get_redis
+from utils.response_cache import invalidate_user_cache
+
+# Setup logger
+logger = logging.getLogger(__name__)
+
+# Cached user documents expire after 5 minutes
+USER_CACHE_TTL_SECONDS = 300
+
+
+def user_cache_key(user_id: str) -> str:
+    """Get the cache key for a user document."""
+    return f"user:doc:{user_id}"
+
+
+async def cache_user(user: Dict[str, Any]):
+    """
+    Store a user document in the cache.
+
+    Args:
+        user: User document, including its id
+    """
+    redis = await get_redis()
+    if redis is None:
+        return
+    try:
+        document = {key: value for key, value in user.items() if key != "embedding"}
+        await redis.set(user_cache_key(user["id"]), orjson.dumps(document), ex=USER_CACHE_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Error caching user {user.get('id')}: {e}")
+
+
+async def get_cached_user(search_service, user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a user document, reading the users index only on a cache miss.
+
+    Args:
+        search_service: Search service used on a cache miss
+        user_id: The user ID
+
+    Returns:
+        User document, or None if the user does not exist
+    """
+    redis = await get_redis()
+    if redis is not None:
+        try:
+            cached = await redis.get(user_cache_key(user_id))
+            if cached:
+                return orjson.loads(cached)
+        except Exception as e:
+            logger.warning(f"Error reading cached user {user_id}: {e}")
+
+    user = await search_service.get_user(user_id)
+    if user:
+        user = dict(user)
+        await cache_user(user)
+    return user
+
+
+async def refresh_cached_user(user_id: str, user: Optional[Dict[str, Any]] = None):
+    """
+    Bring the caches in line with a user's profile after it was written.
+
+    Stores the new user document when it is given and drops the cached one
+    otherwise, then drops every cached response built from the old profile.
+    Call this from every path that writes a user profile.
+
+    Args:
+        user_id: The user ID
+        user: The saved user document, if the write produced one
+    """
+    if user is not None:
+        await cache_user(user)
+    else:
+        redis = await get_redis()
+        if redis is not None:
+            try:
+                await redis.delete(user_cache_key(user_id))
+            except Exception as e:
+                logger.warning(f"Error removing cached user {user_id}: {e}")
+    await invalidate_user_cache(user_id)
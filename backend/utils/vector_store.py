@@ -21,10 +21,16 @@ project_root = os.path.dirname(backend_dir)
 sys.path.insert(0, project_root)  # Add project root to path
 
 # Now import using absolute imports
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
+# The app imports the backend directory's modules directly; scripts import them through
+# the backend package. Use whichever layout is loaded so the shared client stays a singleton.
+try:
+    from utils.http_client import get_http_session
+except ImportError:
+    from backend.utils.http_client import get_http_session
 
 # Initialize settings
-settings = Settings()
+settings = get_settings()
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -50,10 +56,6 @@ class AzureSearchVectorStore:
         """
         try:
             # Use direct Azure Search API approach
-            # Get Azure Search settings
-            from backend.config.settings import Settings
-            settings = Settings()
-            
             if (settings.AZURE_SEARCH_ENDPOINT and 
                 settings.AZURE_SEARCH_KEY and 
                 settings.AZURE_SEARCH_INDEX_NAME):
@@ -106,7 +108,8 @@ class AzureSearchVectorStore:
         self, 
         query_text: str, 
         filter_expression: Optional[str] = None, 
-        limit: int = 10
+        limit: int = 10,
+        select: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for content using vector similarity.
@@ -115,16 +118,13 @@ class AzureSearchVectorStore:
             query_text: Text to search for
             filter_expression: Optional filter expression
             limit: Maximum number of results to return
+            select: Optional list of fields to return (all fields if not set)
             
         Returns:
             List of matching content items
         """
         try:
             # Use direct Azure Search API approach
-            # Get Azure Search settings
-            from backend.config.settings import Settings
-            settings = Settings()
-            
             if (settings.AZURE_SEARCH_ENDPOINT and 
                 settings.AZURE_SEARCH_KEY and 
                 settings.AZURE_SEARCH_INDEX_NAME):
@@ -149,9 +149,6 @@ class AzureSearchVectorStore:
                     # Create a placeholder embedding of right dimension (fallback)
                     vector = [0.0] * 1536
                 
-                import aiohttp
-                import json
-                
                 # Azure Search endpoint for vector search
                 url = f"{settings.AZURE_SEARCH_ENDPOINT}/indexes/{settings.AZURE_SEARCH_INDEX_NAME}/docs/search?api-version=2023-11-01"
                 
@@ -178,36 +175,40 @@ class AzureSearchVectorStore:
                 # Add filter if provided
                 if filter_expression:
                     search_payload["filter"] = filter_expression
+                
+                # Only return the requested fields to reduce payload size
+                if select:
+                    search_payload["select"] = ",".join(select)
                     
-                # Use aiohttp for async request
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(url, headers=headers, json=search_payload) as response:
-                        if response.status == 200:
-                            result = await response.json()
-                            
-                            # Convert to standard format
-                            results = []
-                            if "value" in result:
-                                for doc in result["value"]:
-                                    # Create result with consistent field naming
-                                    item = {}
-                                    
-                                    # Copy all fields except for special handling of page_content
-                                    for key, value in doc.items():
-                                        if key not in ["@search.score", "@search.rerankerScore", "@search.vectorSearchScore"]:
-                                            if key == "page_content":
-                                                item["content"] = value
-                                            else:
-                                                item[key] = value
-                                                
-                                    results.append(item)
-                            
-                            logger.info(f"Vector search succeeded, found {len(results)} results")
-                            return results
-                        else:
-                            error_text = await response.text()
-                            logger.warning(f"Vector search failed: {response.status}, {error_text}")
-                            return []
+                # Use the shared HTTP session for the async request
+                session = await get_http_session()
+                async with session.post(url, headers=headers, json=search_payload) as response:
+                    if response.status == 200:
+                        result = await response.json()
+                        
+                        # Convert to standard format
+                        results = []
+                        if "value" in result:
+                            for doc in result["value"]:
+                                # Create result with consistent field naming
+                                item = {}
+                                
+                                # Copy all fields except for special handling of page_content
+                                for key, value in doc.items():
+                                    if key not in ["@search.score", "@search.rerankerScore", "@search.vectorSearchScore"]:
+                                        if key == "page_content":
+                                            item["content"] = value
+                                        else:
+                                            item[key] = value
+                                            
+                                results.append(item)
+                        
+                        logger.info(f"Vector search succeeded, found {len(results)} results")
+                        return results
+                    else:
+                        error_text = await response.text()
+                        logger.warning(f"Vector search failed: {response.status}, {error_text}")
+                        return []
             else:
                 logger.error("Azure Search settings not available")
                 return []
@@ -296,10 +297,6 @@ class AzureSearchVectorStore:
             logger.info(f"Processing content for vector store: id={metadata.get('id')}, title={metadata.get('title')}")
             
             # Use direct Azure Search API approach
-            # Get Azure Search settings
-            from backend.config.settings import Settings
-            settings = Settings()
-            
             # Check if Azure Search settings are available
             if (settings.AZURE_SEARCH_ENDPOINT and 
                 settings.AZURE_SEARCH_KEY and 
@@ -535,10 +532,6 @@ class AzureSearchVectorStore:
         """
         try:
             # Use direct Azure Search API approach
-            # Get Azure Search settings
-            from backend.config.settings import Settings
-            settings = Settings()
-            
             if (settings.AZURE_SEARCH_ENDPOINT and 
                 settings.AZURE_SEARCH_KEY and 
                 settings.AZURE_SEARCH_INDEX_NAME):
@@ -599,17 +592,10 @@ class AzureSearchVectorStore:
         """
         try:
             # Use direct Azure Search API approach
-            # Get Azure Search settings
-            from backend.config.settings import Settings
-            settings = Settings()
-            
             if (settings.AZURE_SEARCH_ENDPOINT and 
                 settings.AZURE_SEARCH_KEY and 
                 settings.AZURE_SEARCH_INDEX_NAME):
                 
-                import aiohttp
-                import json
-                
                 # Azure Search endpoint
                 url = f"{settings.AZURE_SEARCH_ENDPOINT}/indexes/{settings.AZURE_SEARCH_INDEX_NAME}/docs/search?api-version=2023-11-01"
                 
@@ -626,35 +612,35 @@ class AzureSearchVectorStore:
                     "top": limit
                 }
                 
-                # Use aiohttp for async request
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(url, headers=headers, json=search_payload) as response:
-                        if response.status == 200:
-                            result = await response.json()
-                            
-                            # Convert to standard format
-                            results = []
-                            if "value" in result:
-                                for doc in result["value"]:
-                                    # Create result with consistent field naming
-                                    item = {}
-                                    
-                                    # Copy all fields except for special handling of page_content
-                                    for key, value in doc.items():
-                                        if key not in ["@search.score", "@search.rerankerScore"]:
-                                            if key == "page_content":
-                                                item["content"] = value
-                                            else:
-                                                item[key] = value
-                                                
-                                    results.append(item)
-                            
-                            logger.info(f"Filter search succeeded, found {len(results)} results")
-                            return results
-                        else:
-                            error_text = await response.text()
-                            logger.warning(f"Filter search failed: {response.status}, {error_text}")
-                            return []
+                # Use the shared HTTP session for the async request
+                session = await get_http_session()
+                async with session.post(url, headers=headers, json=search_payload) as response:
+                    if response.status == 200:
+                        result = await response.json()
+                        
+                        # Convert to standard format
+                        results = []
+                        if "value" in result:
+                            for doc in result["value"]:
+                                # Create result with consistent field naming
+                                item = {}
+                                
+                                # Copy all fields except for special handling of page_content
+                                for key, value in doc.items():
+                                    if key not in ["@search.score", "@search.rerankerScore"]:
+                                        if key == "page_content":
+                                            item["content"] = value
+                                        else:
+                                            item[key] = value
+                                            
+                                results.append(item)
+                        
+                        logger.info(f"Filter search succeeded, found {len(results)} results")
+                        return results
+                    else:
+                        error_text = await response.text()
+                        logger.warning(f"Filter search failed: {response.status}, {error_text}")
+                        return []
             else:
                 logger.error("Azure Search settings not available")
                 return []
@@ -408,7 +408,7 @@ export const createAILearningPlan = async (planData) => {
     if (typeof planData === 'string' || (planData && planData.subject && !planData.student_profile_id)) {
       const subject = typeof planData === 'string' ? planData : planData.subject;
       const learning_period = typeof planData === 'string' ? 'one_month' : (planData.learning_period || 'one_month');
-      return await api.post('/ai/learning-plan', { subject, learning_period });
+      return await api.post('/ai/learning-plan?stream=false', { subject, learning_period });
     }
     
     throw new Error('Invalid plan data - must provide either subject or student_profile_id');